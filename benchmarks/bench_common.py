@@ -0,0 +1,181 @@
+"""
+Utilitários compartilhados pelos benchmarks.
+
+Responsabilidades:
+- Medir o tempo de uma função em várias repetições (melhor e mediana)
+- Gravar e ler baselines em JSON (por máquina: não são versionadas)
+- Comparar uma execução com a baseline e apontar regressões
+- Estimar o expoente de crescimento entre tamanhos (curva de escala)
+"""
+
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+
+PROJECT_DIR = Path(__file__).parent.parent
+BASELINES_DIR = Path(__file__).parent / "baselines"
+TOLERANCIA_PADRAO = 0.25
+# Diferenças absolutas abaixo disso são ruído de medição, não regressão
+PISO_SEGUNDOS = 0.01
+
+sys.path.insert(0, str(PROJECT_DIR / "importers"))
+sys.path.insert(0, str(PROJECT_DIR / "tools"))
+
+
+def measure(
+    fn: Callable[..., Any],
+    repeticoes: int = 3,
+    preparar: Callable[[], Any] | None = None,
+) -> dict[str, float]:
+    """
+    Executa fn `repeticoes` vezes.
+
+    Com `preparar`, cada repetição chama fn(preparar()) e só fn é medida
+    (por exemplo, um diretório de artefatos novo por execução).
+
+    Returns:
+        Dict com melhor, mediana (segundos) e repeticoes
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        args = () if preparar is None else (preparar(),)
+        inicio = time.perf_counter()
+        fn(*args)
+        tempos.append(time.perf_counter() - inicio)
+    return {
+        "melhor": min(tempos),
+        "mediana": statistics.median(tempos),
+        "repeticoes": repeticoes,
+    }
+
+
+def result_key(caso: str, tamanho: int) -> str:
+    return f"{caso}@{tamanho}"
+
+
+def growth_exponents(results: dict[str, dict]) -> dict[str, float]:
+    """
+    Expoente k de t ~ n^k entre o menor e o maior tamanho de cada caso.
+
+    Usa o melhor tempo (menos sensível a ruído); 1.0 é linear, 2.0 quadrático.
+    """
+    por_caso: dict[str, list[tuple[int, float]]] = {}
+    for medida in results.values():
+        por_caso.setdefault(medida["caso"], []).append(
+            (medida["tamanho"], medida["melhor"])
+        )
+
+    expoentes = {}
+    for caso, pontos in por_caso.items():
+        if len(pontos) < 2:
+            continue
+        pontos.sort()
+        (n1, t1), (n2, t2) = pontos[0], pontos[-1]
+        if t1 > 0 and t2 > 0:
+            expoentes[caso] = math.log(t2 / t1) / math.log(n2 / n1)
+    return expoentes
+
+
+def save_baseline(path: Path, results: dict[str, dict], **extra) -> None:
+    """Grava os resultados (e o ambiente da medição) como baseline JSON."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "maquina": platform.machine(),
+        **extra,
+        "resultados": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False, sort_keys=True)
+
+
+def check_baseline(path: Path) -> bool:
+    """Avisa (em stderr) quando a baseline não existe; True se existe."""
+    if path.exists():
+        return True
+    print(
+        f"Baseline não encontrada: {path}\n"
+        f"Baselines dependem da máquina; grave uma antes com --salvar {path}",
+        file=sys.stderr,
+    )
+    return False
+
+
+def load_baseline(path: Path) -> dict[str, dict]:
+    """Resultados de uma baseline gravada por save_baseline."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["resultados"]
+
+
+def compare(
+    results: dict[str, dict],
+    baseline: dict[str, dict],
+    tolerancia: float = TOLERANCIA_PADRAO,
+    metrica: str = "melhor",
+    piso_segundos: float = PISO_SEGUNDOS,
+) -> list[dict[str, Any]]:
+    """
+    Compara cada medida presente nas duas execuções.
+
+    Returns:
+        Lista (na ordem de results) com chave, antes, depois, razao e
+        regressao (razao acima de 1 + tolerancia e diferença acima do piso)
+    """
+    linhas = []
+    for chave, medida in results.items():
+        if chave not in baseline:
+            continue
+        antes = baseline[chave][metrica]
+        depois = medida[metrica]
+        razao = depois / antes if antes > 0 else math.inf
+        linhas.append(
+            {
+                "chave": chave,
+                "antes": antes,
+                "depois": depois,
+                "razao": razao,
+                "regressao": razao > 1 + tolerancia and depois - antes > piso_segundos,
+            }
+        )
+    return linhas
+
+
+def print_results(results: dict[str, dict], unidade: str | None = None) -> None:
+    """
+    Tabela de resultados; com `unidade`, mostra também a vazão por segundo
+    (itens processados, ou o tamanho quando a medida não informa itens).
+    """
+    for chave, medida in results.items():
+        linha = (
+            f"  {chave:45s} melhor={medida['melhor']:9.4f}s "
+            f"mediana={medida['mediana']:9.4f}s"
+        )
+        if unidade:
+            itens = medida.get("itens", medida["tamanho"])
+            vazao = itens / medida["melhor"] if medida["melhor"] else 0
+            linha += f"  {vazao:12,.0f} {unidade}/s"
+        print(linha)
+
+
+def print_comparison(linhas: list[dict[str, Any]]) -> bool:
+    """
+    Imprime a comparação com a baseline.
+
+    Returns:
+        True se houve alguma regressão
+    """
+    for linha in linhas:
+        marca = "REGRESSÃO" if linha["regressao"] else "ok"
+        print(
+            f"  {linha['chave']:45s} {linha['antes']:9.4f}s -> "
+            f"{linha['depois']:9.4f}s ({linha['razao']:5.2f}x) {marca}"
+        )
+    return any(linha["regressao"] for linha in linhas)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos handlers do organizze_v5 em entradas sintéticas.
+
+Casos medidos em cada tamanho (exportação de gerar_organizze_sintetico):
+- identify_card_payment_indices
+- identify_transfers
+- generate_transfer_entries
+- generate_expense_entries
+- generate_income_entries
+- organizze_v5.main() completo (sem cache de pares)
+
+Uso:
+    python benchmarks/bench_importer.py --tamanhos 10000 100000
+    python benchmarks/bench_importer.py --salvar benchmarks/baselines/importer.json
+    python benchmarks/bench_importer.py --comparar benchmarks/baselines/importer.json
+
+Com --comparar, sai com código 1 se algum caso ficou mais lento que a
+baseline além da tolerância, e 2 se a baseline não existe (baselines
+dependem da máquina e não são versionadas: grave com --salvar antes).
+
+Cada repetição do main() roda num diretório novo, com cópia da entrada:
+pendencias.sqlite e o cache de pares ficam ao lado da entrada e mudariam
+o trabalho das repetições seguintes.
+"""
+
+import argparse
+import itertools
+import logging
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from bench_common import (
+    BASELINES_DIR,
+    TOLERANCIA_PADRAO,
+    check_baseline,
+    compare,
+    growth_exponents,
+    load_baseline,
+    measure,
+    print_comparison,
+    print_results,
+    result_key,
+    save_baseline,
+)
+
+import card_payments_handler
+import expenses_handler
+import incomes_handler
+import organizze_v5
+import transfers_handler
+from gerar_organizze_sintetico import gerar_exportacao, salvar_exportacao
+from organizze_shared import add_cents_column
+
+
+TAMANHOS_PADRAO = (10_000, 100_000, 1_000_000)
+SEED = 42
+
+
+def prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Mesma preparação do organizze_v5.main()."""
+    df = df.copy()
+    df["Data"] = pd.to_datetime(df["Data"])
+    df = df.sort_values(["Data", "Valor"], kind="stable").reset_index(drop=True)
+    return add_cents_column(df)
+
+
+def bench_size(tamanho: int, repeticoes: int, workdir: Path) -> dict[str, dict]:
+    """Mede todos os casos para um tamanho de entrada."""
+    raw = gerar_exportacao(tamanho, seed=SEED)
+    entrada = workdir / f"sintetico_{tamanho}.parquet"
+    salvar_exportacao(raw, entrada)
+    df = prepare_frame(raw)
+
+    pagto = card_payments_handler.identify_card_payment_indices(df)
+    processed, orphans = transfers_handler.identify_transfers(df, pagto)
+    excluded = pagto | processed | {o["idx"] for o in orphans}
+
+    execucoes = itertools.count()
+
+    def nova_execucao() -> list[str]:
+        """Argumentos do main() com entrada e ledger num diretório novo."""
+        pasta = workdir / f"main_{tamanho}_{next(execucoes)}"
+        pasta.mkdir()
+        copia = shutil.copy(entrada, pasta / entrada.name)
+        return [
+            "--entrada",
+            str(copia),
+            "--ledger",
+            str(pasta / "ledger"),
+            "--sem-cache-pares",
+        ]
+
+    casos = {
+        "identify_card_payment_indices": lambda: (
+            card_payments_handler.identify_card_payment_indices(df)
+        ),
+        "identify_transfers": lambda: transfers_handler.identify_transfers(df, pagto),
+        "generate_transfer_entries": lambda: (
+            transfers_handler.generate_transfer_entries(df, processed)
+        ),
+        "generate_expense_entries": lambda: expenses_handler.generate_expense_entries(
+            df, excluded
+        ),
+        "generate_income_entries": lambda: incomes_handler.generate_income_entries(
+            df, excluded
+        ),
+        "organizze_v5.main": organizze_v5.main,
+    }
+    preparos = {"organizze_v5.main": nova_execucao}
+
+    results = {}
+    for caso, fn in casos.items():
+        medida = measure(fn, repeticoes, preparos.get(caso))
+        results[result_key(caso, tamanho)] = {
+            "caso": caso,
+            "tamanho": tamanho,
+            **medida,
+        }
+        print_results({result_key(caso, tamanho): results[result_key(caso, tamanho)]})
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark do organizze_v5")
+    parser.add_argument(
+        "--tamanhos",
+        type=int,
+        nargs="+",
+        default=list(TAMANHOS_PADRAO),
+        help="Número de linhas das entradas sintéticas",
+    )
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--salvar", type=Path, help="Grava os resultados como baseline")
+    parser.add_argument(
+        "--comparar",
+        type=Path,
+        nargs="?",
+        const=BASELINES_DIR / "importer.json",
+        help="Compara com a baseline (padrão: benchmarks/baselines/importer.json)",
+    )
+    parser.add_argument(
+        "--tolerancia",
+        type=float,
+        default=TOLERANCIA_PADRAO,
+        help="Aumento relativo aceito antes de apontar regressão (0.25 = 25%%)",
+    )
+    args = parser.parse_args(argv)
+    if args.comparar and not check_baseline(args.comparar):
+        return 2
+
+    logging.disable(logging.CRITICAL)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for tamanho in sorted(args.tamanhos):
+            print(f"Tamanho {tamanho}:")
+            results |= bench_size(tamanho, args.repeticoes, Path(tmp))
+
+    expoentes = growth_exponents(results)
+    if expoentes:
+        print("Expoente de crescimento (t ~ n^k):")
+        for caso, k in expoentes.items():
+            print(f"  {caso:45s} k={k:.2f}")
+
+    if args.salvar:
+        save_baseline(args.salvar, results, expoentes=expoentes, seed=SEED)
+        print(f"Baseline gravada em {args.salvar}")
+
+    if args.comparar:
+        print(f"Comparação com {args.comparar}:")
+        linhas = compare(results, load_baseline(args.comparar), args.tolerancia)
+        if print_comparison(linhas):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
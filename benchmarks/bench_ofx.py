@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Benchmark da classificação do smart_ofx_importer.
+
+Gera um mapping.csv sintético (1 a 3 palavras e um código) e extratos OFX
+sintéticos em que parte das transações casa com algum padrão, e mede:
+- carregar_mapping, por tamanho de mapping
+- limpar_texto_busca, por número de transações
+- classificar_transacao, por tamanho de mapping (amostra fixa de transações)
+- processar_ofx, por número de transações (mapping de tamanho fixo)
+
+A vazão é reportada em transações (ou padrões) por segundo. Baselines e
+comparação funcionam como em bench_importer.
+
+Uso:
+    python benchmarks/bench_ofx.py
+    python benchmarks/bench_ofx.py --mappings 900 50000 --extratos 100 1000000
+    python benchmarks/bench_ofx.py --salvar benchmarks/baselines/ofx.json
+    python benchmarks/bench_ofx.py --comparar
+"""
+
+import argparse
+import csv
+import sys
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from bench_common import (
+    BASELINES_DIR,
+    TOLERANCIA_PADRAO,
+    check_baseline,
+    compare,
+    growth_exponents,
+    load_baseline,
+    measure,
+    print_comparison,
+    print_results,
+    result_key,
+    save_baseline,
+)
+
+from smart_ofx_importer import (
+    carregar_mapping,
+    classificar_transacao,
+    limpar_texto_busca,
+    processar_ofx,
+)
+
+
+MAPPINGS_PADRAO = (900, 5_000, 50_000)
+EXTRATOS_PADRAO = (100, 10_000, 100_000)
+MAPPING_PROCESSAR = 900
+AMOSTRA_CLASSIFICAR = 1_000
+TAXA_ACERTO = 0.7
+SEED = 42
+
+PALAVRAS = [
+    "MERCADO", "PADARIA", "FARMACIA", "POSTO", "LOJA", "RESTAURANTE", "BAR",
+    "UBER", "IFOOD", "NETFLIX", "SPOTIFY", "AMAZON", "AMERICANAS", "CARREFOUR",
+    "EXTRA", "DROGARIA", "SHELL", "IPIRANGA", "CINEMA", "LIVRARIA", "PET",
+    "ACADEMIA", "CLINICA", "ESCOLA", "CURSO", "HOTEL", "PASSAGEM", "ESTACIONAMENTO",
+]  # fmt: skip
+CONTAS = [
+    "Expenses:Alimentacao",
+    "Expenses:Transporte",
+    "Expenses:Saude",
+    "Expenses:Lazer",
+    "Expenses:Educacao",
+    "Expenses:Moradia",
+]
+
+
+def gerar_padroes(tamanho: int, seed: int = SEED) -> list[str]:
+    """Padrões distintos, em maiúsculas, como os de tools/mapping.csv."""
+    rng = np.random.default_rng(seed)
+    padroes: dict[str, None] = {}
+    while len(padroes) < tamanho:
+        palavras = rng.choice(PALAVRAS, rng.integers(1, 4))
+        padroes[f"{' '.join(palavras)} {rng.integers(0, 10**6):06d}"] = None
+    return list(padroes)
+
+
+def escrever_mapping(path: Path, padroes: list[str], seed: int = SEED) -> None:
+    """Grava um mapping.csv (padrao, conta_alvo) com os padrões dados."""
+    rng = np.random.default_rng(seed)
+    contas = rng.choice(CONTAS, len(padroes))
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["padrao", "conta_alvo"])
+        writer.writerows(zip(padroes, contas))
+
+
+def gerar_memos(padroes: list[str], tamanho: int, seed: int = SEED) -> list[str]:
+    """Memos de extrato: TAXA_ACERTO casam com um padrão, o resto não."""
+    rng = np.random.default_rng(seed)
+    escolhidos = rng.integers(0, len(padroes), tamanho)
+    acertos = rng.random(tamanho) < TAXA_ACERTO
+    datas = rng.integers(1, 28, tamanho)
+    return [
+        f"COMPRA CARTAO {padroes[i]} {d:02d}/01"
+        if acerto
+        else f"PIX ENVIADO {PALAVRAS[i % len(PALAVRAS)]} {i:08d}"
+        for i, acerto, d in zip(escolhidos, acertos, datas)
+    ]
+
+
+def escrever_ofx(path: Path, memos: list[str], seed: int = SEED) -> None:
+    """Grava um extrato OFX 1.x (SGML) com uma transação por memo."""
+    rng = np.random.default_rng(seed)
+    valores = -rng.lognormal(4, 1, len(memos)).round(2)
+    inicio = date(2024, 1, 1)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(
+            "OFXHEADER:100\nDATA:OFXSGML\nVERSION:102\nSECURITY:NONE\n"
+            "ENCODING:UTF-8\nCHARSET:NONE\nCOMPRESSION:NONE\nOLDFILEUID:NONE\n"
+            "NEWFILEUID:NONE\n\n"
+            "<OFX><SIGNONMSGSRSV1><SONRS><STATUS><CODE>0<SEVERITY>INFO</STATUS>"
+            "<DTSERVER>20240101<LANGUAGE>POR</SONRS></SIGNONMSGSRSV1>"
+            "<BANKMSGSRSV1><STMTTRNRS><TRNUID>1<STATUS><CODE>0<SEVERITY>INFO"
+            "</STATUS><STMTRS><CURDEF>BRL<BANKACCTFROM><BANKID>0001<ACCTID>12345"
+            "<ACCTTYPE>CHECKING</BANKACCTFROM><BANKTRANLIST>"
+            "<DTSTART>20240101<DTEND>20241231\n"
+        )
+        for pos, (memo, valor) in enumerate(zip(memos, valores)):
+            dia = (inicio + timedelta(days=pos % 365)).strftime("%Y%m%d")
+            f.write(
+                f"<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>{dia}<TRNAMT>{valor:.2f}"
+                f"<FITID>SINT{pos:09d}<MEMO>{memo}</STMTTRN>\n"
+            )
+        f.write(
+            "</BANKTRANLIST><LEDGERBAL><BALAMT>0.00<DTASOF>20241231</LEDGERBAL>"
+            "</STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n"
+        )
+
+
+def _record(results: dict, caso: str, tamanho: int, medida: dict, unidade: str) -> None:
+    chave = result_key(caso, tamanho)
+    results[chave] = {"caso": caso, "tamanho": tamanho, **medida}
+    print_results({chave: results[chave]}, unidade=unidade)
+
+
+def _bench_mapping(results: dict, tamanho: int, repeticoes: int, workdir: Path):
+    """Carga e classificação com um mapping de `tamanho` padrões."""
+    padroes = gerar_padroes(tamanho)
+    mapping_path = workdir / f"mapping_{tamanho}.csv"
+    escrever_mapping(mapping_path, padroes)
+    _record(
+        results,
+        "carregar_mapping",
+        tamanho,
+        measure(lambda: carregar_mapping(mapping_path), repeticoes),
+        "padrões",
+    )
+
+    mapping = carregar_mapping(mapping_path)
+    memos = gerar_memos(padroes, AMOSTRA_CLASSIFICAR)
+    medida = measure(
+        lambda: [classificar_transacao("", m, mapping) for m in memos], repeticoes
+    )
+    medida["itens"] = AMOSTRA_CLASSIFICAR
+    _record(results, "classificar_transacao", tamanho, medida, "transações")
+
+
+def _bench_extrato(
+    results: dict,
+    tamanho: int,
+    padroes,
+    mapping,
+    repeticoes: int,
+    workdir: Path,
+):
+    """Limpeza de memos e processamento de um extrato de `tamanho` transações."""
+    memos = gerar_memos(padroes, tamanho)
+    _record(
+        results,
+        "limpar_texto_busca",
+        tamanho,
+        measure(lambda: [limpar_texto_busca(m) for m in memos], repeticoes),
+        "transações",
+    )
+
+    ofx_path = workdir / f"extrato_{tamanho}.ofx"
+    escrever_ofx(ofx_path, memos)
+    _record(
+        results,
+        "processar_ofx",
+        tamanho,
+        measure(
+            lambda: processar_ofx(ofx_path, "Assets:BR:BancoInter", mapping, set()),
+            repeticoes,
+        ),
+        "transações",
+    )
+
+
+def run(mappings, extratos, repeticoes: int, workdir: Path) -> dict[str, dict]:
+    """Mede todos os casos nos tamanhos pedidos."""
+    results: dict[str, dict] = {}
+
+    # Cada tamanho monta as closures na sua própria função: nenhum lambda
+    # enxerga variáveis de laço
+    for tamanho in sorted(mappings):
+        _bench_mapping(results, tamanho, repeticoes, workdir)
+
+    padroes = gerar_padroes(MAPPING_PROCESSAR)
+    mapping_path = workdir / "mapping_processar.csv"
+    escrever_mapping(mapping_path, padroes)
+    mapping = carregar_mapping(mapping_path)
+
+    for tamanho in sorted(extratos):
+        _bench_extrato(results, tamanho, padroes, mapping, repeticoes, workdir)
+
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark do smart_ofx_importer")
+    parser.add_argument(
+        "--mappings",
+        type=int,
+        nargs="+",
+        default=list(MAPPINGS_PADRAO),
+        help="Números de padrões do mapping sintético",
+    )
+    parser.add_argument(
+        "--extratos",
+        type=int,
+        nargs="+",
+        default=list(EXTRATOS_PADRAO),
+        help="Números de transações dos extratos OFX sintéticos",
+    )
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--salvar", type=Path, help="Grava os resultados como baseline")
+    parser.add_argument(
+        "--comparar",
+        type=Path,
+        nargs="?",
+        const=BASELINES_DIR / "ofx.json",
+        help="Compara com a baseline (padrão: benchmarks/baselines/ofx.json)",
+    )
+    parser.add_argument(
+        "--tolerancia",
+        type=float,
+        default=TOLERANCIA_PADRAO,
+        help="Aumento relativo aceito antes de apontar regressão (0.25 = 25%%)",
+    )
+    args = parser.parse_args(argv)
+    if args.comparar and not check_baseline(args.comparar):
+        return 2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run(args.mappings, args.extratos, args.repeticoes, Path(tmp))
+
+    expoentes = growth_exponents(results)
+    if expoentes:
+        print("Expoente de crescimento (t ~ n^k):")
+        for caso, k in expoentes.items():
+            print(f"  {caso:45s} k={k:.2f}")
+
+    if args.salvar:
+        save_baseline(args.salvar, results, expoentes=expoentes, seed=SEED)
+        print(f"Baseline gravada em {args.salvar}")
+
+    if args.comparar:
+        print(f"Comparação com {args.comparar}:")
+        linhas = compare(results, load_baseline(args.comparar), args.tolerancia)
+        if print_comparison(linhas):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+Saldos diários por conta e asserções balance mensais.
+
+Responsabilidades:
+- Montar o frame de postings (data, conta, centavos) de um texto Beancount
+  (ledger gerado e imports.beancount)
+- Montar os postings esperados direto da exportação do Organizze, sem
+  passar pelos handlers: cada linha movimenta a sua CONTA pelo Valor com
+  o sinal do D/R
+- Calcular o saldo corrente por conta e dia com groupby/cumsum
+- Gerar uma asserção balance por conta e mês fechado em
+  balances.beancount
+
+As asserções vêm do Organizze (mais os lançamentos OFX), não do texto que
+os handlers geraram: lançamento descartado, duplicado, com sinal trocado
+ou roteado para a conta errada faz o bean-check falhar no mês em que
+aconteceu.
+
+O último mês com movimento de cada conta fica sem asserção: ainda pode
+receber lançamentos de importações seguintes (OFX).
+
+Tudo é vetorizado (uma passada de regex no texto, groupby, cumsum):
+milhões de linhas de ledger levam poucos segundos.
+"""
+
+import logging
+import re
+
+import numpy as np
+import pandas as pd
+
+from entry_renderer import conta_beancount_override, entry_accounts
+from organizze_shared import CENTS_COLUMN, format_cents_array
+
+
+logger = logging.getLogger(__name__)
+
+PREFIXOS_PATRIMONIAIS = ("Assets:", "Liabilities:")
+FLAGS_TRANSACAO = {"*", "!", "txn"}
+
+# Uma passada de regex no texto todo: cabeçalho de diretiva (com a
+# descrição, se houver) ou posting BRL
+_LINHA = re.compile(
+    r'^(?:(\d{4}-\d{2}-\d{2})[ \t]+(\S+)(?:[ \t]+"([^"\n]*)")?'
+    r"|[ \t]+([A-Z][A-Za-z0-9-]*(?::[A-Za-z0-9-]+)+)[ \t]+(-?\d+(?:\.\d+)?)[ \t]+BRL)",
+    re.MULTILINE,
+)
+
+
+def postings_frame(texto: str) -> pd.DataFrame:
+    """
+    Postings em BRL das transações de um texto Beancount.
+
+    Returns:
+        DataFrame com data (datetime64), conta, centavos (int64), transacao
+        (número sequencial da transação no texto) e descricao
+    """
+    linhas = pd.DataFrame(
+        _LINHA.findall(texto),
+        columns=["data", "diretiva", "descricao", "conta", "valor"],
+    )
+    # Data da transação vale até o próximo cabeçalho; outras diretivas zeram
+    cabecalho = linhas["data"].ne("")
+    transacao = cabecalho & linhas["diretiva"].isin(FLAGS_TRANSACAO)
+    datas = linhas["data"].where(transacao, "")
+    datas = datas.where(cabecalho).ffill().fillna("")
+    descricoes = linhas["descricao"].where(cabecalho).ffill()
+
+    valido = ~cabecalho & datas.ne("")
+    valores = pd.to_numeric(linhas.loc[valido, "valor"])
+    return pd.DataFrame(
+        {
+            "data": pd.to_datetime(datas[valido], format="%Y-%m-%d"),
+            "conta": linhas.loc[valido, "conta"].astype(object),
+            "centavos": (valores * 100).round().astype(np.int64),
+            "transacao": cabecalho.cumsum()[valido].astype(np.int64),
+            "descricao": descricoes[valido].astype(object),
+        }
+    ).reset_index(drop=True)
+
+
+def expected_postings(
+    df: pd.DataFrame,
+    pagamentos_cartao: dict[int, str] | None = None,
+) -> pd.DataFrame:
+    """
+    Postings esperados nas contas do Organizze, calculados só da exportação.
+
+    Cada linha vira um posting na sua conta (get_account_path, ou
+    conta_beancount quando preenchida): D negativo, R positivo. O cartão
+    quitado por um pagamento de fatura não tem linha própria no Organizze;
+    `pagamentos_cartao` (idx -> cartão) lança o valor nele.
+
+    Returns:
+        DataFrame com data, conta e centavos
+    """
+    sinal = np.where(df["D/R"].eq("D").to_numpy(), -1, 1)
+    linhas = pd.DataFrame(
+        {
+            "data": df["Data"].to_numpy(),
+            "conta": conta_beancount_override(df, entry_accounts(df)).to_numpy(),
+            "centavos": df[CENTS_COLUMN].to_numpy(dtype=np.int64) * sinal,
+        }
+    )
+    if not pagamentos_cartao:
+        return linhas
+
+    pagamentos = df.loc[list(pagamentos_cartao)]
+    cartoes = pd.Series(
+        list(pagamentos_cartao.values()), index=pagamentos.index, dtype=object
+    )
+    quitacoes = pd.DataFrame(
+        {
+            "data": pagamentos["Data"].to_numpy(),
+            "conta": conta_beancount_override(
+                pagamentos, "Liabilities:Cartao:" + cartoes
+            ).to_numpy(),
+            "centavos": pagamentos[CENTS_COLUMN].to_numpy(dtype=np.int64),
+        }
+    )
+    return pd.concat([linhas, quitacoes], ignore_index=True)
+
+
+def daily_balances(postings: pd.DataFrame) -> pd.DataFrame:
+    """
+    Saldo corrente por conta e dia (só dias com movimento).
+
+    Returns:
+        DataFrame com conta, data, movimento e saldo (centavos), ordenado
+    """
+    diario = (
+        postings.groupby(["conta", "data"], sort=True)["centavos"]
+        .sum()
+        .rename("movimento")
+        .reset_index()
+    )
+    diario["saldo"] = diario.groupby("conta")["movimento"].cumsum()
+    return diario
+
+
+def monthly_assertions(
+    diario: pd.DataFrame,
+    prefixos: tuple[str, ...] = PREFIXOS_PATRIMONIAIS,
+) -> pd.DataFrame:
+    """
+    Saldo de fechamento de cada mês fechado, por conta patrimonial.
+
+    A data da asserção é o primeiro dia do mês seguinte (o balance do
+    Beancount vale para o início do dia).
+
+    Returns:
+        DataFrame com conta, data e saldo
+    """
+    diario = diario[diario["conta"].str.startswith(prefixos)]
+    mes = diario["data"].dt.to_period("M")
+    fechamento = diario.assign(mes=mes).groupby(["conta", "mes"]).tail(1)
+    ultimo = fechamento.groupby("conta")["mes"].transform("max")
+    fechamento = fechamento[fechamento["mes"] < ultimo]
+    return pd.DataFrame(
+        {
+            "conta": fechamento["conta"].to_numpy(),
+            "data": (fechamento["mes"] + 1).dt.to_timestamp().to_numpy(),
+            "saldo": fechamento["saldo"].to_numpy(),
+        }
+    )
+
+
+def generate_balance_entries(assertions: pd.DataFrame) -> tuple[list[str], int]:
+    """Gera as diretivas balance, ordenadas por data e conta."""
+    if assertions.empty:
+        return [], 0
+    assertions = assertions.sort_values(["data", "conta"])
+    lines = (
+        assertions["data"].dt.strftime("%Y-%m-%d")
+        + " balance "
+        + assertions["conta"].astype(object).str.ljust(40)
+        + " "
+        + pd.Series(
+            format_cents_array(assertions["saldo"]), index=assertions.index
+        ).str.rjust(10)
+        + " BRL"
+    )
+    return lines.tolist(), len(lines)
+
+
+def build_balance_entries(postings: pd.DataFrame) -> tuple[list[str], int]:
+    """
+    Pipeline completo: postings -> diretivas balance mensais.
+
+    Em organizze_v5, `postings` são os esperados (expected_postings) mais os
+    do imports.beancount, nunca os do texto gerado na mesma execução.
+    """
+    diario = daily_balances(postings)
+    assertions = monthly_assertions(diario)
+    logger.info(
+        "Saldos diários: %d postings, %d contas, %d dias-conta",
+        len(postings),
+        diario["conta"].nunique(),
+        len(diario),
+    )
+    return generate_balance_entries(assertions)
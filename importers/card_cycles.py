@@ -0,0 +1,308 @@
+"""
+Motor de ciclos de fatura dos cartões de crédito.
+
+Responsabilidades:
+- Carregar fechamento/vencimento por cartão de config/ciclos_cartoes.yaml;
+  cartões fora do arquivo não têm dias presumidos (erro no log, sem asserções)
+- Calcular a chave de ciclo de compras e pagamentos
+- Somar compras e pagamentos por (cartão, ciclo) e o saldo de cada fatura
+- Gerar asserções balance e candidatos a pad para faturas não quitadas
+
+A fatura só soma compras, estornos e pagamentos, mas a conta do cartão no
+ledger também recebe transferências órfãs, saldos iniciais, ajustes e
+linhas de pagamento lançadas no próprio cartão. Com os postings esperados
+(balance_assertions.expected_postings), a asserção usa o saldo lançado no
+cartão até o fechamento e a diferença para a fatura vira comentário.
+
+Chave de ciclo = ano*12 + (mês - 1) do fechamento. Compras até o dia de
+fechamento (inclusive) entram na fatura do mês; pagamentos até o dia de
+fechamento quitam a fatura do mês anterior. Tudo sai de um groupby sobre
+as chaves pré-calculadas, sem laço por ciclo.
+"""
+
+import logging
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from balance_assertions import daily_balances
+from entry_renderer import conta_beancount_override, entry_accounts
+from organizze_shared import (
+    CENTS_COLUMN,
+    PAGAMENTO_KEYWORDS_RE,
+    extract_accounts_from_df,
+    format_cents,
+    get_account_path,
+    lower_column,
+)
+
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = Path(__file__).parent.parent / "config" / "ciclos_cartoes.yaml"
+
+TOLERANCIA_CENTAVOS = 100
+
+STATEMENT_COLUMNS = [
+    "cartao",
+    "ciclo",
+    "fechamento",
+    "vencimento",
+    "compras",
+    "pagamentos",
+    "saldo_fatura",
+    "diferenca",
+    "quitada",
+]
+
+
+def load_cycle_config(path: Path = CONFIG_PATH) -> dict[str, dict[str, int]]:
+    """Lê os dias de fechamento e vencimento de cada cartão."""
+    with open(path, encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+
+    config = {}
+    for cartao, dias in (data.get("cartoes") or {}).items():
+        fechamento = int(dias["fechamento"])
+        vencimento = int(dias["vencimento"])
+        if not (1 <= fechamento <= 31 and 1 <= vencimento <= 31):
+            raise ValueError(f"Dias de ciclo inválidos para {cartao} em {path}")
+        config[cartao] = {"fechamento": fechamento, "vencimento": vencimento}
+    return config
+
+
+@lru_cache(maxsize=None)
+def get_cycle_config(path: Path = CONFIG_PATH) -> dict[str, dict[str, int]]:
+    """Configuração de ciclos, carregada uma única vez por arquivo."""
+    return load_cycle_config(path)
+
+
+def closing_day(cartao: str) -> int:
+    """Dia de fechamento configurado para o cartão."""
+    config = get_cycle_config()
+    if cartao not in config:
+        raise ValueError(f"Cartão {cartao} sem ciclo configurado em {CONFIG_PATH}")
+    return config[cartao]["fechamento"]
+
+
+def charge_cycle_keys(dates: pd.Series, dia_fechamento) -> np.ndarray:
+    """Ciclo (ano*12 + mês de fechamento) da fatura que recebe a compra."""
+    key = dates.dt.year * 12 + (dates.dt.month - 1)
+    return (key + (dates.dt.day > dia_fechamento)).to_numpy()
+
+
+def payment_cycle_keys(dates: pd.Series, dia_fechamento) -> np.ndarray:
+    """Ciclo da última fatura fechada antes do pagamento."""
+    key = dates.dt.year * 12 + (dates.dt.month - 1)
+    return (key - (dates.dt.day <= dia_fechamento)).to_numpy()
+
+
+def cycle_dates(keys: np.ndarray, dias: np.ndarray) -> pd.Series:
+    """Data do dia `dias` no mês de cada chave, limitada ao fim do mês."""
+    keys = np.asarray(keys, dtype=np.int64)
+    inicio_mes = pd.to_datetime(
+        pd.DataFrame({"year": keys // 12, "month": keys % 12 + 1, "day": 1})
+    )
+    dias = np.minimum(np.asarray(dias), inicio_mes.dt.days_in_month.to_numpy())
+    return inicio_mes + pd.to_timedelta(dias - 1, unit="D")
+
+
+def compute_charge_frame(df: pd.DataFrame, cartoes) -> pd.DataFrame:
+    """
+    Compras líquidas por linha de cartão, já com a chave de ciclo.
+
+    Compras (D) somam, estornos (R que não são pagamento) subtraem. O cartão
+    é a conta em que a linha é lançada: conta_beancount, quando preenchida,
+    tira a linha do cartão (ou a leva para ele), como nos handlers.
+
+    Returns:
+        DataFrame com colunas cartao, ciclo, centavos
+    """
+    por_conta = {get_account_path(cartao): cartao for cartao in cartoes}
+    selecionadas = df["CONTA"].isin(list(cartoes))
+    if "conta_beancount" in df.columns:
+        selecionadas |= df["conta_beancount"].fillna("").astype(str).ne("")
+    rows = df[selecionadas]
+    cartao = conta_beancount_override(rows, entry_accounts(rows)).map(por_conta)
+    rows = rows[cartao.notna().to_numpy()]
+    cartao = cartao.dropna()
+    if rows.empty:
+        return pd.DataFrame({"cartao": [], "ciclo": [], "centavos": []})
+
+    desc = lower_column(rows, "Descrição")
+    is_charge = (rows["D/R"] == "D").to_numpy()
+    is_refund = (
+        (rows["D/R"] == "R") & ~desc.str.contains(PAGAMENTO_KEYWORDS_RE)
+    ).to_numpy()
+    cents = rows[CENTS_COLUMN].to_numpy()
+
+    dias = cartao.map(lambda c: cartoes[c]["fechamento"])
+    return pd.DataFrame(
+        {
+            "cartao": cartao.to_numpy(),
+            "ciclo": charge_cycle_keys(rows["Data"], dias),
+            "centavos": np.where(is_charge, cents, np.where(is_refund, -cents, 0)),
+        }
+    )
+
+
+def compute_cycle_statements(
+    df: pd.DataFrame,
+    payments: dict[int, str],
+    config: dict[str, dict[str, int]] | None = None,
+    tolerancia_centavos: int = TOLERANCIA_CENTAVOS,
+) -> pd.DataFrame:
+    """
+    Calcula o extrato de cada ciclo de fatura.
+
+    saldo_fatura é o valor da fatura no fechamento (compras do ciclo mais o
+    que ficou em aberto dos ciclos anteriores); diferenca é o que sobrou
+    depois dos pagamentos do ciclo.
+
+    Args:
+        payments: Dict idx -> cartao (ver card_payments_handler.resolve_card_payments)
+
+    Returns:
+        DataFrame com STATEMENT_COLUMNS, ordenado por cartão e ciclo
+    """
+    if config is None:
+        config = get_cycle_config()
+
+    _, cartoes = extract_accounts_from_df(df)
+    faltando = sorted(cartoes - set(config))
+    if faltando:
+        logger.error(
+            "Cartões sem ciclo configurado em %s (faturas não verificadas): %s",
+            CONFIG_PATH.name,
+            ", ".join(faltando),
+        )
+
+    charges = compute_charge_frame(df, config)
+
+    pay_idx = [idx for idx, cartao in payments.items() if cartao in config]
+    pay_rows = df.loc[pay_idx]
+    pay_cartao = pd.Series([payments[idx] for idx in pay_idx], index=pay_rows.index)
+    pay_frame = pd.DataFrame(
+        {
+            "cartao": pay_cartao.to_numpy(),
+            "ciclo": payment_cycle_keys(
+                pay_rows["Data"], pay_cartao.map(lambda c: config[c]["fechamento"])
+            ),
+            "centavos": pay_rows[CENTS_COLUMN].to_numpy(),
+        }
+    )
+
+    compras = charges.groupby(["cartao", "ciclo"])["centavos"].sum()
+    pagamentos = pay_frame.groupby(["cartao", "ciclo"])["centavos"].sum()
+    stmt = (
+        pd.concat({"compras": compras, "pagamentos": pagamentos}, axis=1)
+        .fillna(0)
+        .astype("int64")
+        .sort_index()
+        .reset_index()
+    )
+    if stmt.empty:
+        return pd.DataFrame(columns=STATEMENT_COLUMNS)
+
+    by_card = stmt.groupby("cartao", sort=False)
+    pago_antes = by_card["pagamentos"].cumsum() - stmt["pagamentos"]
+    stmt["saldo_fatura"] = by_card["compras"].cumsum() - pago_antes
+    stmt["diferenca"] = stmt["saldo_fatura"] - stmt["pagamentos"]
+    stmt["quitada"] = stmt["diferenca"].abs() <= tolerancia_centavos
+
+    fechamento = stmt["cartao"].map(lambda c: config[c]["fechamento"]).to_numpy()
+    vencimento = stmt["cartao"].map(lambda c: config[c]["vencimento"]).to_numpy()
+    ciclo = stmt["ciclo"].to_numpy()
+    stmt["fechamento"] = cycle_dates(ciclo, fechamento).to_numpy()
+    stmt["vencimento"] = cycle_dates(
+        ciclo + (vencimento <= fechamento), vencimento
+    ).to_numpy()
+
+    abertas = int((~stmt["quitada"]).sum())
+    logger.info("Ciclos de fatura: %d calculados, %d não quitados", len(stmt), abertas)
+    return stmt[STATEMENT_COLUMNS]
+
+
+def closing_balances(statements: pd.DataFrame, postings: pd.DataFrame) -> np.ndarray:
+    """
+    Saldo lançado na conta de cada cartão até o fechamento (inclusive).
+
+    Args:
+        postings: DataFrame com data, conta e centavos (com sinal)
+
+    Returns:
+        Array de centavos, na ordem de statements
+    """
+    diario = daily_balances(postings)[["conta", "data", "saldo"]]
+    diario["data"] = diario["data"].astype("datetime64[ns]")
+    chaves = pd.DataFrame(
+        {
+            "conta": statements["cartao"].map(get_account_path).to_numpy(),
+            "data": statements["fechamento"].astype("datetime64[ns]").to_numpy(),
+            "posicao": np.arange(len(statements)),
+        }
+    )
+    saldos = pd.merge_asof(
+        chaves.sort_values("data"),
+        diario.sort_values("data"),
+        on="data",
+        by="conta",
+        direction="backward",
+    )
+    saldos = saldos.sort_values("posicao")["saldo"].fillna(0)
+    return saldos.to_numpy(dtype=np.int64)
+
+
+def generate_cycle_entries(
+    statements: pd.DataFrame,
+    postings: pd.DataFrame | None = None,
+) -> tuple[list[str], int]:
+    """
+    Gera asserções balance (dia seguinte ao fechamento) e candidatos a pad.
+
+    Sem postings, a asserção é a própria fatura (-saldo_fatura). Com eles,
+    é o saldo lançado no cartão (ver closing_balances); o que não é da
+    fatura sai num comentário.
+
+    Pads ficam comentados: só servem de sugestão para faturas não quitadas.
+    """
+    lines = []
+    count = 0
+
+    if postings is None:
+        saldos = -statements["saldo_fatura"].to_numpy(dtype=np.int64)
+    else:
+        saldos = closing_balances(statements, postings)
+
+    for row, saldo in zip(statements.itertuples(index=False), saldos):
+        account = get_account_path(row.cartao)
+        fatura = row.fechamento.strftime("%Y-%m")
+        assert_date = (row.fechamento + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+
+        lines.append(
+            f"{assert_date} balance {account:40s} {format_cents(saldo):>10} BRL"
+        )
+        lines.append(f'  fatura: "{fatura}"')
+        fora_da_fatura = saldo + row.saldo_fatura
+        if fora_da_fatura:
+            lines.append(
+                f"; saldo do cartão tem {format_cents(fora_da_fatura)} fora da "
+                "fatura (transferências, ajustes, pagamentos no cartão)"
+            )
+        if not row.quitada:
+            lines.append(
+                f"; fatura {fatura} não quitada: "
+                f"fatura {format_cents(row.saldo_fatura)}, "
+                f"pago {format_cents(row.pagamentos)}, "
+                f"diferença {format_cents(row.diferenca)}"
+            )
+            lines.append(
+                f"; {row.vencimento.strftime('%Y-%m-%d')} pad {account} Equity:Ajustes"
+            )
+        lines.append("")
+        count += 1
+
+    return lines, count
@@ -5,130 +5,181 @@ Responsabilidades:
 - Identificar pagamentos de cartão (D com Categoria="Outros" + descrição com "pagamento/fatura")
 - Gerar entradas Beancount para pagamentos de cartão
 
-Lógica de identificação de cartão:
-- 2021 - 09/04/2023: qualquer pagamento BB = Saraiva
-- 10/04/2023 - 31/01/2025: usa descrição (smiles = Smiles, caso contrário = Saraiva)
-- 01/02/2025+: para BbCorrente, maior valor = Smiles, menor = Saraiva
+Identificação de cartão:
+- Regras por conta, período e descrição em config/roteamento_cartoes.yaml
+  (ver card_routing)
+- Pagamentos roteados para BbCorrente_Pendente: casa o valor com o total da
+  fatura de cada cartão no ciclo; sem fatura compatível, maior valor = Smiles,
+  menor = Saraiva
 """
 
 import logging
 from collections import defaultdict
-from datetime import datetime
 
+import numpy as np
 import pandas as pd
 
-from organizze_shared import (
-    ACCOUNTS_TYPE,
-    get_account_path,
-    sanitize_description,
+from card_cycles import (
+    closing_day,
+    compute_charge_frame,
+    get_cycle_config,
+    payment_cycle_keys,
 )
+from card_routing import CARTAO_PENDENTE, route_payments
+from classification_rules import tipo_mask
+from entry_renderer import conta_beancount_override, entry_accounts, render_rows
+from organizze_shared import CENTS_COLUMN, format_cents
 
 
 logger = logging.getLogger(__name__)
 
-DATE_THRESHOLD_SMILE = datetime(2023, 4, 10)
-DATE_THRESHOLD_VALUES = datetime(2025, 2, 1)
 
-
-logger = logging.getLogger(__name__)
+CARTOES_BB = ("Saraiva", "SmilesBbPlatinum")
+TOLERANCIA_FATURA_CENTAVOS = 100
 
 
-def _get_cartao_from_conta(conta: str, desc: str, data: datetime) -> str | None:
+def detect_card_payment_indices(df: pd.DataFrame) -> np.ndarray:
     """
-    Identifica qual cartão foi pago baseado na conta, descrição e data.
+    Detecta pagamentos de cartão de forma vetorizada.
 
-    Lógica:
-    - 2021 - 09/04/2023: qualquer pagamento BB = Saraiva
-    - 10/04/2023 - 31/01/2025: usa descrição (smiles = Smiles, caso contrário = Saraiva)
-    - 01/02/2025+: para BbCorrente, maior valor = Smiles, menor = Saraiva (lógica tratada depois)
+    Regras do tipo pagamento_cartao (config/regras_classificacao.yaml): D com
+    Categoria="Outros" ou "Pagamento de fatura" + descrição com
+    "pagamento/fatura" + conta é Asset.
     """
-    mapeamento = {
-        "BancoInter": "CartaoDeCreditoInter",
-        "C6Bank": "MastercardC6Bank",
-        "ItauPersonalite": "LatamPass",
-    }
+    if df.empty:
+        return np.array([], dtype=np.int64)
 
-    if conta in mapeamento:
-        return mapeamento[conta]
+    mask = tipo_mask(df, "pagamento_cartao")
+    return df.index[mask].to_numpy()
 
-    if conta == "BbCorrente":
-        desc_lower = str(desc).lower() if desc else ""
 
-        if data < DATE_THRESHOLD_SMILE:
-            return "Saraiva"
+def identify_card_payment_indices(df: pd.DataFrame) -> set[int]:
+    """Identifica pagamentos de cartão (ver detect_card_payment_indices)."""
+    pagto_cartao_indices = set(detect_card_payment_indices(df).tolist())
 
-        if data < DATE_THRESHOLD_VALUES:
-            if "smiles" in desc_lower:
-                return "SmilesBbPlatinum"
-            return "Saraiva"
+    logger.info("Pagamentos de cartão identificados: %d", len(pagto_cartao_indices))
+    return pagto_cartao_indices
 
-        return "BbCorrente_Pendente"
 
-    return None
+def compute_cycle_totals(
+    df: pd.DataFrame,
+    cartoes: tuple[str, ...] = CARTOES_BB,
+) -> dict[str, dict[int, int]]:
+    """
+    Soma, por cartão e ciclo de fatura, os lançamentos na conta do cartão.
 
+    Compras (D) somam, estornos (R que não são pagamento) subtraem; o dia de
+    fechamento vem de config/ciclos_cartoes.yaml.
 
-def identify_card_payment_indices(df: pd.DataFrame) -> set[int]:
+    Returns:
+        Dict cartao -> {ciclo: total em centavos}
     """
-    Identifica pagamentos de cartão.
+    config = get_cycle_config()
+    charges = compute_charge_frame(df, {c: config[c] for c in cartoes})
+    grouped = charges.groupby(["cartao", "ciclo"])["centavos"].sum()
+
+    totals: dict[str, dict[int, int]] = {cartao: {} for cartao in cartoes}
+    for (cartao, ciclo), total in grouped.items():
+        totals[cartao][int(ciclo)] = int(total)
+    return totals
+
 
-    D com Categoria="Outros" ou "Pagamento de fatura" +
-    descrição com "pagamento/fatura" + conta é Asset.
+def match_payments_by_invoice(
+    df: pd.DataFrame,
+    payment_indices: list[int],
+    cartoes: tuple[str, ...] = CARTOES_BB,
+    tolerancia_centavos: int = TOLERANCIA_FATURA_CENTAVOS,
+) -> dict[int, str]:
     """
-    pagto_cartao_indices = set()
-    for idx, row in df.iterrows():
-        if row["D/R"] != "D":
-            continue
+    Atribui cada pagamento ao cartão cuja fatura do ciclo bate com o valor.
+
+    Cada fatura (cartão, ciclo) é usada no máximo uma vez; pagamentos sem
+    fatura compatível ficam de fora do resultado.
 
-        cat = row.get("Categoria", "")
-        desc = (
-            str(row.get("Descrição", "")).lower()
-            if pd.notna(row.get("Descrição"))
-            else ""
+    Returns:
+        Dict idx -> cartao
+    """
+    if not payment_indices:
+        return {}
+
+    config = get_cycle_config()
+    faltando = [cartao for cartao in cartoes if cartao not in config]
+    if faltando:
+        logger.warning(
+            "Sem ciclo configurado para %s: pagamentos BB ficam na heurística "
+            "por valor",
+            ", ".join(faltando),
         )
+        cartoes = tuple(cartao for cartao in cartoes if cartao in config)
 
-        if pd.notna(cat):
-            cat_lower = str(cat).lower()
-            if cat_lower in ["outros", "pagamento de fatura"]:
-                if any(
-                    kw in desc for kw in ["pagamento", "fatura", "invoice", "payment"]
-                ):
-                    conta = row.get("CONTA", "")
-                    from organizze_shared import ACCOUNTS_TYPE
+    totals = compute_cycle_totals(df, cartoes)
+    payments = df.loc[payment_indices]
 
-                    if ACCOUNTS_TYPE.get(conta) == "Assets":
-                        pagto_cartao_indices.add(idx)
+    cycle_keys = {
+        cartao: payment_cycle_keys(payments["Data"], closing_day(cartao))
+        for cartao in cartoes
+    }
 
-    logger.info(f"Pagamentos de cartão identificados: {len(pagto_cartao_indices)}")
-    return pagto_cartao_indices
+    matches = []
+    for pos, (idx, centavos) in enumerate(zip(payments.index, payments[CENTS_COLUMN])):
+        for cartao in cartoes:
+            ciclo = int(cycle_keys[cartao][pos])
+            total = totals[cartao].get(ciclo)
+            if total is None:
+                continue
+            diff = abs(total - int(centavos))
+            if diff <= tolerancia_centavos:
+                matches.append((diff, idx, cartao, ciclo))
+
+    matches.sort()
+    used_payments: set[int] = set()
+    used_invoices: set[tuple[str, int]] = set()
+    result = {}
+    for diff, idx, cartao, ciclo in matches:
+        if idx in used_payments or (cartao, ciclo) in used_invoices:
+            continue
+        used_payments.add(idx)
+        used_invoices.add((cartao, ciclo))
+        result[idx] = cartao
+        logger.debug(
+            "Fatura %s ciclo %s: pagamento %s (dif=%s)", cartao, ciclo, idx, diff
+        )
 
+    return result
 
-def generate_card_payment_entries(
+
+def resolve_card_payments(
     df: pd.DataFrame,
     pagto_cartao_indices: set[int],
-) -> tuple[list[str], int]:
+) -> dict[int, str]:
     """
-    Gera entradas Beancount para pagamentos de cartão.
+    Resolve o cartão pago por cada pagamento.
 
-    Para BbCorrente a partir de 01/02/2025: agrupa por mês e determina
-    qual é Saraiva (menor valor) e Smiles (maior valor).
+    O cartão vem das regras de roteamento. Pagamentos BbCorrente_Pendente
+    (BB a partir de 01/02/2025): primeiro tenta casar o valor
+    com o total da fatura de cada cartão no ciclo; o que sobrar no mês
+    usa a heurística Saraiva (menor valor) e Smiles (maior valor).
+
+    Returns:
+        Dict idx -> cartao (pagamentos sem cartão identificado ficam de fora)
     """
     indices = sorted(pagto_cartao_indices)
 
-    bb_indices_by_month = defaultdict(list)
+    payments = df.loc[indices]
+    routed = route_payments(payments["CONTA"], payments["Descrição"], payments["Data"])
+    bb_indices = routed.index[routed == CARTAO_PENDENTE].tolist()
 
-    for idx in indices:
-        row = df.iloc[idx]
-        conta = row.get("CONTA", "")
-        data = row["Data"]
+    cartao_mapping = match_payments_by_invoice(df, bb_indices)
+    logger.info("Pagamentos BB casados com fatura: %d", len(cartao_mapping))
 
-        if conta == "BbCorrente" and data >= DATE_THRESHOLD_VALUES:
-            year_month = data.strftime("%Y-%m")
+    bb_indices_by_month = defaultdict(list)
+    for idx in bb_indices:
+        if idx not in cartao_mapping:
+            year_month = df.iloc[idx]["Data"].strftime("%Y-%m")
             bb_indices_by_month[year_month].append(idx)
 
-    cartao_mapping = {}
-
     for year_month, month_indices in bb_indices_by_month.items():
-        values = [(idx, abs(df.iloc[idx]["Valor"])) for idx in month_indices]
+        values = [(idx, int(df.iloc[idx][CENTS_COLUMN])) for idx in month_indices]
         values.sort(key=lambda x: x[1])
 
         menor_idx = values[0][0]
@@ -138,56 +189,39 @@ def generate_card_payment_entries(
         cartao_mapping[maior_idx] = "SmilesBbPlatinum"
 
         logger.debug(
-            f"2025+: {year_month} - Saraiva={values[0][1]:.2f}, "
-            f"Smiles={values[-1][1]:.2f}"
+            "2025+: %s - Saraiva=%s, Smiles=%s",
+            year_month,
+            format_cents(values[0][1]),
+            format_cents(values[-1][1]),
         )
 
-    lines = []
-    count = 0
-
+    resolved = {}
     for idx in indices:
-        row = df.iloc[idx]
-        data = row["Data"]
-        conta = row.get("CONTA", "")
+        cartao = cartao_mapping.get(idx, routed.at[idx])
+        if cartao:
+            resolved[idx] = cartao
 
-        if idx in cartao_mapping:
-            cartao = cartao_mapping[idx]
-        else:
-            cartao = _get_cartao_from_conta(conta, row.get("Descrição", ""), data)
+    return resolved
 
-        if not cartao:
-            continue
 
-        lines.extend(_build_card_payment_entry(row, cartao))
-        count += 1
-
-    return lines, count
-
-
-def _build_card_payment_entry(row: pd.Series, cartao: str) -> list[str]:
-    date = row["Data"].strftime("%Y-%m-%d")
-    desc = sanitize_description(row.get("Descrição", ""))
-    value = abs(row["Valor"])
-    conta = row.get("CONTA", "")
-    status = row.get("Situação", "Pago")
-    flag = "*" if status == "Pago" else "!"
-
-    conta_beancount = row.get("conta_beancount")
-    if conta_beancount and pd.notna(conta_beancount):
-        debit = str(conta_beancount).strip()
-    else:
-        debit = f"Liabilities:Cartao:{cartao}"
-
-    conta_beancount_credit = row.get("conta_beancount")
-    if conta_beancount_credit and pd.notna(conta_beancount_credit):
-        credit = str(conta_beancount_credit).strip()
-    else:
-        credit = get_account_path(conta)
-
-    return [
-        f'{date} {flag} "{desc}"',
-        f"  {debit:40s} {value:>10.2f} BRL",
-        f"  {credit:40s} {-value:>10.2f} BRL",
-        '  origem_id: "pagto_cartao"',
-        "",
-    ]
+def generate_card_payment_entries(
+    df: pd.DataFrame,
+    pagto_cartao_indices: set[int],
+    resolved: dict[int, str] | None = None,
+) -> tuple[list[str], int]:
+    """
+    Gera entradas Beancount para pagamentos de cartão.
+
+    O cartão de cada pagamento vem de resolve_card_payments(), ou de
+    `resolved` quando já calculado.
+    """
+    if resolved is None:
+        resolved = resolve_card_payments(df, pagto_cartao_indices)
+
+    rows = df.loc[list(resolved)]
+    cartoes = pd.Series(list(resolved.values()), index=rows.index, dtype=object)
+    debits = conta_beancount_override(rows, "Liabilities:Cartao:" + cartoes)
+    credits = conta_beancount_override(rows, entry_accounts(rows))
+
+    lines = render_rows(rows, debits, credits, "pagto_cartao")
+    return lines, len(rows)
@@ -0,0 +1,147 @@
+"""
+Regras de roteamento de pagamentos de fatura (conta bancária -> cartão).
+
+Responsabilidades:
+- Carregar as regras de config/roteamento_cartoes.yaml
+- Compilar as regras num índice de intervalos por conta
+- Resolver o cartão de um conjunto de pagamentos de forma vetorizada
+
+O índice de cada conta guarda as bordas de todas as regras em ordem; cada
+segmento entre duas bordas já traz a lista ordenada de regras válidas, então
+a consulta é um searchsorted por data mais uma máscara por regra do segmento.
+"""
+
+import logging
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import yaml
+
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = Path(__file__).parent.parent / "config" / "roteamento_cartoes.yaml"
+
+CARTAO_PENDENTE = "BbCorrente_Pendente"
+
+_INICIO_ABERTO = np.iinfo(np.int64).min
+
+
+def _to_ns(value) -> int:
+    return pd.Timestamp(value).as_unit("ns").value
+
+
+def load_routing_rules(path: Path = CONFIG_PATH) -> list[dict[str, Any]]:
+    """Lê as regras de roteamento do arquivo YAML."""
+    with open(path, encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+
+    rules = data.get("regras", [])
+    for pos, rule in enumerate(rules):
+        if not rule.get("conta") or not rule.get("cartao"):
+            raise ValueError(f"Regra {pos} em {path} precisa de conta e cartao")
+    return rules
+
+
+def compile_routing_rules(rules: list[dict[str, Any]]) -> dict[str, dict]:
+    """
+    Compila as regras num índice de intervalos por conta.
+
+    Returns:
+        Dict conta -> {"bordas": int64[ns], "segmentos": [[(regex|None, cartao)]]}
+    """
+    by_conta: dict[str, list[dict]] = {}
+    for pos, rule in enumerate(rules):
+        inicio = _to_ns(rule["inicio"]) if rule.get("inicio") else _INICIO_ABERTO
+        fim = _to_ns(rule["fim"]) if rule.get("fim") else None
+        padrao = rule.get("padrao")
+        by_conta.setdefault(rule["conta"], []).append(
+            {
+                "inicio": inicio,
+                "fim": fim,
+                "regex": re.compile(padrao, re.IGNORECASE) if padrao else None,
+                "cartao": rule["cartao"],
+                "ordem": (padrao is None, pos),
+            }
+        )
+
+    compiled = {}
+    for conta, conta_rules in by_conta.items():
+        conta_rules.sort(key=lambda r: r["ordem"])
+        bordas = {_INICIO_ABERTO}
+        for rule in conta_rules:
+            bordas.add(rule["inicio"])
+            if rule["fim"] is not None:
+                bordas.add(rule["fim"])
+        bordas = np.array(sorted(bordas), dtype=np.int64)
+
+        segmentos = []
+        for borda in bordas:
+            segmentos.append(
+                [
+                    (rule["regex"], rule["cartao"])
+                    for rule in conta_rules
+                    if rule["inicio"] <= borda
+                    and (rule["fim"] is None or borda < rule["fim"])
+                ]
+            )
+
+        compiled[conta] = {"bordas": bordas, "segmentos": segmentos}
+
+    return compiled
+
+
+@lru_cache(maxsize=None)
+def get_compiled_routing(path: Path = CONFIG_PATH) -> dict[str, dict]:
+    """Regras compiladas, carregadas uma única vez por arquivo."""
+    return compile_routing_rules(load_routing_rules(path))
+
+
+def route_payments(
+    contas: pd.Series,
+    descricoes: pd.Series,
+    datas: pd.Series,
+    compiled: dict[str, dict] | None = None,
+) -> pd.Series:
+    """
+    Resolve o cartão de cada pagamento.
+
+    Returns:
+        Series (mesmo índice) com o cartão ou None quando nenhuma regra vale
+    """
+    if compiled is None:
+        compiled = get_compiled_routing()
+
+    result = pd.Series(np.full(len(contas), None, dtype=object), index=contas.index)
+    if contas.empty:
+        return result
+
+    desc = descricoes.fillna("").astype(str)
+    datas_ns = pd.to_datetime(datas).to_numpy().astype("datetime64[ns]").view(np.int64)
+
+    for conta, positions in contas.groupby(contas, sort=False).indices.items():
+        table = compiled.get(conta)
+        if table is None:
+            continue
+
+        segmento = (
+            np.searchsorted(table["bordas"], datas_ns[positions], side="right") - 1
+        )
+        for seg in np.unique(segmento):
+            rows = positions[segmento == seg]
+            pendentes = np.ones(len(rows), dtype=bool)
+            for regex, cartao in table["segmentos"][seg]:
+                if regex is None:
+                    hit = pendentes
+                else:
+                    hit = pendentes & desc.iloc[rows].str.contains(regex).to_numpy()
+                result.iloc[rows[hit]] = cartao
+                pendentes = pendentes & ~hit
+                if not pendentes.any():
+                    break
+
+    return result
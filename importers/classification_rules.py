@@ -0,0 +1,248 @@
+"""
+Regras declarativas de classificação de lançamentos.
+
+Responsabilidades:
+- Carregar as regras de config/regras_classificacao.yaml
+- Compilar as condições uma única vez (regex, conjuntos, datas)
+- Avaliar as regras sobre o DataFrame inteiro como máscaras booleanas
+- Classificar cada linha pela primeira regra que casa (ordem do arquivo)
+
+As colunas em minúsculas são calculadas uma vez por avaliação; cada
+condição é uma operação de coluna, sem laço por linha.
+"""
+
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from organizze_shared import ACCOUNTS_TYPE, lower_column
+
+
+CONFIG_PATH = Path(__file__).parent.parent / "config" / "regras_classificacao.yaml"
+
+CONDICOES = {
+    "dr",
+    "descricao",
+    "descricao_todos",
+    "descricao_regex",
+    "categoria",
+    "conta",
+    "tipo_conta",
+    "situacao",
+    "inicio",
+    "fim",
+}
+CAMPOS_REGRA = CONDICOES | {"nome", "tipo", "contas"}
+
+
+def _as_list(value) -> list:
+    return value if isinstance(value, list) else [value]
+
+
+def _any_substring_re(trechos: list[str]) -> re.Pattern:
+    return re.compile("|".join(re.escape(str(t).lower()) for t in trechos))
+
+
+def load_classification_rules(path: Path = CONFIG_PATH) -> list[dict[str, Any]]:
+    """Lê e valida as regras de classificação do arquivo YAML."""
+    with open(path, encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+
+    rules = data.get("regras", [])
+    nomes = set()
+    for pos, rule in enumerate(rules):
+        if not rule.get("nome") or not rule.get("tipo"):
+            raise ValueError(f"Regra {pos} em {path} precisa de nome e tipo")
+        desconhecidos = set(rule) - CAMPOS_REGRA
+        if desconhecidos:
+            raise ValueError(
+                f"Regra {rule['nome']} em {path}: campos desconhecidos "
+                f"{sorted(desconhecidos)}"
+            )
+        if rule["nome"] in nomes:
+            raise ValueError(f"Regra {rule['nome']} repetida em {path}")
+        nomes.add(rule["nome"])
+    return rules
+
+
+def compile_classification_rules(
+    rules: list[dict[str, Any]],
+) -> list[dict[str, Any]]:
+    """
+    Pré-processa as condições de cada regra.
+
+    Returns:
+        Lista na ordem de prioridade com nome, tipo, contas e condições
+        já compiladas
+    """
+    compiled = []
+    for rule in rules:
+        cond: dict[str, Any] = {}
+        if "dr" in rule:
+            cond["dr"] = set(_as_list(rule["dr"]))
+        if "descricao" in rule:
+            cond["descricao"] = _any_substring_re(_as_list(rule["descricao"]))
+        if "descricao_todos" in rule:
+            cond["descricao_todos"] = [
+                str(t).lower() for t in _as_list(rule["descricao_todos"])
+            ]
+        if "descricao_regex" in rule:
+            cond["descricao_regex"] = re.compile(rule["descricao_regex"])
+        if "categoria" in rule:
+            cond["categoria"] = {str(c).lower() for c in _as_list(rule["categoria"])}
+        if "conta" in rule:
+            cond["conta"] = set(_as_list(rule["conta"]))
+        if "tipo_conta" in rule:
+            cond["tipo_conta"] = rule["tipo_conta"]
+        if "situacao" in rule:
+            cond["situacao"] = set(_as_list(rule["situacao"]))
+        if rule.get("inicio"):
+            cond["inicio"] = pd.Timestamp(rule["inicio"])
+        if rule.get("fim"):
+            cond["fim"] = pd.Timestamp(rule["fim"])
+
+        compiled.append(
+            {
+                "nome": rule["nome"],
+                "tipo": rule["tipo"],
+                "contas": dict(rule.get("contas") or {}),
+                "condicoes": cond,
+            }
+        )
+    return compiled
+
+
+@lru_cache(maxsize=None)
+def get_classification_rules(path: Path = CONFIG_PATH) -> tuple[dict[str, Any], ...]:
+    """Regras compiladas, carregadas uma única vez por arquivo."""
+    return tuple(compile_classification_rules(load_classification_rules(path)))
+
+
+class _Columns:
+    """Colunas derivadas calculadas sob demanda, no máximo uma vez."""
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.df = df
+        self._cache: dict[str, pd.Series] = {}
+
+    def get(self, name: str) -> pd.Series:
+        if name not in self._cache:
+            df = self.df
+            if name == "descricao":
+                value = lower_column(df, "Descrição")
+            elif name == "categoria":
+                value = lower_column(df, "Categoria")
+            elif name == "tipo_conta":
+                value = df["CONTA"].map(ACCOUNTS_TYPE)
+            else:
+                value = df[name]
+            self._cache[name] = value
+        return self._cache[name]
+
+
+def _rule_mask(cols: _Columns, cond: dict[str, Any]) -> np.ndarray:
+    mask = np.ones(len(cols.df), dtype=bool)
+    if "dr" in cond:
+        mask &= cols.get("D/R").isin(cond["dr"]).to_numpy()
+    if "descricao" in cond:
+        mask &= cols.get("descricao").str.contains(cond["descricao"]).to_numpy()
+    for trecho in cond.get("descricao_todos", ()):
+        mask &= cols.get("descricao").str.contains(trecho, regex=False).to_numpy()
+    if "descricao_regex" in cond:
+        mask &= cols.get("descricao").str.contains(cond["descricao_regex"]).to_numpy()
+    if "categoria" in cond:
+        mask &= cols.get("categoria").isin(cond["categoria"]).to_numpy()
+    if "conta" in cond:
+        mask &= cols.get("CONTA").isin(cond["conta"]).to_numpy()
+    if "tipo_conta" in cond:
+        mask &= cols.get("tipo_conta").eq(cond["tipo_conta"]).to_numpy()
+    if "situacao" in cond:
+        mask &= cols.get("Situação").isin(cond["situacao"]).to_numpy()
+    if "inicio" in cond:
+        mask &= (cols.get("Data") >= cond["inicio"]).to_numpy()
+    if "fim" in cond:
+        mask &= (cols.get("Data") < cond["fim"]).to_numpy()
+    return mask
+
+
+def evaluate_rules(
+    df: pd.DataFrame,
+    rules=None,
+    tipos=None,
+) -> dict[str, np.ndarray]:
+    """
+    Avalia as regras (opcionalmente só dos `tipos` dados).
+
+    Returns:
+        Dict nome da regra -> máscara booleana alinhada a df
+    """
+    if rules is None:
+        rules = get_classification_rules()
+
+    cols = _Columns(df)
+    return {
+        rule["nome"]: _rule_mask(cols, rule["condicoes"])
+        for rule in rules
+        if tipos is None or rule["tipo"] in tipos
+    }
+
+
+def tipo_mask(df: pd.DataFrame, tipo: str, rules=None) -> np.ndarray:
+    """Máscara das linhas que casam com alguma regra do tipo."""
+    masks = evaluate_rules(df, rules, {tipo})
+    if not masks:
+        raise KeyError(f"Nenhuma regra de classificação para o tipo {tipo}")
+    return np.logical_or.reduce(list(masks.values()))
+
+
+def tipo_indices(df: pd.DataFrame, tipo: str, rules=None) -> set[int]:
+    """Índices das linhas que casam com alguma regra do tipo."""
+    return set(df.index[tipo_mask(df, tipo, rules)].tolist())
+
+
+def classify(df: pd.DataFrame, tipos=None, rules=None) -> pd.DataFrame:
+    """
+    Classifica cada linha pela primeira regra que casa.
+
+    Returns:
+        DataFrame (mesmo índice) com colunas tipo e regra; None quando
+        nenhuma regra casa
+    """
+    if rules is None:
+        rules = get_classification_rules()
+
+    masks = evaluate_rules(df, rules, tipos)
+    tipo = np.full(len(df), None, dtype=object)
+    regra = np.full(len(df), None, dtype=object)
+    livre = np.ones(len(df), dtype=bool)
+
+    for rule in rules:
+        if rule["nome"] not in masks:
+            continue
+        hit = masks[rule["nome"]] & livre
+        tipo[hit] = rule["tipo"]
+        regra[hit] = rule["nome"]
+        livre &= ~hit
+
+    return pd.DataFrame(
+        {
+            "tipo": pd.Series(tipo, index=df.index, dtype=object),
+            "regra": pd.Series(regra, index=df.index, dtype=object),
+        }
+    )
+
+
+def rule_account(tipo: str, lado: str, rules=None) -> str:
+    """Conta de destino (debito/credito/contrapartida) declarada para o tipo."""
+    if rules is None:
+        rules = get_classification_rules()
+
+    for rule in rules:
+        if rule["tipo"] == tipo and lado in rule["contas"]:
+            return rule["contas"][lado]
+    raise KeyError(f"Nenhuma conta '{lado}' declarada para o tipo {tipo}")
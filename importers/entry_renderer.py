@@ -0,0 +1,172 @@
+"""
+Renderização em lote de entradas Beancount.
+
+Responsabilidades:
+- Montar o texto de um lote inteiro de entradas a partir de colunas
+  (datas, flags, descrições, contas, centavos) com concatenação vetorizada
+- Derivar essas colunas de um DataFrame do Organizze sem acesso por linha
+
+Uma entrada de render_entries tem cinco linhas: cabeçalho, débito, crédito,
+origem_id e linha em branco (mais os metadados extras, se houver).
+render_postings aceita qualquer número de postings e metadados, omitidos
+onde a conta ou o valor é vazio. O layout é o mesmo que os handlers geravam
+com f-strings ({conta:40s} {valor:>10} BRL).
+"""
+
+import numpy as np
+import pandas as pd
+
+from organizze_shared import (
+    CENTS_COLUMN,
+    format_cents_array,
+    get_account_path,
+    sanitize_description,
+    sanitize_descriptions,
+)
+
+
+LINES_PER_ENTRY = 5
+
+
+def _posting_lines(accounts: pd.Series, cents: np.ndarray) -> pd.Series:
+    amounts = pd.Series(format_cents_array(cents), dtype=object).str.rjust(10)
+    return "  " + accounts.str.ljust(40) + " " + amounts + " BRL"
+
+
+def _column(values, n: int) -> pd.Series:
+    if values is None or isinstance(values, str):
+        return pd.Series(np.full(n, values, dtype=object), dtype=object)
+    return pd.Series(np.asarray(values, dtype=object), dtype=object)
+
+
+def render_postings(
+    dates,
+    flags,
+    descs,
+    postings,
+    meta,
+) -> list[str]:
+    """
+    Renderiza um lote de entradas com vários postings e metadados.
+
+    Args:
+        postings: lista de (contas, centavos); o posting é omitido nas
+            entradas em que a conta é vazia
+        meta: dict chave -> valores; a linha `chave: "valor"` é omitida nas
+            entradas em que o valor é vazio
+
+    Returns:
+        Lista de linhas na ordem recebida: cabeçalho, postings, metadados e
+        linha em branco por entrada
+    """
+    n = len(dates)
+    if n == 0:
+        return []
+
+    header = (
+        _column(dates, n) + " " + _column(flags, n) + ' "' + _column(descs, n) + '"'
+    )
+    columns = [header]
+    for accounts, cents in postings:
+        accounts = _column(accounts, n).fillna("")
+        cents = np.broadcast_to(np.asarray(cents, dtype=np.int64), n)
+        columns.append(_posting_lines(accounts, cents).where(accounts.ne("")))
+    for chave, valores in meta.items():
+        valores = _column(valores, n).fillna("")
+        columns.append((f'  {chave}: "' + valores + '"').where(valores.ne("")))
+    columns.append(_column("", n))
+
+    lines = np.column_stack([c.to_numpy(dtype=object) for c in columns]).ravel()
+    return lines[pd.notna(lines)].tolist()
+
+
+def render_entries(
+    dates,
+    flags,
+    descs,
+    debits,
+    credits,
+    cents,
+    origem_id,
+    meta=None,
+) -> list[str]:
+    """
+    Renderiza um lote de entradas (débito +centavos, crédito -centavos).
+
+    Args:
+        debits, credits, origem_id: valor único para o lote ou um por entrada
+        meta: metadados extras após origem_id (ver render_postings)
+
+    Returns:
+        Lista de linhas, LINES_PER_ENTRY por entrada (sem metadados extras),
+        na ordem recebida
+    """
+    cents = np.asarray(cents, dtype=np.int64)
+    if len(cents) == 0:
+        return []
+    return render_postings(
+        dates,
+        flags,
+        descs,
+        [(debits, cents), (credits, -cents)],
+        {"origem_id": origem_id, **(meta or {})},
+    )
+
+
+def entry_dates(rows: pd.DataFrame) -> np.ndarray:
+    """Datas no formato Beancount (YYYY-MM-DD)."""
+    return rows["Data"].dt.strftime("%Y-%m-%d").to_numpy(dtype=object)
+
+
+def entry_flags(rows: pd.DataFrame) -> np.ndarray:
+    """'*' para Situação == 'Pago' (ou coluna ausente), '!' caso contrário."""
+    if "Situação" not in rows.columns:
+        return np.full(len(rows), "*", dtype=object)
+    return np.where(rows["Situação"].eq("Pago").to_numpy(), "*", "!").astype(object)
+
+
+def entry_descriptions(rows: pd.DataFrame) -> np.ndarray:
+    """Descrições sanitizadas."""
+    if "Descrição" not in rows.columns:
+        return np.full(len(rows), sanitize_description(""), dtype=object)
+    return sanitize_descriptions(rows["Descrição"]).to_numpy(dtype=object)
+
+
+def entry_accounts(rows: pd.DataFrame) -> pd.Series:
+    """Conta Beancount (Assets/Liabilities) de cada linha."""
+    return rows["CONTA"].map(get_account_path).astype(object)
+
+
+def conta_beancount_override(rows: pd.DataFrame, default: pd.Series) -> pd.Series:
+    """Usa conta_beancount (sem espaços nas pontas) quando preenchida."""
+    if "conta_beancount" not in rows.columns:
+        return default
+    override = rows["conta_beancount"].fillna("").astype(str)
+    filled = override.ne("").to_numpy()
+    return pd.Series(
+        np.where(
+            filled,
+            override.str.strip().to_numpy(dtype=object),
+            np.asarray(default, dtype=object),
+        ),
+        index=rows.index,
+        dtype=object,
+    )
+
+
+def render_rows(
+    rows: pd.DataFrame,
+    debits,
+    credits,
+    origem_id,
+) -> list[str]:
+    """Renderiza linhas do DataFrame com as contas de débito/crédito dadas."""
+    return render_entries(
+        entry_dates(rows),
+        entry_flags(rows),
+        entry_descriptions(rows),
+        debits,
+        credits,
+        rows[CENTS_COLUMN].to_numpy(),
+        origem_id,
+    )
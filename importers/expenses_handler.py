@@ -14,10 +14,20 @@ import logging
 
 import pandas as pd
 
+from classification_rules import rule_account, tipo_indices
+from entry_renderer import (
+    conta_beancount_override,
+    entry_accounts,
+    entry_dates,
+    entry_descriptions,
+    entry_flags,
+    render_entries,
+    render_rows,
+)
 from organizze_shared import (
-    get_account_path,
-    sanitize_description,
+    CENTS_COLUMN,
     sanitize_name,
+    sanitize_names,
 )
 
 
@@ -25,40 +35,16 @@ logger = logging.getLogger(__name__)
 
 
 def identify_boleto_indices(df: pd.DataFrame) -> set[int]:
-    """Identifica pagamentos de boleto/título."""
-    boleto_indices = set()
-    for idx, row in df.iterrows():
-        if row["D/R"] != "D":
-            continue
-
-        desc = (
-            str(row.get("Descrição", "")).lower()
-            if pd.notna(row.get("Descrição"))
-            else ""
-        )
-        if "pagamento de título" in desc or "boleto" in desc:
-            boleto_indices.add(idx)
-
-    logger.info(f"Pagamentos de boleto identificados: {len(boleto_indices)}")
+    """Identifica pagamentos de boleto/título (regras do tipo boleto)."""
+    boleto_indices = tipo_indices(df, "boleto")
+    logger.info("Pagamentos de boleto identificados: %d", len(boleto_indices))
     return boleto_indices
 
 
 def identify_cartao_expense_indices(df: pd.DataFrame) -> set[int]:
-    """Identifica despesas em contas de cartão (Categoria='Outros')."""
-    cartao_expense_indices = set()
-    for idx, row in df.iterrows():
-        if row["D/R"] != "D":
-            continue
-
-        conta = row.get("CONTA", "")
-        cat = row.get("Categoria", "")
-
-        from organizze_shared import ACCOUNTS_TYPE
-
-        if ACCOUNTS_TYPE.get(conta) == "Liabilities" and str(cat).lower() == "outros":
-            cartao_expense_indices.add(idx)
-
-    logger.info(f"Despesas em cartão identificadas: {len(cartao_expense_indices)}")
+    """Identifica despesas em contas de cartão (regras do tipo despesa_cartao)."""
+    cartao_expense_indices = tipo_indices(df, "despesa_cartao")
+    logger.info("Despesas em cartão identificadas: %d", len(cartao_expense_indices))
     return cartao_expense_indices
 
 
@@ -66,26 +52,25 @@ def generate_boleto_entries(
     df: pd.DataFrame, boleto_indices: set[int]
 ) -> tuple[list[str], int]:
     """Gera entradas Beancount para pagamentos de boleto."""
-    lines = []
-    count = 0
-    for idx in sorted(boleto_indices):
-        row = df.iloc[idx]
-        lines.extend(_build_boleto_entry(row))
-        count += 1
-    return lines, count
+    rows = df.loc[sorted(boleto_indices)]
+    lines = render_rows(
+        rows, rule_account("boleto", "debito"), entry_accounts(rows), "pagto_boleto"
+    )
+    return lines, len(rows)
 
 
 def generate_cartao_expense_entries(
     df: pd.DataFrame, cartao_expense_indices: set[int]
 ) -> tuple[list[str], int]:
     """Gera entradas Beancount para despesas em cartão."""
-    lines = []
-    count = 0
-    for idx in sorted(cartao_expense_indices):
-        row = df.iloc[idx]
-        lines.extend(_build_cartao_expense_entry(row))
-        count += 1
-    return lines, count
+    rows = df.loc[sorted(cartao_expense_indices)]
+    lines = render_rows(
+        rows,
+        rule_account("despesa_cartao", "debito"),
+        entry_accounts(rows),
+        "despesa_cartao",
+    )
+    return lines, len(rows)
 
 
 def generate_expense_entries(
@@ -97,85 +82,28 @@ def generate_expense_entries(
 
     Despesa: D sem R pareado → Expense+ / Asset-
     """
-    lines = []
-    count = 0
-
-    for idx, row in df.iterrows():
-        if idx in excluded_indices:
-            continue
-
-        if row["D/R"] != "D":
-            continue
-
-        desc = sanitize_description(row.get("Descrição", ""))
-
-        if "saldo inicial" in desc.lower():
-            continue
-
-        date = row["Data"].strftime("%Y-%m-%d")
-        value = abs(row["Valor"])
-        conta = row.get("CONTA", "")
-        categoria = sanitize_name(row.get("Categoria", "SemCategoria"))
-        status = row.get("Situação", "Pago")
-        flag = "*" if status == "Pago" else "!"
-
-        conta_beancount = row.get("conta_beancount")
-        if conta_beancount and pd.notna(conta_beancount):
-            debit = str(conta_beancount).strip()
-        else:
-            debit = f"Expenses:{categoria}"
-
-        conta_beancount_credit = row.get("conta_beancount")
-        if conta_beancount_credit and pd.notna(conta_beancount_credit):
-            credit = str(conta_beancount_credit).strip()
-        else:
-            credit = get_account_path(conta)
-
-        lines.append(f'{date} {flag} "{desc}"')
-        lines.append(f"  {debit:40s} {value:>10.2f} BRL")
-        lines.append(f"  {credit:40s} {-value:>10.2f} BRL")
-        lines.append('  origem_id: "despesa"')
-        lines.append("")
-        count += 1
-
-    return lines, count
-
-
-def _build_boleto_entry(row: pd.Series) -> list[str]:
-    date = row["Data"].strftime("%Y-%m-%d")
-    desc = sanitize_description(row.get("Descrição", ""))
-    value = abs(row["Valor"])
-    conta = row.get("CONTA", "")
-    status = row.get("Situação", "Pago")
-    flag = "*" if status == "Pago" else "!"
-
-    debit = "Expenses:Boletos"
-    credit = get_account_path(conta)
-
-    return [
-        f'{date} {flag} "{desc}"',
-        f"  {debit:40s} {value:>10.2f} BRL",
-        f"  {credit:40s} {-value:>10.2f} BRL",
-        '  origem_id: "pagto_boleto"',
-        "",
-    ]
-
-
-def _build_cartao_expense_entry(row: pd.Series) -> list[str]:
-    date = row["Data"].strftime("%Y-%m-%d")
-    desc = sanitize_description(row.get("Descrição", ""))
-    value = abs(row["Valor"])
-    conta = row.get("CONTA", "")
-    status = row.get("Situação", "Pago")
-    flag = "*" if status == "Pago" else "!"
-
-    debit = "Expenses:OutrosCartao"
-    credit = get_account_path(conta)
-
-    return [
-        f'{date} {flag} "{desc}"',
-        f"  {debit:40s} {value:>10.2f} BRL",
-        f"  {credit:40s} {-value:>10.2f} BRL",
-        '  origem_id: "despesa_cartao"',
-        "",
-    ]
+    rows = df[(df["D/R"] == "D") & ~df.index.isin(list(excluded_indices))]
+
+    descs = entry_descriptions(rows)
+    keep = ~pd.Series(descs).str.lower().str.contains("saldo inicial", regex=False)
+    rows = rows[keep.to_numpy()]
+    descs = descs[keep.to_numpy()]
+
+    if "Categoria" in rows.columns:
+        categorias = sanitize_names(rows["Categoria"])
+    else:
+        categorias = pd.Series(sanitize_name("SemCategoria"), index=rows.index)
+
+    debits = conta_beancount_override(rows, "Expenses:" + categorias.astype(object))
+    credits = conta_beancount_override(rows, entry_accounts(rows))
+
+    lines = render_entries(
+        entry_dates(rows),
+        entry_flags(rows),
+        descs,
+        debits,
+        credits,
+        rows[CENTS_COLUMN].to_numpy(),
+        "despesa",
+    )
+    return lines, len(rows)
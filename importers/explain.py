@@ -0,0 +1,134 @@
+"""
+Artefato de explicação da importação (uma linha por lançamento de origem).
+
+Responsabilidades:
+- Registrar, durante a execução normal, quem decidiu cada linha
+  (classificação, regra ou handler, contraparte e debug_motivo)
+- Gravar o resultado em formato colunar (Parquet; CSV se não houver engine)
+- Ler o artefato de volta para consulta sem reprocessar
+
+Cada linha é decidida uma única vez: o primeiro registro vence, na mesma
+ordem em que o organizze_v5 separa os lançamentos.
+
+Consulta: pd.read_parquet("data/explain.parquet") ou load_explain().
+"""
+
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from organizze_shared import CENTS_COLUMN
+
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_COLUMNS = [
+    "idx",
+    "data",
+    "conta",
+    "dr",
+    "centavos",
+    "descricao",
+    "classificacao",
+    "decidido_por",
+    "contraparte",
+    "debug_motivo",
+]
+
+
+class ExplainLog:
+    """Decisões por linha em arrays colunares pré-alocados."""
+
+    def __init__(self, size: int) -> None:
+        self.classificacao = np.full(size, None, dtype=object)
+        self.decidido_por = np.full(size, None, dtype=object)
+        self.contraparte = np.full(size, -1, dtype=np.int64)
+        self.debug_motivo = np.full(size, None, dtype=object)
+
+    def record(
+        self,
+        indices,
+        classificacao,
+        decidido_por,
+        contraparte=None,
+        debug_motivo=None,
+    ) -> None:
+        """
+        Registra a decisão das linhas ainda não decididas.
+
+        classificacao, decidido_por, contraparte e debug_motivo aceitam um
+        valor único ou um valor por índice.
+        """
+        indices = np.asarray(list(indices), dtype=np.int64)
+        if len(indices) == 0:
+            return
+
+        livre = pd.isna(self.classificacao[indices])
+        targets = indices[livre]
+
+        def pick(values):
+            if values is None or np.isscalar(values):
+                return values
+            return np.asarray(values, dtype=object)[livre]
+
+        self.classificacao[targets] = pick(classificacao)
+        self.decidido_por[targets] = pick(decidido_por)
+        if contraparte is not None:
+            self.contraparte[targets] = pick(contraparte)
+        if debug_motivo is not None:
+            self.debug_motivo[targets] = pick(debug_motivo)
+
+    def to_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Monta o artefato junto com as colunas de identificação da linha."""
+        descricao = (
+            df["Descrição"]
+            if "Descrição" in df.columns
+            else pd.Series("", index=df.index)
+        )
+        return pd.DataFrame(
+            {
+                "idx": df.index.to_numpy(),
+                "data": df["Data"].to_numpy(),
+                "conta": df["CONTA"].astype(object).to_numpy(),
+                "dr": df["D/R"].astype(object).to_numpy(),
+                "centavos": df[CENTS_COLUMN].to_numpy(),
+                "descricao": descricao.astype(object).to_numpy(),
+                "classificacao": self.classificacao,
+                "decidido_por": self.decidido_por,
+                "contraparte": pd.array(
+                    np.where(self.contraparte >= 0, self.contraparte, None),
+                    dtype="Int64",
+                ),
+                "debug_motivo": self.debug_motivo,
+            },
+            columns=EXPLAIN_COLUMNS,
+        )
+
+
+def write_explain(frame: pd.DataFrame, path: Path) -> Path:
+    """
+    Grava o artefato em Parquet; sem engine Parquet, grava CSV ao lado.
+
+    Returns:
+        Caminho efetivamente gravado
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        frame.to_parquet(path, index=False)
+    except ImportError:
+        path = path.with_suffix(".csv")
+        frame.to_csv(path, index=False)
+    logger.info("Explain: %d linhas em %s", len(frame), path)
+    return path
+
+
+def load_explain(path: Path) -> pd.DataFrame:
+    """Lê o artefato gravado por write_explain (Parquet ou CSV)."""
+    if path.suffix == ".parquet" and path.exists():
+        return pd.read_parquet(path)
+    csv_path = path.with_suffix(".csv")
+    frame = pd.read_csv(csv_path, parse_dates=["data"])
+    frame["contraparte"] = frame["contraparte"].astype("Int64")
+    return frame
@@ -9,52 +9,31 @@ Responsabilidades:
 
 import logging
 
+import numpy as np
 import pandas as pd
 
-from organizze_shared import (
-    get_account_path,
-    sanitize_description,
-    sanitize_name,
-)
+from classification_rules import rule_account, tipo_indices
+from entry_renderer import conta_beancount_override, entry_accounts, render_rows
+from organizze_shared import sanitize_name, sanitize_names
 
 
 logger = logging.getLogger(__name__)
 
 
 def identify_transferencia_recebida_indices(df: pd.DataFrame) -> set[int]:
-    """Identifica transferências recebidas."""
-    transferencia_recebida_indices = set()
-    for idx, row in df.iterrows():
-        if row["D/R"] != "R":
-            continue
-
-        desc = (
-            str(row.get("Descrição", "")).lower()
-            if pd.notna(row.get("Descrição"))
-            else ""
-        )
-        if "transferência recebida" in desc:
-            transferencia_recebida_indices.add(idx)
-
+    """Identifica transferências recebidas (regras do tipo transferencia_recebida)."""
+    transferencia_recebida_indices = tipo_indices(df, "transferencia_recebida")
     logger.info(
-        f"Transferências recebidas identificadas: {len(transferencia_recebida_indices)}"
+        "Transferências recebidas identificadas: %d",
+        len(transferencia_recebida_indices),
     )
     return transferencia_recebida_indices
 
 
 def identify_ajuste_indices(df: pd.DataFrame) -> set[int]:
-    """Identifica ajustes de saldo."""
-    ajuste_indices = set()
-    for idx, row in df.iterrows():
-        desc = (
-            str(row.get("Descrição", "")).lower()
-            if pd.notna(row.get("Descrição"))
-            else ""
-        )
-        if "ajuste" in desc and "saldo" in desc:
-            ajuste_indices.add(idx)
-
-    logger.info(f"Ajustes de saldo identificados: {len(ajuste_indices)}")
+    """Identifica ajustes de saldo (regras do tipo ajuste_saldo)."""
+    ajuste_indices = tipo_indices(df, "ajuste_saldo")
+    logger.info("Ajustes de saldo identificados: %d", len(ajuste_indices))
     return ajuste_indices
 
 
@@ -63,13 +42,14 @@ def generate_transferencia_recebida_entries(
     transferencia_recebida_indices: set[int],
 ) -> tuple[list[str], int]:
     """Gera entradas Beancount para transferências recebidas."""
-    lines = []
-    count = 0
-    for idx in sorted(transferencia_recebida_indices):
-        row = df.iloc[idx]
-        lines.extend(_build_transferencia_recebida_entry(row))
-        count += 1
-    return lines, count
+    rows = df.loc[sorted(transferencia_recebida_indices)]
+    lines = render_rows(
+        rows,
+        entry_accounts(rows),
+        rule_account("transferencia_recebida", "credito"),
+        "transferencia_recebida",
+    )
+    return lines, len(rows)
 
 
 def generate_ajuste_entries(
@@ -77,13 +57,14 @@ def generate_ajuste_entries(
     ajuste_indices: set[int],
 ) -> tuple[list[str], int]:
     """Gera entradas Beancount para ajustes de saldo."""
-    lines = []
-    count = 0
-    for idx in sorted(ajuste_indices):
-        row = df.iloc[idx]
-        lines.extend(_build_ajuste_entry(row))
-        count += 1
-    return lines, count
+    rows = df.loc[sorted(ajuste_indices)]
+    accounts = entry_accounts(rows).to_numpy()
+    is_debit = (rows["D/R"] == "D").to_numpy()
+    contrapartida = rule_account("ajuste_saldo", "contrapartida")
+    debits = np.where(is_debit, accounts, contrapartida)
+    credits = np.where(is_debit, contrapartida, accounts)
+    lines = render_rows(rows, debits, credits, "ajuste_saldo")
+    return lines, len(rows)
 
 
 def generate_income_entries(
@@ -95,86 +76,15 @@ def generate_income_entries(
 
     Receita: R sem D pareado → Asset+ / Income-
     """
-    lines = []
-    count = 0
-
-    for idx, row in df.iterrows():
-        if idx in excluded_indices:
-            continue
-
-        if row["D/R"] != "R":
-            continue
-
-        date = row["Data"].strftime("%Y-%m-%d")
-        desc = sanitize_description(row.get("Descrição", ""))
-        value = abs(row["Valor"])
-        conta = row.get("CONTA", "")
-        categoria = sanitize_name(row.get("Categoria", "SemCategoria"))
-        status = row.get("Situação", "Pago")
-        flag = "*" if status == "Pago" else "!"
-
-        conta_beancount = row.get("conta_beancount")
-        if conta_beancount and pd.notna(conta_beancount):
-            credit = str(conta_beancount).strip()
-        else:
-            credit = f"Income:{categoria}"
-
-        conta_beancount_debit = row.get("conta_beancount")
-        if conta_beancount_debit and pd.notna(conta_beancount_debit):
-            debit = str(conta_beancount_debit).strip()
-        else:
-            debit = get_account_path(conta)
-
-        lines.append(f'{date} {flag} "{desc}"')
-        lines.append(f"  {debit:40s} {value:>10.2f} BRL")
-        lines.append(f"  {credit:40s} {-value:>10.2f} BRL")
-        lines.append('  origem_id: "receita"')
-        lines.append("")
-        count += 1
-
-    return lines, count
-
-
-def _build_transferencia_recebida_entry(row: pd.Series) -> list[str]:
-    date = row["Data"].strftime("%Y-%m-%d")
-    desc = sanitize_description(row.get("Descrição", ""))
-    value = abs(row["Valor"])
-    conta = row.get("CONTA", "")
-    status = row.get("Situação", "Pago")
-    flag = "*" if status == "Pago" else "!"
-
-    debit = get_account_path(conta)
-    credit = "Income:TransferenciasRecebidas"
-
-    return [
-        f'{date} {flag} "{desc}"',
-        f"  {debit:40s} {value:>10.2f} BRL",
-        f"  {credit:40s} {-value:>10.2f} BRL",
-        '  origem_id: "transferencia_recebida"',
-        "",
-    ]
-
-
-def _build_ajuste_entry(row: pd.Series) -> list[str]:
-    date = row["Data"].strftime("%Y-%m-%d")
-    desc = sanitize_description(row.get("Descrição", ""))
-    value = abs(row["Valor"])
-    conta = row.get("CONTA", "")
-    dr = row["D/R"]
-    status = row.get("Situação", "Pago")
-    flag = "*" if status == "Pago" else "!"
-
-    if dr == "D":
-        debit = get_account_path(conta)
-        credit = "Equity:Ajustes"
+    rows = df[(df["D/R"] == "R") & ~df.index.isin(list(excluded_indices))]
+
+    if "Categoria" in rows.columns:
+        categorias = sanitize_names(rows["Categoria"])
     else:
-        debit = "Equity:Ajustes"
-        credit = get_account_path(conta)
-
-    return [
-        f'{date} {flag} "{desc}"',
-        f"  {debit:40s} {value:>10.2f} BRL",
-        f"  {credit:40s} {-value:>10.2f} BRL",
-        '  origem_id: "ajuste_saldo"',
-        "",
-    ]
+        categorias = pd.Series(sanitize_name("SemCategoria"), index=rows.index)
+
+    debits = conta_beancount_override(rows, entry_accounts(rows))
+    credits = conta_beancount_override(rows, "Income:" + categorias.astype(object))
+
+    lines = render_rows(rows, debits, credits, "receita")
+    return lines, len(rows)
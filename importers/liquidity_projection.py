@@ -0,0 +1,304 @@
+"""
+Projeção de liquidez: recorrências do histórico viram lançamentos futuros.
+
+Responsabilidades:
+- Detectar transações recorrentes (mesma descrição, conta e contrapartida,
+  valor parecido) com período mensal ou anual, por groupby no histórico
+- Gerar as previsões ("#") em budget.beancount até o horizonte configurado
+- Pré-calcular o saldo diário projetado por conta patrimonial (CSV), do
+  último dia do ledger até o fim do horizonte
+
+O Beancount não aceita a flag "~"; as previsões usam "#", que a query de
+liquidez projetada soma à parte.
+
+Custo linear no histórico (groupby/diff); a projeção depende só de
+contas x dias do horizonte.
+"""
+
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from balance_assertions import PREFIXOS_PATRIMONIAIS, daily_balances, postings_frame
+from organizze_shared import format_cents, format_cents_array
+
+
+logger = logging.getLogger(__name__)
+
+FLAG_PROJECAO = "#"
+HORIZONTE_MESES = 6
+TOLERANCIA_VALOR = 0.10
+FRACAO_REGULAR = 0.75
+
+# periodo -> (passo em meses, intervalo mínimo e máximo em dias, ocorrências)
+PERIODOS = {
+    "mensal": (1, 25, 35, 3),
+    "anual": (12, 350, 380, 2),
+}
+
+_CHAVE = ["chave", "conta", "contrapartida"]
+
+
+def transaction_frame(
+    postings: pd.DataFrame,
+    prefixos: tuple[str, ...] = PREFIXOS_PATRIMONIAIS,
+) -> pd.DataFrame:
+    """
+    Transações de dois postings com uma perna patrimonial.
+
+    Returns:
+        DataFrame com data, descricao, conta (perna patrimonial),
+        contrapartida e centavos (da perna patrimonial)
+    """
+    tamanho = postings.groupby("transacao")["conta"].transform("size")
+    pares = postings[tamanho == 2]
+    # Perna patrimonial primeiro; cada transação ocupa duas linhas seguidas
+    pares = pares.assign(_outra=~pares["conta"].str.startswith(prefixos))
+    pares = pares.sort_values(["transacao", "_outra"], kind="stable")
+    perna = pares.iloc[0::2]
+    outra = pares.iloc[1::2]
+
+    transacoes = pd.DataFrame(
+        {
+            "data": perna["data"].to_numpy(),
+            "descricao": perna["descricao"].fillna("").to_numpy(),
+            "conta": perna["conta"].to_numpy(),
+            "contrapartida": outra["conta"].to_numpy(),
+            "centavos": perna["centavos"].to_numpy(),
+        }
+    )
+    manter = ~perna["_outra"].to_numpy() & ~transacoes["contrapartida"].str.startswith(
+        "Equity:"
+    )
+    return transacoes[manter].reset_index(drop=True)
+
+
+def _mes_absoluto(datas: pd.Series) -> pd.Series:
+    return datas.dt.year * 12 + datas.dt.month - 1
+
+
+def detect_recurring(
+    transacoes: pd.DataFrame,
+    referencia: pd.Timestamp,
+    tolerancia: float = TOLERANCIA_VALOR,
+) -> pd.DataFrame:
+    """
+    Séries recorrentes ainda ativas na data de referência.
+
+    Uma série é (descrição normalizada, conta, contrapartida) com valores
+    até `tolerancia` da mediana; é recorrente quando ao menos FRACAO_REGULAR
+    dos intervalos entre ocorrências cabem no período.
+
+    Returns:
+        DataFrame com descricao, conta, contrapartida, periodo, meses,
+        centavos (mediana), ultima (data) e dia (do mês da última ocorrência)
+    """
+    colunas = [
+        "descricao",
+        "conta",
+        "contrapartida",
+        "periodo",
+        "meses",
+        "centavos",
+        "ultima",
+        "dia",
+    ]
+    if transacoes.empty:
+        return pd.DataFrame(columns=colunas)
+
+    chave = (
+        transacoes["descricao"]
+        .str.lower()
+        .str.replace(r"[\d\W_]+", " ", regex=True)
+        .str.strip()
+    )
+    t = transacoes.assign(chave=chave)
+    mediana = t.groupby(_CHAVE)["centavos"].transform("median")
+    perto = (t["centavos"] - mediana).abs() <= tolerancia * mediana.abs()
+    t = t[perto].sort_values(_CHAVE + ["data"], kind="stable")
+    t["intervalo"] = t.groupby(_CHAVE)["data"].diff().dt.days
+
+    series = []
+    for periodo, (meses, minimo, maximo, ocorrencias) in PERIODOS.items():
+        regular = t.assign(regular=t["intervalo"].between(minimo, maximo))
+        agregado = regular.groupby(_CHAVE).agg(
+            n=("data", "size"),
+            regulares=("regular", "sum"),
+            centavos=("centavos", "median"),
+            ultima=("data", "max"),
+            descricao=("descricao", "last"),
+        )
+        ok = (agregado["regulares"] >= ocorrencias - 1) & (
+            agregado["regulares"] >= FRACAO_REGULAR * (agregado["n"] - 1)
+        )
+        series.append(agregado[ok].assign(periodo=periodo, meses=meses))
+
+    # Intervalos mensal e anual não se sobrepõem: cada série cai em um só
+    resultado = pd.concat(series).reset_index()
+    atraso = _mes_absoluto(pd.Series(referencia, index=resultado.index)) - (
+        _mes_absoluto(resultado["ultima"])
+    )
+    resultado = resultado[atraso <= 2 * resultado["meses"]]
+    resultado = resultado.assign(
+        centavos=resultado["centavos"].round().astype(np.int64),
+        dia=resultado["ultima"].dt.day,
+    )
+    return resultado[colunas].sort_values(["conta", "descricao"]).reset_index(drop=True)
+
+
+def forecast(
+    series: pd.DataFrame,
+    referencia: pd.Timestamp,
+    horizonte_meses: int = HORIZONTE_MESES,
+) -> pd.DataFrame:
+    """
+    Ocorrências futuras de cada série, de referencia (exclusive) até
+    referencia + horizonte_meses.
+
+    O dia do mês é o da última ocorrência, limitado ao fim do mês.
+
+    Returns:
+        DataFrame com data, descricao, conta, contrapartida, centavos e
+        periodo, ordenado por data
+    """
+    colunas = ["data", "descricao", "conta", "contrapartida", "centavos", "periodo"]
+    if series.empty:
+        return pd.DataFrame(columns=colunas)
+
+    fim = referencia + pd.DateOffset(months=horizonte_meses)
+    # Séries ativas atrasam no máximo dois períodos: h + 3 passos bastam
+    passos = horizonte_meses + 3
+    k = np.tile(np.arange(1, passos + 1), len(series))
+    s = series.loc[series.index.repeat(passos)].reset_index(drop=True)
+
+    mes = _mes_absoluto(s["ultima"]) + k * s["meses"]
+    inicio_mes = pd.to_datetime(
+        pd.DataFrame({"year": mes // 12, "month": mes % 12 + 1, "day": 1})
+    )
+    dia = np.minimum(s["dia"], inicio_mes.dt.days_in_month)
+    s["data"] = inicio_mes + pd.to_timedelta(dia - 1, unit="D")
+
+    dentro = (s["data"] > referencia) & (s["data"] <= fim)
+    return (
+        s.loc[dentro, colunas]
+        .sort_values(["data", "conta", "descricao"], kind="stable")
+        .reset_index(drop=True)
+    )
+
+
+def generate_budget_entries(previsoes: pd.DataFrame) -> tuple[list[str], int]:
+    """Gera as transações de previsão com a flag FLAG_PROJECAO."""
+    lines = []
+    for p in previsoes.itertuples(index=False):
+        lines.append(f'{p.data:%Y-%m-%d} {FLAG_PROJECAO} "{p.descricao}"')
+        lines.append(f"  {p.conta:40s} {format_cents(p.centavos):>10} BRL")
+        lines.append(f"  {p.contrapartida:40s} {format_cents(-p.centavos):>10} BRL")
+        lines.append(f'  projecao: "{p.periodo}"')
+        lines.append("")
+    return lines, len(previsoes)
+
+
+def projected_daily_balances(
+    diario: pd.DataFrame,
+    previsoes: pd.DataFrame,
+    referencia: pd.Timestamp,
+    horizonte_meses: int = HORIZONTE_MESES,
+    prefixos: tuple[str, ...] = PREFIXOS_PATRIMONIAIS,
+) -> pd.DataFrame:
+    """
+    Saldo projetado por conta patrimonial e dia do horizonte.
+
+    Parte do saldo de cada conta na referência e soma as previsões (as
+    duas pernas, quando ambas são patrimoniais).
+
+    Returns:
+        DataFrame com data, conta e saldo (centavos), um por conta e dia
+    """
+    dias = pd.date_range(
+        referencia + pd.Timedelta(days=1),
+        referencia + pd.DateOffset(months=horizonte_meses),
+        freq="D",
+    )
+    atual = diario[
+        diario["conta"].str.startswith(prefixos) & (diario["data"] <= referencia)
+    ]
+    iniciais = atual.groupby("conta")["saldo"].last()
+
+    pernas = pd.concat(
+        [
+            previsoes[["data", "conta", "centavos"]],
+            pd.DataFrame(
+                {
+                    "data": previsoes["data"],
+                    "conta": previsoes["contrapartida"],
+                    "centavos": -previsoes["centavos"],
+                }
+            ),
+        ]
+    )
+    pernas = pernas[pernas["conta"].astype(str).str.startswith(prefixos)]
+    movimento = pernas.pivot_table(
+        index="data", columns="conta", values="centavos", aggfunc="sum"
+    )
+    contas = iniciais.index.union(movimento.columns)
+    movimento = movimento.reindex(index=dias, columns=contas, fill_value=0).fillna(0)
+    saldos = movimento.astype(np.int64).cumsum() + iniciais.reindex(
+        contas, fill_value=0
+    ).astype(np.int64)
+
+    longo = saldos.rename_axis(index="data", columns="conta").stack()
+    return (
+        longo.rename("saldo")
+        .reset_index()
+        .sort_values(["conta", "data"])[["data", "conta", "saldo"]]
+        .reset_index(drop=True)
+    )
+
+
+def write_projected_balances(saldos: pd.DataFrame, path: Path) -> None:
+    """Grava o saldo diário projetado em CSV (saldo em reais)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    saida = pd.DataFrame(
+        {
+            "data": saldos["data"].dt.strftime("%Y-%m-%d"),
+            "conta": saldos["conta"],
+            "saldo": format_cents_array(saldos["saldo"]),
+        }
+    )
+    saida.to_csv(path, index=False)
+
+
+def build_projection(
+    texto: str,
+    horizonte_meses: int = HORIZONTE_MESES,
+    referencia: pd.Timestamp | None = None,
+) -> tuple[list[str], int, pd.DataFrame]:
+    """
+    Pipeline completo: texto Beancount -> previsões e saldo projetado.
+
+    A referência padrão é a última data com transação no texto.
+
+    Returns:
+        Tuple (linhas de budget.beancount, quantidade, saldo diário projetado)
+    """
+    postings = postings_frame(texto)
+    if postings.empty:
+        return [], 0, pd.DataFrame(columns=["data", "conta", "saldo"])
+    if referencia is None:
+        referencia = postings["data"].max()
+
+    series = detect_recurring(transaction_frame(postings), referencia)
+    previsoes = forecast(series, referencia, horizonte_meses)
+    saldos = projected_daily_balances(
+        daily_balances(postings), previsoes, referencia, horizonte_meses
+    )
+    logger.info(
+        "Projeção: %d séries recorrentes, %d previsões até %s",
+        len(series),
+        len(previsoes),
+        (referencia + pd.DateOffset(months=horizonte_meses)).date(),
+    )
+    lines, count = generate_budget_entries(previsoes)
+    return lines, count, saldos
@@ -1,6 +1,7 @@
 import hashlib
 import re
 
+import numpy as np
 import pandas as pd
 
 
@@ -26,16 +27,23 @@ ACCOUNTS_TYPE = {
     "LatamPass": "Liabilities",
 }
 
+CENTS_COLUMN = "valor_centavos"
+
+PAGAMENTO_KEYWORDS_RE = re.compile(r"pagamento|fatura|invoice|payment")
+
+
+_ACCENTED = "áàâãéèêíïóôõúüñçÁÀÂÃÉÈÊÍÏÓÔÕÚÜÑÇ"
+_PLAIN = "aaaaeeeiiooouuncAAAAEEIIIOOOUU"
+# zip() trunca no menor: Ñ e Ç não têm par e são removidos pela regex
+_ACCENT_TABLE = str.maketrans(dict(zip(_ACCENTED, _PLAIN)))
+_NAME_INVALID_RE = re.compile(r"[^a-zA-Z0-9\s]")
+_DESCRIPTION_TABLE = str.maketrans({'"': "'", "\n": " ", "\r": " "})
+
 
 def sanitize_name(name: str) -> str:
     if pd.isna(name):
         return "Unknown"
-    name = str(name).strip()
-    accented = "áàâãéèêíïóôõúüñçÁÀÂÃÉÈÊÍÏÓÔÕÚÜÑÇ"
-    plain = "aaaaeeeiiooouuncAAAAEEIIIOOOUU"
-    for a, p in zip(accented, plain):
-        name = name.replace(a, p)
-    name = re.sub(r"[^a-zA-Z0-9\s]", "", name)
+    name = _NAME_INVALID_RE.sub("", str(name).strip().translate(_ACCENT_TABLE))
     words = name.split()
     return "".join(word.capitalize() for word in words) if words else "Unknown"
 
@@ -43,10 +51,71 @@ def sanitize_name(name: str) -> str:
 def sanitize_description(desc: str) -> str:
     if pd.isna(desc):
         return "Sem descricao"
-    desc = str(desc).strip().replace('"', "'").replace("\n", " ").replace("\r", " ")
+    desc = str(desc).strip().translate(_DESCRIPTION_TABLE)
     return desc[:57] + "..." if len(desc) > 60 else desc
 
 
+def _map_unique(values, func, missing: str) -> pd.Series:
+    values = pd.Series(values)
+    codes, uniques = pd.factorize(values)
+    mapped = np.array([func(v) for v in uniques] + [missing], dtype=object)
+    return pd.Series(mapped[codes], index=values.index, dtype=object)
+
+
+def sanitize_names(values) -> pd.Series:
+    """sanitize_name() aplicada a uma coluna, uma vez por valor distinto."""
+    return _map_unique(values, sanitize_name, "Unknown")
+
+
+def sanitize_descriptions(values) -> pd.Series:
+    """sanitize_description() aplicada a uma coluna, uma vez por valor distinto."""
+    return _map_unique(values, sanitize_description, "Sem descricao")
+
+
+def add_cents_column(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normaliza Valor para centavos inteiros (int64) na coluna valor_centavos.
+
+    Deve ser chamado uma vez na carga; matching, agrupamento e somas usam
+    a coluna inteira e a formatação decimal fica apenas na renderização.
+    Handlers e demais módulos exigem a coluna e não a recriam.
+    """
+    if CENTS_COLUMN in df.columns:
+        return df
+    valores = pd.to_numeric(df["Valor"], errors="coerce").abs()
+    cents = (valores * 100).round().fillna(0).astype("int64")
+    return df.assign(**{CENTS_COLUMN: cents})
+
+
+def format_cents(cents: int) -> str:
+    """Formata centavos inteiros como decimal Beancount (ex: -1234 -> -12.34)."""
+    cents = int(cents)
+    sign = "-" if cents < 0 else ""
+    reais, resto = divmod(abs(cents), 100)
+    return f"{sign}{reais}.{resto:02d}"
+
+
+def format_cents_array(cents) -> np.ndarray:
+    """Versão vetorizada de format_cents para um array de centavos."""
+    cents = np.asarray(cents, dtype=np.int64)
+    reais, resto = np.divmod(np.abs(cents), 100)
+    sign = np.where(cents < 0, "-", "")
+    text = (
+        pd.Series(sign, dtype=object)
+        + pd.Series(reais).astype(str).to_numpy(dtype=object)
+        + "."
+        + pd.Series(resto).astype(str).str.zfill(2).to_numpy(dtype=object)
+    )
+    return text.to_numpy(dtype=object)
+
+
+def lower_column(df: pd.DataFrame, column: str) -> pd.Series:
+    """Retorna a coluna como texto minúsculo; NaN e coluna ausente viram ""."""
+    if column not in df.columns:
+        return pd.Series("", index=df.index, dtype=str)
+    return df[column].fillna("").astype(str).str.lower()
+
+
 def get_account_path(conta: str) -> str:
     account_type = ACCOUNTS_TYPE.get(conta, "Assets")
     if account_type == "Liabilities":
@@ -75,33 +144,68 @@ def generate_pair_id(row1_idx: int, row2_idx: int) -> str:
     return hashlib.sha256(combined.encode()).hexdigest()[:16]
 
 
-def extract_accounts_from_df(df: pd.DataFrame) -> tuple[set, set]:
+def generate_chain_id(indices: list[int]) -> str:
+    combined = "_".join(str(idx) for idx in sorted(indices))
+    return hashlib.sha256(combined.encode()).hexdigest()[:16]
+
+
+# Categorias que não viram contas Expenses/Income. Não é a lista de
+# candidatos a transferência (regra transferencia_categoria em
+# config/regras_classificacao.yaml), que também inclui "outros".
+CATEGORIAS_SEM_CONTA = {"transferencias", "transferência", "pagamento de fatura"}
+
+
+def extract_accounts_from_df(df: pd.DataFrame, return_counts: bool = False):
+    """
+    Extrai contas bancárias (Assets) e cartões (Liabilities) do DataFrame.
+
+    Returns:
+        Tuple (bank_accounts, credit_cards); com return_counts=True inclui
+        um terceiro item {conta: número de lançamentos}
+    """
     bank_accounts, credit_cards = set(), set()
-    for _, row in df.iterrows():
-        conta = row.get("CONTA")
-        if pd.notna(conta):
+    counts: dict[str, int] = {}
+
+    if "CONTA" in df.columns:
+        for conta, n in df["CONTA"].value_counts(sort=False).items():
             acc_type = ACCOUNTS_TYPE.get(conta, "Assets")
             (bank_accounts if acc_type == "Assets" else credit_cards).add(conta)
+            counts[conta] = int(n)
+
+    if return_counts:
+        return bank_accounts, credit_cards, counts
     return bank_accounts, credit_cards
 
 
-def extract_categories_from_df(df: pd.DataFrame) -> tuple[set, set]:
+def extract_categories_from_df(df: pd.DataFrame, return_counts: bool = False):
+    """
+    Extrai categorias de despesa (D) e receita (R), sem as de transferência.
+
+    Returns:
+        Tuple (expense_categories, income_categories); com return_counts=True
+        inclui um terceiro item {"Expenses:<cat>" | "Income:<cat>": lançamentos}
+    """
     expense_categories = set()
     income_categories = set()
+    counts: dict[str, int] = {}
 
-    for _, row in df.iterrows():
-        categoria = row.get("Categoria")
-        dr = row.get("D/R")
-        if pd.notna(categoria):
-            clean_cat = sanitize_name(categoria)
-            cat_lower = str(categoria).lower()
+    if "Categoria" in df.columns:
+        dr = df["D/R"] if "D/R" in df.columns else pd.Series(None, index=df.index)
+        is_income = dr.eq("R").rename("receita")
+        pairs = pd.concat([df["Categoria"], is_income], axis=1).value_counts(sort=False)
 
-            if cat_lower in ["transferencias", "transferência", "pagamento de fatura"]:
+        for (categoria, receita), n in pairs.items():
+            if str(categoria).lower() in CATEGORIAS_SEM_CONTA:
                 continue
-
-            if dr == "R":
+            clean_cat = sanitize_name(categoria)
+            if receita:
                 income_categories.add(clean_cat)
+                key = f"Income:{clean_cat}"
             else:
                 expense_categories.add(clean_cat)
+                key = f"Expenses:{clean_cat}"
+            counts[key] = counts.get(key, 0) + int(n)
 
+    if return_counts:
+        return expense_categories, income_categories, counts
     return expense_categories, income_categories
@@ -11,26 +11,43 @@ c) Transferência: D + R pareado por valor (±1 dia) → Asset- / Asset+
 d) Pagamento cartão: D com Categoria="Outros" + descrição com "pagamento/fatura" → Liabilities:+ / Asset:-
 """
 
+import argparse
 import logging
 from pathlib import Path
 
 import pandas as pd
 
+import balance_assertions
+import card_cycles
 import card_payments_handler
+import classification_rules
 import expenses_handler
+import explain
 import incomes_handler
+import liquidity_projection
+import orphan_reconciliation
+import pending_reconciliation
+import pendencias_store
+import scheduled_settlement
+import transfer_cache
+import transfer_chains
 import transfers_handler
 from organizze_shared import (
+    CENTS_COLUMN,
+    add_cents_column,
     extract_accounts_from_df,
     extract_categories_from_df,
     sanitize_description,
-    sanitize_name,
 )
 
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 logger = logging.getLogger(__name__)
 
+PROJECT_DIR = Path(__file__).parent.parent
+DEFAULT_INPUT = PROJECT_DIR / "data" / "unificado_dr_ordenado.xlsx"
+DEFAULT_LEDGER = PROJECT_DIR / "ledger"
+
 
 def generate_accounts_file(
     bank_accounts: set,
@@ -99,18 +116,18 @@ def generate_saldo_inicial_entries(df: pd.DataFrame) -> tuple[list[str], int]:
             continue
 
         date = row["Data"].strftime("%Y-%m-%d")
-        value = abs(row["Valor"])
+        centavos = int(row[CENTS_COLUMN])
         conta = row.get("CONTA", "")
         status = row.get("Situação", "Pago")
         flag = "*" if status == "Pago" else "!"
 
-        from organizze_shared import get_account_path
+        from organizze_shared import format_cents, get_account_path
 
         debit = get_account_path(conta)
 
         lines.append(f'{date} {flag} "{desc}"')
-        lines.append(f"  {debit:40s} {value:>10.2f} BRL")
-        lines.append(f"  Equity:SaldoInicial {-value:>10.2f} BRL")
+        lines.append(f"  {debit:40s} {format_cents(centavos):>10} BRL")
+        lines.append(f"  Equity:SaldoInicial {format_cents(-centavos):>10} BRL")
         lines.append('  origem_id: "saldo_inicial"')
         lines.append("")
         count += 1
@@ -118,39 +135,296 @@ def generate_saldo_inicial_entries(df: pd.DataFrame) -> tuple[list[str], int]:
     return lines, count
 
 
-def main():
-    project_dir = Path(__file__).parent.parent
-    data_dir = project_dir / "data"
-    ledger_dir = project_dir / "ledger"
+def read_export(path: Path) -> pd.DataFrame:
+    """Lê a exportação do Organizze conforme a extensão (.xlsx, .csv, .parquet)."""
+    if path.suffix == ".csv":
+        return pd.read_csv(path, parse_dates=["Data"])
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    return pd.read_excel(path)
+
+
+def artifact_path(input_file: Path, nome: str) -> Path:
+    """
+    Caminho de um artefato de estado (cache de pares, explain) da entrada.
+
+    A entrada padrão mantém os nomes em data/; outras entradas ganham o nome
+    do arquivo como prefixo, sem sobrescrever o estado da entrada real.
+    """
+    if input_file == DEFAULT_INPUT:
+        return input_file.parent / nome
+    return input_file.with_name(f"{input_file.stem}.{nome}")
+
+
+def _rule_names(df: pd.DataFrame, indices: list[int], tipo: str) -> list[str]:
+    """Nome da regra (do tipo) que selecionou cada linha."""
+    regras = classification_rules.classify(df.loc[indices], {tipo})["regra"]
+    return [f"regra:{r}" for r in regras]
+
+
+def record_explain(
+    df: pd.DataFrame,
+    chains: list[dict],
+    relaxed_pairs: list[dict],
+    transfer_pairs: list[tuple[int, int]],
+    cached_pairs: list[tuple[int, int]],
+    transfer_orphans: list[dict],
+    conciliados: dict[int, dict],
+    resolved_payments: dict[int, str],
+    cartao_expense_indices: set[int],
+    boleto_indices: set[int],
+    excluded_indices: set[int],
+) -> explain.ExplainLog:
+    """Registra quem decidiu cada linha, na mesma ordem em que as entradas saem."""
+    log = explain.ExplainLog(len(df))
+
+    for chain in chains:
+        log.record(
+            chain["indices"],
+            "cadeia_transferencia",
+            "transfer_chains",
+            debug_motivo=f"cadeia: {' -> '.join(chain['contas'])}",
+        )
+
+    for pair in relaxed_pairs:
+        log.record(
+            [pair["debito"], pair["credito"]],
+            "transferencia_relaxada",
+            "orphan_reconciliation",
+            contraparte=[pair["credito"], pair["debito"]],
+            debug_motivo=f"score={pair['score']:.2f}",
+        )
+
+    cached = set(cached_pairs)
+    saque = classification_rules.tipo_mask(df, "saque_atm")
+    for d_idx, c_idx in transfer_pairs:
+        log.record(
+            [d_idx, c_idx],
+            "saque_atm" if saque[d_idx] else "transferencia",
+            "transfer_cache" if (d_idx, c_idx) in cached else "pair_transfers",
+            contraparte=[c_idx, d_idx],
+        )
+
+    for orphan in transfer_orphans:
+        log.record(
+            [orphan["idx"]],
+            orphan.get("tipo") or "transferencia_orfa",
+            "identify_transfers",
+            debug_motivo=orphan.get("debug_motivo"),
+        )
+
+    log.record(
+        list(conciliados),
+        "transferencia_conciliada",
+        "pending_reconciliation",
+        debug_motivo=[
+            f"conciliacao: {c['id']} -> {c['contraparte']}"
+            for c in conciliados.values()
+        ],
+    )
+
+    payment_indices = list(resolved_payments)
+    log.record(
+        payment_indices,
+        "pagamento_cartao",
+        _rule_names(df, payment_indices, "pagamento_cartao"),
+        debug_motivo=[f"cartao={c}" for c in resolved_payments.values()],
+    )
+
+    for tipo, indices in (
+        ("despesa_cartao", sorted(cartao_expense_indices)),
+        ("boleto", sorted(boleto_indices)),
+    ):
+        log.record(indices, tipo, _rule_names(df, indices, tipo))
+
+    livre = ~df.index.isin(list(excluded_indices))
+    log.record(df.index[livre & df["D/R"].eq("D")], "despesa", "expenses_handler")
+    log.record(df.index[livre & df["D/R"].eq("R")], "receita", "incomes_handler")
+    log.record(df.index, "nao_importado", "organizze_v5")
+
+    return log
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Importa o arquivo unificado do Organizze para Beancount"
+    )
+    parser.add_argument(
+        "--detectar-cadeias",
+        action="store_true",
+        help="Detecta e reporta cadeias de transferência (A -> B -> C)",
+    )
+    parser.add_argument(
+        "--colapsar-cadeias",
+        action="store_true",
+        help="Gera uma única entrada multi-posting por cadeia de transferência",
+    )
+    parser.add_argument(
+        "--reconciliar-orfaos",
+        action="store_true",
+        help="Segundo passe relaxado (dia, valor) para transferências órfãs",
+    )
+    parser.add_argument(
+        "--limiar-reconciliacao",
+        type=float,
+        default=orphan_reconciliation.LIMIAR_ACEITE,
+        help="Score mínimo para aceitar um par no passe relaxado",
+    )
+    parser.add_argument(
+        "--sem-cache-pares",
+        action="store_true",
+        help="Ignora o cache de pares de transferência e refaz todo o matching",
+    )
+    parser.add_argument(
+        "--max-orfaos-log",
+        type=int,
+        default=transfers_handler.MAX_ORFAOS_LOG,
+        help="Máximo de órfãos, cadeias e candidatos detalhados no log (0 = só o resumo)",
+    )
+    parser.add_argument(
+        "--orfaos-arquivo",
+        type=Path,
+        help="Grava a lista completa de transferências órfãs neste CSV",
+    )
+    parser.add_argument(
+        "--horizonte-meses",
+        type=int,
+        default=liquidity_projection.HORIZONTE_MESES,
+        help="Meses de lançamentos recorrentes projetados em budget.beancount",
+    )
+    parser.add_argument(
+        "--entrada",
+        type=Path,
+        default=DEFAULT_INPUT,
+        help="Exportação do Organizze (.xlsx, .csv ou .parquet)",
+    )
+    parser.add_argument(
+        "--ledger",
+        type=Path,
+        default=DEFAULT_LEDGER,
+        help="Diretório onde os arquivos .beancount são gerados",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None):
+    args = parse_args(argv)
+
+    input_file = args.entrada
+    ledger_dir = args.ledger
+    ledger_dir.mkdir(parents=True, exist_ok=True)
 
-    input_file = data_dir / "unificado_dr_ordenado.xlsx"
     if not input_file.exists():
-        logger.error(f"Arquivo não encontrado: {input_file}")
+        logger.error("Arquivo não encontrado: %s", input_file)
         return
 
     logger.info("Iniciando importação Organizze -> Beancount v5")
 
-    df = pd.read_excel(input_file)
+    df = read_export(input_file)
     df["Data"] = pd.to_datetime(df["Data"])
-    df = df.sort_values(["Data", "Valor"]).reset_index(drop=True)
+    df = df.sort_values(["Data", "Valor"], kind="stable").reset_index(drop=True)
+    df = add_cents_column(df)
 
-    logger.info(f"Total de lançamentos: {len(df)}")
+    # Agendados liquidados por pagamentos de importações anteriores
+    store = pendencias_store.open_store(artifact_path(input_file, "pendencias.sqlite"))
+    fingerprints = transfer_cache.compute_row_fingerprints(df)
+    df, fingerprints = scheduled_settlement.apply_settlements(store, df, fingerprints)
 
-    bank_accounts, credit_cards = extract_accounts_from_df(df)
-    logger.info(f"Contas: {len(bank_accounts)} bancárias, {len(credit_cards)} cartões")
+    logger.info("Total de lançamentos: %d", len(df))
+
+    bank_accounts, credit_cards, account_counts = extract_accounts_from_df(
+        df, return_counts=True
+    )
+    logger.info(
+        "Contas: %d bancárias, %d cartões", len(bank_accounts), len(credit_cards)
+    )
+    logger.debug("Lançamentos por conta: %s", account_counts)
 
     # 1. Primeiro: identificar pagamentos de cartão (para isolar primeiro)
     pagto_cartao_indices = card_payments_handler.identify_card_payment_indices(df)
 
     # 2. Segundo: identificar transferências (deve rodar antes de receita/despesa)
-    processed_transfers, transfer_orphans = transfers_handler.identify_transfers(
+    candidates, _ = transfers_handler.split_transfer_candidates(
         df, pagto_cartao_indices
     )
 
+    # Pares confirmados em execuções anteriores não passam pelo matching de
+    # novo, desde que as duas pernas ainda sejam candidatas a transferência
+    cache_file = artifact_path(input_file, "transfer_pairs_cache.json")
+    cached_pairs = []
+    if not args.sem_cache_pares:
+        cached_pairs = transfer_cache.resolve_cached_pairs(
+            transfer_cache.load_pair_cache(cache_file),
+            fingerprints,
+            set(candidates),
+        )
+    cached_indices = {idx for pair in cached_pairs for idx in pair}
+
+    processed_transfers, transfer_orphans = transfers_handler.identify_transfers(
+        df, pagto_cartao_indices, cached_indices, args.max_orfaos_log
+    )
+    transfer_pairs = cached_pairs + transfers_handler.pair_transfers(
+        df, processed_transfers
+    )
+    transfer_pairs.sort(key=lambda p: (df.at[p[0], "Data"], df.at[p[0], CENTS_COLUMN]))
+    processed_transfers |= cached_indices
+
+    transfer_cache.save_pair_cache(
+        cache_file, transfer_cache.pairs_to_fingerprints(transfer_pairs, fingerprints)
+    )
+
     # Usar índices de transferência E órfãos como exclusão base
     orphan_indices = {o["idx"] for o in transfer_orphans}
     excluded_indices = pagto_cartao_indices | processed_transfers | orphan_indices
 
+    # Pernas soltas: órfãos de transferência e candidatos sem contraparte no dia
+    # (o passe relaxado só pareia as de categoria de transferência)
+    unpaired = [idx for idx in candidates if idx not in excluded_indices]
+
+    relaxed_pairs = []
+    if args.reconciliar_orfaos:
+        loose = [o["idx"] for o in transfer_orphans if not o.get("tipo")] + unpaired
+        relaxed_pairs, _ = orphan_reconciliation.reconcile_orphans(
+            df, loose, args.limiar_reconciliacao, args.max_orfaos_log
+        )
+        relaxed_indices = {
+            idx for pair in relaxed_pairs for idx in (pair["debito"], pair["credito"])
+        }
+        transfer_orphans = [
+            o for o in transfer_orphans if o["idx"] not in relaxed_indices
+        ]
+        unpaired = [idx for idx in unpaired if idx not in relaxed_indices]
+        excluded_indices |= relaxed_indices
+
+    chains = []
+    if args.detectar_cadeias or args.colapsar_cadeias:
+        chains = transfer_chains.find_transfer_chains(
+            df,
+            transfer_pairs,
+            transfer_orphans,
+            unpaired,
+            max_detalhes=args.max_orfaos_log,
+        )
+
+    if args.colapsar_cadeias:
+        chain_indices = {idx for chain in chains for idx in chain["indices"]}
+        transfer_pairs = [(d, c) for d, c in transfer_pairs if d not in chain_indices]
+        transfer_orphans = [
+            o for o in transfer_orphans if o["idx"] not in chain_indices
+        ]
+        excluded_indices |= chain_indices
+    else:
+        chains = []
+
+    # Órfãs cuja perna oposta chegou (ou já tinha chegado) por OFX
+    conciliados = pending_reconciliation.reconcile_organizze_orphans(
+        store, df, transfer_orphans, fingerprints, ledger_dir / "imports.beancount"
+    )
+    transfer_orphans = [o for o in transfer_orphans if o["idx"] not in conciliados]
+
+    if args.orfaos_arquivo:
+        transfers_handler.write_orphans_file(transfer_orphans, args.orfaos_arquivo)
+
     # 3. Terceiro: identificar outros casos especiais
     cartao_expense_indices = expenses_handler.identify_cartao_expense_indices(df)
     boleto_indices = expenses_handler.identify_boleto_indices(df)
@@ -187,8 +461,18 @@ def main():
 
     total_count = 0
 
+    chain_lines, chain_count = transfer_chains.generate_chain_entries(df, chains)
+    lines.extend(chain_lines)
+    total_count += chain_count
+
+    relaxed_lines, relaxed_count = orphan_reconciliation.generate_relaxed_pair_entries(
+        df, relaxed_pairs
+    )
+    lines.extend(relaxed_lines)
+    total_count += relaxed_count
+
     transfer_lines, transfer_count = transfers_handler.generate_transfer_entries(
-        df, processed_transfers
+        df, processed_transfers, transfer_pairs
     )
     lines.extend(transfer_lines)
     total_count += transfer_count
@@ -199,9 +483,18 @@ def main():
     lines.extend(orphan_lines)
     total_count += orphan_count
 
-    pagto_lines, pagto_count = card_payments_handler.generate_card_payment_entries(
+    reconciled_lines, reconciled_count = (
+        pending_reconciliation.generate_reconciled_entries(list(conciliados.values()))
+    )
+    lines.extend(reconciled_lines)
+    total_count += reconciled_count
+
+    resolved_payments = card_payments_handler.resolve_card_payments(
         df, pagto_cartao_indices
     )
+    pagto_lines, pagto_count = card_payments_handler.generate_card_payment_entries(
+        df, pagto_cartao_indices, resolved_payments
+    )
     lines.extend(pagto_lines)
     total_count += pagto_count
 
@@ -235,7 +528,97 @@ def main():
     with open(ledger_dir / "history.beancount", "w") as f:
         f.write("\n".join(lines))
 
-    logger.info(f"Total de lançamentos: {total_count}")
+    explain_log = record_explain(
+        df,
+        chains,
+        relaxed_pairs,
+        transfer_pairs,
+        cached_pairs,
+        transfer_orphans,
+        conciliados,
+        resolved_payments,
+        cartao_expense_indices,
+        boleto_indices,
+        excluded_indices,
+    )
+    explain.write_explain(
+        explain_log.to_frame(df), artifact_path(input_file, "explain.parquet")
+    )
+
+    pendencias_store.sync_source(
+        store,
+        "organizze",
+        pendencias_store.organizze_pendencias(
+            df, explain_log.classificacao, fingerprints
+        ),
+    )
+    store.close()
+
+    # Saldos esperados direto da exportação (não do texto gerado acima) +
+    # importações OFX já lançadas, inclusive as pernas OFX conciliadas
+    ledger_text = "\n".join(lines)
+    esperado = [
+        balance_assertions.expected_postings(df, resolved_payments),
+        pending_reconciliation.ofx_leg_postings(list(conciliados.values())),
+    ]
+    imports_path = ledger_dir / "imports.beancount"
+    if imports_path.exists():
+        imports_text = imports_path.read_text(encoding="utf-8")
+        ledger_text += "\n" + imports_text
+        esperado.append(balance_assertions.postings_frame(imports_text))
+    colunas = ["data", "conta", "centavos"]
+    esperado = pd.concat([p[colunas] for p in esperado], ignore_index=True)
+
+    # Asserções de fatura sobre o mesmo saldo esperado dos cartões
+    statements = card_cycles.compute_cycle_statements(df, resolved_payments)
+    cycle_lines, cycle_count = card_cycles.generate_cycle_entries(statements, esperado)
+    with open(ledger_dir / "ciclos_cartoes.beancount", "w") as f:
+        f.write(
+            "\n".join(
+                [
+                    "; Ciclos de fatura - Auto-generated by organizze_v5.py",
+                    "; DO NOT EDIT MANUALLY",
+                    "",
+                ]
+                + cycle_lines
+            )
+        )
+    logger.info("Asserções de fatura: %d", cycle_count)
+
+    balance_lines, balance_count = balance_assertions.build_balance_entries(esperado)
+    with open(ledger_dir / "balances.beancount", "w") as f:
+        f.write(
+            "\n".join(
+                [
+                    "; Saldos mensais - Auto-generated by organizze_v5.py",
+                    "; DO NOT EDIT MANUALLY",
+                    "",
+                ]
+                + balance_lines
+            )
+        )
+    logger.info("Asserções de saldo: %d", balance_count)
+
+    budget_lines, budget_count, saldos_projetados = (
+        liquidity_projection.build_projection(ledger_text, args.horizonte_meses)
+    )
+    with open(ledger_dir / "budget.beancount", "w") as f:
+        f.write(
+            "\n".join(
+                [
+                    "; Projeções recorrentes - Auto-generated by organizze_v5.py",
+                    "; DO NOT EDIT MANUALLY",
+                    "",
+                ]
+                + budget_lines
+            )
+        )
+    liquidity_projection.write_projected_balances(
+        saldos_projetados, artifact_path(input_file, "liquidez_projetada.csv")
+    )
+    logger.info("Lançamentos projetados: %d", budget_count)
+
+    logger.info("Total de lançamentos: %d", total_count)
     logger.info("Concluído! Execute: bean-check ledger/main.beancount")
 
 
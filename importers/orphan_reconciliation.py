@@ -0,0 +1,223 @@
+"""
+Segundo passe de reconciliação de transferências órfãs.
+
+Responsabilidades:
+- Indexar pernas soltas numa grade 2-D (dia, centavos)
+- Sugerir contrapartes próximas com score para cada perna
+- Aceitar automaticamente pares acima do limiar e reportar o restante
+- Gerar entradas Beancount para os pares aceitos
+
+Só entram pernas com categoria de transferência nas duas pontas: a regra
+de candidatos também aceita "Outros", que no Organizze são despesas e
+receitas comuns e gerariam pares falsos com a janela relaxada.
+
+A diferença de valor aceita é o menor entre TOLERANCIA_CENTAVOS e
+TOLERANCIA_RELATIVA do valor do débito.
+
+Cada célula da grade tem JANELA_DIAS x TOLERANCIA_CENTAVOS; uma perna só
+compara com as 9 células vizinhas, então o custo é linear no número de
+pernas (não há varredura quadrática).
+"""
+
+import logging
+from collections import defaultdict
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from entry_renderer import (
+    entry_accounts,
+    entry_dates,
+    entry_descriptions,
+    render_postings,
+)
+from organizze_shared import CENTS_COLUMN, format_cents, generate_pair_id
+from transfers_handler import MAX_ORFAOS_LOG, sample_orphans
+
+
+logger = logging.getLogger(__name__)
+
+JANELA_DIAS = 5
+TOLERANCIA_CENTAVOS = 500
+TOLERANCIA_RELATIVA = 0.02
+LIMIAR_ACEITE = 0.8
+MAX_CANDIDATOS = 3
+CATEGORIAS_TRANSFERENCIA = {"transferência", "transferências", "pagamento de fatura"}
+
+
+def transfer_legs(df: pd.DataFrame, indices: list[int]) -> list[int]:
+    """Índices cuja Categoria é de transferência (sem "Outros")."""
+    if "Categoria" not in df.columns:
+        return []
+    categorias = df.loc[indices, "Categoria"].fillna("").astype(str)
+    categorias = categorias.str.strip().str.lower()
+    return categorias.index[categorias.isin(CATEGORIAS_TRANSFERENCIA)].tolist()
+
+
+def _score(dias: int, diferenca: int, janela_dias: int, tolerancia: int) -> float:
+    return 1.0 - 0.5 * dias / janela_dias - 0.5 * diferenca / tolerancia
+
+
+def find_counterpart_candidates(
+    df: pd.DataFrame,
+    indices: list[int],
+    janela_dias: int = JANELA_DIAS,
+    tolerancia_centavos: int = TOLERANCIA_CENTAVOS,
+    max_candidatos: int = MAX_CANDIDATOS,
+) -> dict[int, list[dict[str, Any]]]:
+    """
+    Busca contrapartes (D <-> R, contas diferentes) para cada perna solta
+    com categoria de transferência.
+
+    Returns:
+        Dict idx -> candidatos ordenados por score decrescente
+    """
+    legs = df.loc[transfer_legs(df, indices), ["CONTA", "D/R", CENTS_COLUMN, "Data"]]
+    dias = legs["Data"].map(lambda d: d.toordinal())
+
+    grid: dict[tuple, list[int]] = defaultdict(list)
+    for idx, dia, centavos, dr in zip(
+        legs.index, dias, legs[CENTS_COLUMN], legs["D/R"]
+    ):
+        if dr == "R":
+            cell = (dia // janela_dias, centavos // tolerancia_centavos)
+            grid[cell].append(idx)
+
+    candidates: dict[int, list[dict[str, Any]]] = {}
+    for idx, dia, centavos, dr, conta in zip(
+        legs.index, dias, legs[CENTS_COLUMN], legs["D/R"], legs["CONTA"]
+    ):
+        if dr != "D":
+            continue
+
+        cell_dia = dia // janela_dias
+        cell_centavos = centavos // tolerancia_centavos
+        max_diferenca = min(tolerancia_centavos, TOLERANCIA_RELATIVA * centavos)
+        found = []
+        for di in (-1, 0, 1):
+            for ci in (-1, 0, 1):
+                for cand in grid.get((cell_dia + di, cell_centavos + ci), ()):
+                    if legs.at[cand, "CONTA"] == conta:
+                        continue
+                    delta_dias = abs(dias.at[cand] - dia)
+                    diferenca = abs(int(legs.at[cand, CENTS_COLUMN]) - centavos)
+                    if delta_dias > janela_dias or diferenca > max_diferenca:
+                        continue
+                    found.append(
+                        {
+                            "debito": idx,
+                            "credito": cand,
+                            "dias": delta_dias,
+                            "diferenca_centavos": diferenca,
+                            "score": _score(
+                                delta_dias,
+                                diferenca,
+                                janela_dias,
+                                tolerancia_centavos,
+                            ),
+                        }
+                    )
+        if found:
+            found.sort(key=lambda c: (-c["score"], c["credito"]))
+            candidates[idx] = found[:max_candidatos]
+
+    return candidates
+
+
+def reconcile_orphans(
+    df: pd.DataFrame,
+    indices: list[int],
+    limiar: float = LIMIAR_ACEITE,
+    max_detalhes: int = MAX_ORFAOS_LOG,
+    **kwargs,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """
+    Aceita automaticamente os melhores pares acima do limiar.
+
+    Returns:
+        Tuple de (pares_aceitos, pendentes); pendentes trazem os candidatos
+        abaixo do limiar para revisão manual
+    """
+    candidates = find_counterpart_candidates(df, indices, **kwargs)
+
+    ranked = sorted(
+        (c for cands in candidates.values() for c in cands),
+        key=lambda c: (-c["score"], c["debito"], c["credito"]),
+    )
+
+    used: set[int] = set()
+    accepted = []
+    for cand in ranked:
+        if cand["score"] < limiar:
+            break
+        if cand["debito"] in used or cand["credito"] in used:
+            continue
+        used.add(cand["debito"])
+        used.add(cand["credito"])
+        accepted.append(cand)
+
+    pending = []
+    for idx, cands in candidates.items():
+        if idx in used:
+            continue
+        remaining = [c for c in cands if c["credito"] not in used]
+        if remaining:
+            pending.append({"idx": idx, "candidatos": remaining})
+
+    logger.info("Reconciliação relaxada: %d pares aceitos", len(accepted))
+    logger.info(
+        "Reconciliação relaxada: %d órfãos com candidatos abaixo do limiar",
+        len(pending),
+    )
+    amostra = sample_orphans(pending, max_detalhes)
+    for item in amostra:
+        best = item["candidatos"][0]
+        logger.debug(
+            "Candidato: %s <-> %s | score=%.2f | dias=%s | diferença=%s",
+            item["idx"],
+            best["credito"],
+            best["score"],
+            best["dias"],
+            format_cents(best["diferenca_centavos"]),
+        )
+    if len(amostra) < len(pending):
+        logger.debug("... mais %d candidatos omitidos", len(pending) - len(amostra))
+
+    accepted.sort(key=lambda c: (df.at[c["debito"], "Data"], c["debito"]))
+    return accepted, pending
+
+
+def generate_relaxed_pair_entries(
+    df: pd.DataFrame,
+    accepted: list[dict[str, Any]],
+) -> tuple[list[str], int]:
+    """
+    Gera entradas Beancount para pares aceitos no passe relaxado.
+
+    Diferença de valor entre as pernas vai para Equity:Ajustes.
+    """
+    d_rows = df.loc[[pair["debito"] for pair in accepted]]
+    c_rows = df.loc[[pair["credito"] for pair in accepted]]
+    debito = d_rows[CENTS_COLUMN].to_numpy()
+    credito = c_rows[CENTS_COLUMN].to_numpy()
+    diferenca = debito - credito
+
+    lines = render_postings(
+        entry_dates(d_rows),
+        "*",
+        entry_descriptions(d_rows),
+        [
+            (entry_accounts(d_rows), -debito),
+            (entry_accounts(c_rows), credito),
+            (np.where(diferenca != 0, "Equity:Ajustes", ""), diferenca),
+        ],
+        {
+            "origem_id": [
+                f"transfer_relaxado:{generate_pair_id(p['debito'], p['credito'])}"
+                for p in accepted
+            ],
+            "score": [f"{p['score']:.2f}" for p in accepted],
+        },
+    )
+    return lines, len(accepted)
@@ -0,0 +1,424 @@
+"""
+Relatório materializado de pendências (SQLite local).
+
+Responsabilidades:
+- Manter a tabela de pendências: lançamentos agendados ("!") e pernas em
+  Equity:TransferenciasPendentes, sem rodar a query no ledger inteiro
+- Sincronizar as pendências do Organizze a cada importação (o history é
+  regenerado por completo: o que sumiu foi conciliado)
+- Acrescentar as pendências emitidas pelo smart_ofx_importer e removê-las
+  quando conciliadas
+- Listar as pendências instantaneamente (CLI e list_pendencias)
+- Buscar a perna oposta de uma transferência pendente pelo índice
+  (motivo, centavos, data) e guardar as conciliações feitas
+- Buscar o agendado aberto de um pagamento pelo índice
+  (motivo, conta, centavos, data), guardar as liquidações e as linhas do
+  Organizze já vistas (cada execução só confere as linhas novas)
+- Guardar os agendados liquidados por uma linha paga de descrição e
+  categoria diferentes (liquidacao_a_conferir), para revisão
+
+Cada pendência tem um id estável: "organizze:<fingerprint da linha>" ou
+"ofx:<FITID>". centavos é o valor com sinal na conta de origem.
+
+Uso:
+    python importers/pendencias_store.py
+    python importers/pendencias_store.py --motivo transferencia_pendente
+"""
+
+import argparse
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from organizze_shared import CENTS_COLUMN, get_account_path
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = Path(__file__).parent.parent / "data" / "pendencias.sqlite"
+
+MOTIVO_AGENDADO = "agendado"
+MOTIVO_TRANSFERENCIA = "transferencia_pendente"
+MOTIVO_CONFERIR = "liquidacao_a_conferir"
+
+CAMPOS = ["id", "fonte", "motivo", "data", "conta", "centavos", "descricao"]
+CAMPOS_LIQUIDACAO = ["id", "liquidado_por", "data", "modo"]
+CAMPOS_CONCILIACAO = [
+    "id",
+    "contraparte",
+    "data",
+    "conta_origem",
+    "conta_destino",
+    "centavos",
+    "descricao",
+]
+
+# Classificações (explain) cujas entradas saem sempre com flag "*"
+CLASSIFICACOES_CONFIRMADAS = {
+    "transferencia",
+    "saque_atm",
+    "transferencia_relaxada",
+    "transferencia_orfa",
+    "transferencia_conciliada",
+    "saldo_inicial",
+    "ajuste",
+    "nao_importado",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pendencias (
+    id TEXT PRIMARY KEY,
+    fonte TEXT NOT NULL,
+    motivo TEXT NOT NULL,
+    data TEXT NOT NULL,
+    conta TEXT NOT NULL,
+    centavos INTEGER NOT NULL,
+    descricao TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS pendencias_busca
+    ON pendencias (motivo, centavos, data);
+CREATE INDEX IF NOT EXISTS pendencias_conta
+    ON pendencias (motivo, conta, centavos, data);
+CREATE INDEX IF NOT EXISTS pendencias_fonte ON pendencias (fonte);
+CREATE TABLE IF NOT EXISTS conciliacoes (
+    id TEXT PRIMARY KEY,
+    contraparte TEXT NOT NULL UNIQUE,
+    data TEXT NOT NULL,
+    conta_origem TEXT NOT NULL,
+    conta_destino TEXT NOT NULL,
+    centavos INTEGER NOT NULL,
+    descricao TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS liquidacoes (
+    id TEXT PRIMARY KEY,
+    liquidado_por TEXT NOT NULL,
+    data TEXT NOT NULL,
+    modo TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS linhas_vistas (id TEXT PRIMARY KEY) WITHOUT ROWID;
+"""
+
+
+def open_store(path: Path = DEFAULT_PATH) -> sqlite3.Connection:
+    """Abre (criando se preciso) o banco de pendências."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _rows(items: list[dict[str, Any]]) -> list[tuple]:
+    return [tuple(item.get(campo, "") for campo in CAMPOS) for item in items]
+
+
+def add_items(conn: sqlite3.Connection, items: list[dict[str, Any]]) -> int:
+    """Insere (ou atualiza) pendências. Returns: quantidade gravada."""
+    with conn:
+        conn.executemany(
+            f"INSERT OR REPLACE INTO pendencias ({', '.join(CAMPOS)}) "
+            f"VALUES ({', '.join('?' * len(CAMPOS))})",
+            _rows(items),
+        )
+    return len(items)
+
+
+def remove_items(conn: sqlite3.Connection, ids) -> int:
+    """Remove pendências conciliadas. Returns: quantidade removida."""
+    with conn:
+        cursor = conn.executemany(
+            "DELETE FROM pendencias WHERE id = ?", [(i,) for i in ids]
+        )
+    return cursor.rowcount
+
+
+def sync_source(
+    conn: sqlite3.Connection,
+    fonte: str,
+    items: list[dict[str, Any]],
+) -> tuple[int, int]:
+    """
+    Substitui as pendências de uma fonte pelo conjunto atual.
+
+    Returns:
+        Tuple (novas, removidas)
+    """
+    ids = {item["id"] for item in items}
+    existentes = {
+        row[0]
+        for row in conn.execute("SELECT id FROM pendencias WHERE fonte = ?", (fonte,))
+    }
+    removidas = existentes - ids
+    novas = ids - existentes
+
+    with conn:
+        conn.executemany(
+            "DELETE FROM pendencias WHERE id = ?", [(i,) for i in removidas]
+        )
+        conn.executemany(
+            f"INSERT OR REPLACE INTO pendencias ({', '.join(CAMPOS)}) "
+            f"VALUES ({', '.join('?' * len(CAMPOS))})",
+            _rows(items),
+        )
+    logger.info(
+        "Pendências %s: %d abertas (%d novas, %d conciliadas)",
+        fonte,
+        len(ids),
+        len(novas),
+        len(removidas),
+    )
+    return len(novas), len(removidas)
+
+
+def find_counterpart(
+    conn: sqlite3.Connection,
+    item: dict[str, Any],
+    janela_dias: int,
+    fontes: tuple[str, ...] | None = None,
+) -> dict[str, Any] | None:
+    """
+    Perna oposta aberta de uma transferência pendente, em outra conta.
+
+    Busca pelo índice (motivo, centavos, data): valor oposto e data dentro
+    de janela_dias; entre várias, a de data mais próxima.
+
+    Returns:
+        Pendência encontrada ou None
+    """
+    data = pd.Timestamp(item["data"])
+    query = (
+        f"SELECT {', '.join(CAMPOS)} FROM pendencias "
+        "WHERE motivo = ? AND centavos = ? AND data BETWEEN ? AND ? AND conta != ?"
+    )
+    params = [
+        MOTIVO_TRANSFERENCIA,
+        -item["centavos"],
+        (data - pd.Timedelta(days=janela_dias)).strftime("%Y-%m-%d"),
+        (data + pd.Timedelta(days=janela_dias)).strftime("%Y-%m-%d"),
+        item["conta"],
+    ]
+    if fontes:
+        query += f" AND fonte IN ({', '.join('?' * len(fontes))})"
+        params.extend(fontes)
+    query += " ORDER BY abs(julianday(data) - julianday(?)), id LIMIT 1"
+    params.append(item["data"])
+
+    row = conn.execute(query, params).fetchone()
+    return dict(zip(CAMPOS, row)) if row else None
+
+
+def add_conciliacoes(conn: sqlite3.Connection, rows: list[dict[str, Any]]) -> None:
+    """Grava conciliações (perna de saída, perna de entrada)."""
+    with conn:
+        conn.executemany(
+            f"INSERT OR REPLACE INTO conciliacoes ({', '.join(CAMPOS_CONCILIACAO)}) "
+            f"VALUES ({', '.join('?' * len(CAMPOS_CONCILIACAO))})",
+            [tuple(row[c] for c in CAMPOS_CONCILIACAO) for row in rows],
+        )
+
+
+def load_conciliacoes(conn: sqlite3.Connection) -> dict[str, dict[str, Any]]:
+    """Conciliações indexadas pelo id de cada uma das duas pernas."""
+    result = {}
+    query = f"SELECT {', '.join(CAMPOS_CONCILIACAO)} FROM conciliacoes"
+    for row in conn.execute(query):
+        conciliacao = dict(zip(CAMPOS_CONCILIACAO, row))
+        result[conciliacao["id"]] = conciliacao
+        result[conciliacao["contraparte"]] = conciliacao
+    return result
+
+
+def find_scheduled(
+    conn: sqlite3.Connection,
+    item: dict[str, Any],
+    janela_dias: int,
+    fontes: tuple[str, ...] | None = None,
+) -> dict[str, Any] | None:
+    """
+    Agendado aberto que um pagamento liquida: mesma conta e mesmo valor,
+    vencimento dentro de janela_dias; entre vários, o mais próximo.
+
+    Returns:
+        Pendência encontrada ou None
+    """
+    data = pd.Timestamp(item["data"])
+    query = (
+        f"SELECT {', '.join(CAMPOS)} FROM pendencias "
+        "WHERE motivo = ? AND conta = ? AND centavos = ? AND data BETWEEN ? AND ? "
+        "AND id != ?"
+    )
+    params = [
+        MOTIVO_AGENDADO,
+        item["conta"],
+        item["centavos"],
+        (data - pd.Timedelta(days=janela_dias)).strftime("%Y-%m-%d"),
+        (data + pd.Timedelta(days=janela_dias)).strftime("%Y-%m-%d"),
+        item["id"],
+    ]
+    if fontes:
+        query += f" AND fonte IN ({', '.join('?' * len(fontes))})"
+        params.extend(fontes)
+    query += " ORDER BY abs(julianday(data) - julianday(?)), id LIMIT 1"
+    params.append(item["data"])
+
+    row = conn.execute(query, params).fetchone()
+    return dict(zip(CAMPOS, row)) if row else None
+
+
+def add_liquidacoes(conn: sqlite3.Connection, rows: list[dict[str, Any]]) -> None:
+    """Grava liquidações de agendados (modo "pago", "substituido" ou "conferir")."""
+    with conn:
+        conn.executemany(
+            f"INSERT OR REPLACE INTO liquidacoes ({', '.join(CAMPOS_LIQUIDACAO)}) "
+            f"VALUES ({', '.join('?' * len(CAMPOS_LIQUIDACAO))})",
+            [tuple(row[c] for c in CAMPOS_LIQUIDACAO) for row in rows],
+        )
+
+
+def load_liquidacoes(conn: sqlite3.Connection) -> dict[str, dict[str, Any]]:
+    """Liquidações indexadas pelo id do agendado."""
+    query = f"SELECT {', '.join(CAMPOS_LIQUIDACAO)} FROM liquidacoes"
+    return {row[0]: dict(zip(CAMPOS_LIQUIDACAO, row)) for row in conn.execute(query)}
+
+
+def mark_seen(conn: sqlite3.Connection, ids) -> set[str]:
+    """
+    Registra ids de linhas como vistas.
+
+    Returns:
+        Ids que ainda não tinham sido vistos
+    """
+    vistos = {row[0] for row in conn.execute("SELECT id FROM linhas_vistas")}
+    novos = set(ids) - vistos
+    with conn:
+        conn.executemany(
+            "INSERT INTO linhas_vistas (id) VALUES (?)", [(i,) for i in novos]
+        )
+    return novos
+
+
+def list_pendencias(
+    conn: sqlite3.Connection,
+    motivo: str | None = None,
+) -> pd.DataFrame:
+    """Pendências abertas, ordenadas por data (opcionalmente de um motivo)."""
+    query = f"SELECT {', '.join(CAMPOS)} FROM pendencias"
+    params: tuple = ()
+    if motivo:
+        query += " WHERE motivo = ?"
+        params = (motivo,)
+    query += " ORDER BY data, conta, centavos"
+    return pd.DataFrame(conn.execute(query, params).fetchall(), columns=CAMPOS)
+
+
+def _organizze_items(
+    rows: pd.DataFrame,
+    fingerprints: pd.Series,
+    motivos,
+) -> list[dict[str, Any]]:
+    sinal = np.where(rows["D/R"].eq("D").to_numpy(), -1, 1)
+    descricoes = (
+        rows["Descrição"].fillna("").astype(str)
+        if "Descrição" in rows.columns
+        else pd.Series("", index=rows.index)
+    )
+    return [
+        {
+            "id": f"organizze:{fp}",
+            "fonte": "organizze",
+            "motivo": motivo,
+            "data": data.strftime("%Y-%m-%d"),
+            "conta": get_account_path(conta),
+            "centavos": int(centavos) * int(s),
+            "descricao": desc,
+        }
+        for fp, motivo, data, conta, centavos, s, desc in zip(
+            fingerprints.loc[rows.index],
+            motivos,
+            rows["Data"],
+            rows["CONTA"],
+            rows[CENTS_COLUMN],
+            sinal,
+            descricoes,
+        )
+    ]
+
+
+def organizze_items(
+    df: pd.DataFrame,
+    fingerprints: pd.Series,
+    motivo: str,
+) -> list[dict[str, Any]]:
+    """Linhas do Organizze no formato de pendência, todas com o mesmo motivo."""
+    return _organizze_items(df, fingerprints, [motivo] * len(df))
+
+
+def organizze_pendencias(
+    df: pd.DataFrame,
+    classificacao,
+    fingerprints: pd.Series,
+) -> list[dict[str, Any]]:
+    """
+    Pendências de uma importação do Organizze.
+
+    agendado: linha importada com Situação != "Pago" (entrada com flag "!").
+    transferencia_pendente: transferência órfã, lançada contra
+    Equity:TransferenciasPendentes.
+
+    Returns:
+        Lista de pendências (dicts com CAMPOS)
+    """
+    classificacao = np.asarray(classificacao, dtype=object)
+
+    orfa = classificacao == "transferencia_orfa"
+    agendado = ~pd.Series(classificacao).isin(CLASSIFICACOES_CONFIRMADAS).to_numpy()
+    if "Situação" in df.columns:
+        agendado &= df["Situação"].ne("Pago").to_numpy()
+    else:
+        agendado[:] = False
+
+    selecionadas = orfa | agendado
+    motivos = np.where(orfa[selecionadas], MOTIVO_TRANSFERENCIA, MOTIVO_AGENDADO)
+    return _organizze_items(df[selecionadas], fingerprints, motivos)
+
+
+def orphan_transfer_items(
+    df: pd.DataFrame,
+    orphans: list[dict[str, Any]],
+    fingerprints: pd.Series,
+) -> list[dict[str, Any]]:
+    """Pendências das transferências órfãs (sem saldo inicial/ajuste)."""
+    indices = [o["idx"] for o in orphans if not o.get("tipo")]
+    return organizze_items(df.loc[indices], fingerprints, MOTIVO_TRANSFERENCIA)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Lista as pendências abertas")
+    parser.add_argument("--banco", type=Path, default=DEFAULT_PATH)
+    parser.add_argument(
+        "--motivo",
+        choices=[MOTIVO_AGENDADO, MOTIVO_TRANSFERENCIA, MOTIVO_CONFERIR],
+        default=None,
+    )
+    args = parser.parse_args(argv)
+
+    conn = open_store(args.banco)
+    pendencias = list_pendencias(conn, args.motivo)
+    conn.close()
+
+    if pendencias.empty:
+        print("Nenhuma pendência aberta")
+        return
+    for row in pendencias.itertuples(index=False):
+        print(
+            f"{row.data} {row.motivo:22s} {row.conta:40s} "
+            f"{row.centavos / 100:>12.2f} BRL  {row.descricao}"
+        )
+    print(f"{len(pendencias)} pendências")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Conciliação de transferências pendentes entre importações.
+
+Responsabilidades:
+- Casar cada perna nova em Equity:TransferenciasPendentes (órfã do
+  Organizze ou transferência própria do OFX) com a perna oposta aberta no
+  relatório de pendências, por (centavos, janela de datas)
+- Registrar o par em conciliacoes e tirá-lo das pendências
+- Gerar a entrada única de transferência que substitui as duas pernas
+- Reescrever o arquivo .beancount que ainda tem a perna antiga
+
+Cada busca é uma consulta de intervalo no índice (motivo, centavos, data)
+do SQLite: O(log n) por perna nova, independente do tamanho do histórico.
+
+Onde fica a entrada conciliada:
+- OFX x OFX: imports.beancount (a perna antiga é removida de lá)
+- Organizze x OFX: history.beancount; o organizze_v5 gera a entrada a
+  partir de conciliacoes a cada execução, e a perna OFX sai do imports
+"""
+
+import logging
+import re
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from organizze_shared import format_cents
+import pendencias_store
+
+
+logger = logging.getLogger(__name__)
+
+JANELA_DIAS = 3
+PREFIXO_OFX = "ofx:"
+
+
+def reconcile(
+    conn,
+    items: list[dict[str, Any]],
+    janela_dias: int = JANELA_DIAS,
+    fontes: tuple[str, ...] | None = None,
+) -> list[tuple[dict[str, Any], dict[str, Any]]]:
+    """
+    Casa pernas novas com pernas opostas abertas no relatório.
+
+    As pernas abertas casadas saem das pendências; cada par é gravado em
+    conciliacoes. As pernas novas não são gravadas aqui.
+
+    Returns:
+        Lista de (pendência aberta casada, conciliação)
+    """
+    pares = []
+    for item in items:
+        if item["motivo"] != pendencias_store.MOTIVO_TRANSFERENCIA:
+            continue
+        aberta = pendencias_store.find_counterpart(conn, item, janela_dias, fontes)
+        if aberta is None:
+            continue
+        # Remove já, para a próxima perna nova não casar com a mesma
+        conn.execute("DELETE FROM pendencias WHERE id = ?", (aberta["id"],))
+
+        saida, entrada = (item, aberta) if item["centavos"] < 0 else (aberta, item)
+        conciliacao = {
+            "id": saida["id"],
+            "contraparte": entrada["id"],
+            "data": saida["data"],
+            "conta_origem": saida["conta"],
+            "conta_destino": entrada["conta"],
+            "centavos": -saida["centavos"],
+            "descricao": saida["descricao"] or entrada["descricao"],
+        }
+        pares.append((aberta, conciliacao))
+
+    # add_conciliacoes faz o commit junto com as remoções acima
+    pendencias_store.add_conciliacoes(conn, [c for _, c in pares])
+    logger.info(
+        "Transferências pendentes conciliadas: %d de %d pernas novas",
+        len(pares),
+        len(items),
+    )
+    return pares
+
+
+def _organizze_id(conciliacao: dict[str, Any]) -> str | None:
+    for chave in ("id", "contraparte"):
+        if conciliacao[chave].startswith("organizze:"):
+            return conciliacao[chave]
+    return None
+
+
+def _meta_id(pendencia_id: str) -> str:
+    """Id usado nos metadados: FITID puro para OFX (dedup do importador)."""
+    return pendencia_id.removeprefix(PREFIXO_OFX)
+
+
+def generate_reconciled_entries(
+    conciliacoes: list[dict[str, Any]],
+) -> tuple[list[str], int]:
+    """Gera uma entrada de transferência por conciliação."""
+    lines = []
+    for c in sorted(conciliacoes, key=lambda c: (c["data"], c["id"])):
+        desc = re.sub(r"\s+", " ", c["descricao"]).strip().replace('"', "'")
+        lines.append(f'{c["data"]} * "{desc or "Transferencia"}"')
+        lines.append(
+            f"  {c['conta_origem']:40s} {format_cents(-c['centavos']):>10} BRL"
+        )
+        lines.append(
+            f"  {c['conta_destino']:40s} {format_cents(c['centavos']):>10} BRL"
+        )
+        lines.append(f'  origem_id: "{_meta_id(c["id"])}"')
+        lines.append(f'  contraparte_id: "{_meta_id(c["contraparte"])}"')
+        lines.append('  transferencia: "conciliada"')
+        lines.append("")
+    return lines, len(conciliacoes)
+
+
+def ofx_leg_postings(conciliacoes: list[dict[str, Any]]) -> pd.DataFrame:
+    """
+    Pernas OFX das conciliações com órfãs do Organizze.
+
+    Saem do imports.beancount e passam a viver só na entrada conciliada do
+    history; a perna do Organizze continua sendo a linha da exportação.
+
+    Returns:
+        DataFrame com data, conta e centavos
+    """
+    pernas = []
+    for c in conciliacoes:
+        if _organizze_id(c) == c["id"]:
+            pernas.append((c["data"], c["conta_destino"], c["centavos"]))
+        else:
+            pernas.append((c["data"], c["conta_origem"], -c["centavos"]))
+    pernas = pd.DataFrame(pernas, columns=["data", "conta", "centavos"])
+    return pernas.assign(
+        data=pd.to_datetime(pernas["data"], format="%Y-%m-%d"),
+        centavos=pernas["centavos"].astype("int64"),
+    )
+
+
+def render_reconciled_entry(conciliacao: dict[str, Any]) -> str:
+    """Texto da entrada conciliada, terminado em quebra de linha."""
+    lines, _ = generate_reconciled_entries([conciliacao])
+    return "\n".join(lines)
+
+
+def ofx_block_matcher(pendencia_id: str):
+    """Reconhece o bloco OFX da pendência (pelo origem_id com o FITID)."""
+    marca = f'origem_id: "{_meta_id(pendencia_id)}"'
+    return lambda bloco: marca in bloco
+
+
+def orphan_block_matcher(item: dict[str, Any]):
+    """Reconhece o bloco de transferência órfã do Organizze da pendência."""
+    postagem = [item["conta"], format_cents(item["centavos"]), "BRL"]
+
+    def match(bloco: str) -> bool:
+        return (
+            bloco.startswith(item["data"])
+            and 'origem_id: "orphan_transfer"' in bloco
+            and any(linha.split() == postagem for linha in bloco.splitlines())
+        )
+
+    return match
+
+
+def rewrite_entries(path: Path, substituicoes: list[tuple[Any, str]]) -> int:
+    """
+    Troca blocos (entradas separadas por linha em branco) de um .beancount.
+
+    Cada (matcher, texto) substitui o primeiro bloco ainda não trocado em
+    que matcher(bloco) é verdadeiro; texto vazio remove o bloco. texto
+    também pode ser uma função que recebe o bloco e devolve o novo texto.
+
+    Returns:
+        Quantidade de blocos trocados
+    """
+    if not substituicoes or not path.exists():
+        return 0
+    blocos = path.read_text(encoding="utf-8").split("\n\n")
+    pendentes = list(substituicoes)
+    trocados = 0
+    for pos, bloco in enumerate(blocos):
+        for i, (matcher, texto) in enumerate(pendentes):
+            if matcher(bloco):
+                blocos[pos] = texto(bloco) if callable(texto) else texto
+                pendentes.pop(i)
+                trocados += 1
+                break
+        if not pendentes:
+            break
+
+    path.write_text(
+        "\n\n".join(b for b in blocos if b != "").rstrip("\n") + "\n",
+        encoding="utf-8",
+    )
+    if pendentes:
+        logger.warning(
+            "%s: %d pernas conciliadas não encontradas no arquivo",
+            path,
+            len(pendentes),
+        )
+    return trocados
+
+
+def reconcile_organizze_orphans(
+    conn,
+    df: pd.DataFrame,
+    orphans: list[dict[str, Any]],
+    fingerprints: pd.Series,
+    imports_path: Path,
+    janela_dias: int = JANELA_DIAS,
+) -> dict[int, dict[str, Any]]:
+    """
+    Passe de conciliação das órfãs do Organizze contra pernas OFX abertas.
+
+    Órfãs já conciliadas em execuções anteriores voltam pela tabela
+    conciliacoes; as novas são casadas com pernas OFX e a perna OFX é
+    removida de imports_path.
+
+    Returns:
+        Dict idx da órfã -> conciliação
+    """
+    items = pendencias_store.orphan_transfer_items(df, orphans, fingerprints)
+    existentes = pendencias_store.load_conciliacoes(conn)
+    novos = [item for item in items if item["id"] not in existentes]
+
+    pares = reconcile(conn, novos, janela_dias, fontes=("ofx",))
+    rewrite_entries(
+        imports_path, [(ofx_block_matcher(aberta["id"]), "") for aberta, _ in pares]
+    )
+
+    por_id = pendencias_store.load_conciliacoes(conn)
+    id_por_idx = {
+        o["idx"]: f"organizze:{fingerprints.at[o['idx']]}"
+        for o in orphans
+        if not o.get("tipo")
+    }
+    result = {idx: por_id[i] for idx, i in id_por_idx.items() if i in por_id}
+
+    orfas_ids = set(id_por_idx.values())
+    sem_orfa = {
+        organizze_id
+        for c in por_id.values()
+        if (organizze_id := _organizze_id(c)) and organizze_id not in orfas_ids
+    }
+    if sem_orfa:
+        logger.warning(
+            "Conciliações cuja órfã do Organizze não existe mais: %d", len(sem_orfa)
+        )
+    return result
@@ -0,0 +1,229 @@
+"""
+Liquidação de lançamentos agendados ("!") do Organizze.
+
+Responsabilidades:
+- Conferir pagamentos novos contra os agendados abertos do relatório de
+  pendências, pelo índice (motivo, conta, centavos, data de vencimento)
+- Pagamento do OFX: o agendado passa a "*" e a transação do OFX não é
+  lançada de novo (liquidação "pago")
+- Linha paga nova do Organizze: substitui o agendado, que deixa de ser
+  importado (liquidação "substituido"), só se a descrição ou a categoria
+  também batem; senão o agendado passa a "*", continua importado e vira
+  pendência "liquidacao_a_conferir" (liquidação "conferir")
+- Aplicar as liquidações guardadas a cada execução do organizze_v5
+
+As linhas do Organizze já vistas ficam em linhas_vistas, pelo fingerprint:
+cada execução só confere as linhas que chegaram desde a anterior. Na
+primeira execução todas as linhas são só registradas.
+"""
+
+import logging
+import unicodedata
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from organizze_shared import format_cents
+import pendencias_store
+import pending_reconciliation
+
+
+logger = logging.getLogger(__name__)
+
+JANELA_DIAS = 5
+MODO_PAGO = "pago"
+MODO_SUBSTITUIDO = "substituido"
+MODO_CONFERIR = "conferir"
+FONTE_CONFERIR = "liquidacao"
+
+
+def _normalize(texto: str) -> str:
+    texto = unicodedata.normalize("NFKD", str(texto))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(texto.casefold().split())
+
+
+def same_entry(
+    agendado: dict[str, Any],
+    pagamento: dict[str, Any],
+    categorias: dict[str, str],
+) -> bool:
+    """
+    Agendado e pagamento descrevem o mesmo lançamento: uma descrição contém
+    a outra (sem acentos e caixa) ou a Categoria é a mesma.
+    """
+    a = _normalize(agendado.get("descricao", ""))
+    b = _normalize(pagamento.get("descricao", ""))
+    if a and b and (a in b or b in a):
+        return True
+    categoria = categorias.get(agendado["id"], "")
+    return bool(categoria) and categoria == categorias.get(pagamento["id"], "")
+
+
+def settle(
+    conn,
+    items: list[dict[str, Any]],
+    modo: str,
+    janela_dias: int = JANELA_DIAS,
+    confere: Callable[[dict[str, Any], dict[str, Any]], bool] | None = None,
+) -> list[tuple[dict[str, Any], dict[str, Any]]]:
+    """
+    Casa pagamentos novos com agendados abertos do Organizze.
+
+    Os agendados casados saem das pendências e a liquidação é gravada.
+    Se confere(agendado, pagamento) é falso, a liquidação é gravada com
+    modo "conferir" em vez de modo.
+
+    Returns:
+        Lista de (agendado liquidado, pagamento)
+    """
+    pares = []
+    modos = []
+    for item in items:
+        agendado = pendencias_store.find_scheduled(
+            conn, item, janela_dias, fontes=("organizze",)
+        )
+        if agendado is None:
+            continue
+        # Remove já, para o próximo pagamento não liquidar o mesmo agendado
+        conn.execute("DELETE FROM pendencias WHERE id = ?", (agendado["id"],))
+        pares.append((agendado, item))
+        modos.append(
+            modo if confere is None or confere(agendado, item) else MODO_CONFERIR
+        )
+
+    # add_liquidacoes faz o commit junto com as remoções acima
+    pendencias_store.add_liquidacoes(
+        conn,
+        [
+            {
+                "id": agendado["id"],
+                "liquidado_por": item["id"],
+                "data": item["data"],
+                "modo": modo_par,
+            }
+            for (agendado, item), modo_par in zip(pares, modos)
+        ],
+    )
+    logger.info(
+        "Agendados liquidados (%s): %d de %d pagamentos novos (%d a conferir)",
+        modo,
+        len(pares),
+        len(items),
+        modos.count(MODO_CONFERIR),
+    )
+    return pares
+
+
+def apply_settlements(
+    conn,
+    df: pd.DataFrame,
+    fingerprints: pd.Series,
+    janela_dias: int = JANELA_DIAS,
+) -> tuple[pd.DataFrame, pd.Series]:
+    """
+    Confere as linhas novas e aplica todas as liquidações guardadas.
+
+    Agendados pagos (OFX) passam a Situação "Pago"; agendados substituídos
+    por uma linha paga saem do DataFrame. Os liquidados "a conferir" passam
+    a "Pago", ficam no DataFrame e são sincronizados como pendências
+    (fonte "liquidacao") enquanto a linha existir no export.
+
+    Returns:
+        Tuple (DataFrame, fingerprints), reindexados se houve remoção
+    """
+    ids = "organizze:" + fingerprints
+    primeira = conn.execute("SELECT 1 FROM linhas_vistas LIMIT 1").fetchone() is None
+    novos = pendencias_store.mark_seen(conn, ids)
+
+    if not primeira and novos and "Situação" in df.columns:
+        pagas = ids.isin(novos).to_numpy() & df["Situação"].eq("Pago").to_numpy()
+        categorias = (
+            dict(zip(ids, df["Categoria"].fillna("").astype(str)))
+            if "Categoria" in df.columns
+            else {}
+        )
+        settle(
+            conn,
+            pendencias_store.organizze_items(
+                df[pagas], fingerprints, pendencias_store.MOTIVO_AGENDADO
+            ),
+            MODO_SUBSTITUIDO,
+            janela_dias,
+            confere=lambda agendado, pagamento: same_entry(
+                agendado, pagamento, categorias
+            ),
+        )
+    logger.info("Linhas novas desde a última execução: %d", len(novos))
+
+    liquidacoes = pendencias_store.load_liquidacoes(conn)
+    if not liquidacoes:
+        return df, fingerprints
+
+    modo = ids.map(lambda i: liquidacoes.get(i, {}).get("modo"))
+    conferir = modo.eq(MODO_CONFERIR).to_numpy()
+    pendencias_store.sync_source(
+        conn,
+        FONTE_CONFERIR,
+        [
+            {**item, "fonte": FONTE_CONFERIR}
+            for item in pendencias_store.organizze_items(
+                df[conferir], fingerprints, pendencias_store.MOTIVO_CONFERIR
+            )
+        ],
+    )
+
+    pagos = modo.eq(MODO_PAGO).to_numpy() | conferir
+    if pagos.any():
+        df = df.copy()
+        df.loc[pagos, "Situação"] = "Pago"
+
+    manter = ~modo.eq(MODO_SUBSTITUIDO).to_numpy()
+    logger.info(
+        "Agendados liquidados aplicados: %d pagos, %d substituídos, %d a conferir",
+        pagos.sum() - conferir.sum(),
+        (~manter).sum(),
+        conferir.sum(),
+    )
+    if manter.all():
+        return df, fingerprints
+    return (
+        df[manter].reset_index(drop=True),
+        fingerprints[manter].reset_index(drop=True),
+    )
+
+
+def scheduled_block_matcher(agendado: dict[str, Any]):
+    """Reconhece o bloco "!" do agendado (data, conta e valor da conta)."""
+    postagem = [agendado["conta"], format_cents(agendado["centavos"]), "BRL"]
+
+    def match(bloco: str) -> bool:
+        return bloco.startswith(f"{agendado['data']} ! ") and any(
+            linha.split() == postagem for linha in bloco.splitlines()
+        )
+
+    return match
+
+
+def flip_flag(bloco: str) -> str:
+    """Troca a flag "!" da primeira linha do bloco por "*"."""
+    data, resto = bloco.split(" ! ", 1)
+    return f"{data} * {resto}"
+
+
+def flip_settled_entries(history_path: Path, agendados: list[dict[str, Any]]) -> int:
+    """
+    Marca como "*" as entradas dos agendados já no history.beancount.
+
+    O organizze_v5 regenera o arquivo com a mesma flag a partir das
+    liquidações; isto só evita esperar a próxima execução.
+
+    Returns:
+        Quantidade de entradas trocadas
+    """
+    return pending_reconciliation.rewrite_entries(
+        history_path,
+        [(scheduled_block_matcher(agendado), flip_flag) for agendado in agendados],
+    )
@@ -0,0 +1,124 @@
+"""
+Cache persistente de pares de transferência entre execuções.
+
+Responsabilidades:
+- Calcular fingerprints estáveis por linha (independentes da posição no arquivo)
+- Ler e gravar os pares confirmados em um JSON local
+- Resolver pares em cache contra o arquivo atual
+
+Um par em cache só é reaproveitado se os fingerprints dos dois lados ainda
+existirem na entrada e as duas linhas continuarem candidatas a
+transferência; caso contrário ele é descartado na próxima gravação.
+
+O cache só poupa o matching: identify_transfers() ainda lê todas as
+candidatas para montar os grupos (data, centavos), porque os órfãos de
+cada grupo dependem das pernas já pareadas.
+"""
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+from organizze_shared import CENTS_COLUMN
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+
+def compute_row_fingerprints(df: pd.DataFrame) -> pd.Series:
+    """
+    Calcula fingerprint estável por linha.
+
+    Usa data, conta, D/R, centavos e descrição; linhas idênticas recebem
+    um número de ocorrência para continuarem distintas. A ocorrência segue
+    a ordem das linhas: a carga ordena com sort estável, então linhas
+    idênticas mantêm a ordem da exportação entre execuções.
+    """
+    key = (
+        df["Data"].dt.strftime("%Y-%m-%d")
+        + "|"
+        + df["CONTA"].astype(str)
+        + "|"
+        + df["D/R"].astype(str)
+        + "|"
+        + df[CENTS_COLUMN].astype(str)
+        + "|"
+        + df["Descrição"].fillna("").astype(str)
+    )
+    occurrence = key.groupby(key).cumcount().astype(str)
+    full_key = key + "|" + occurrence
+    return pd.Series(
+        [hashlib.sha256(k.encode()).hexdigest()[:16] for k in full_key],
+        index=df.index,
+    )
+
+
+def load_pair_cache(path: Path) -> list[tuple[str, str]]:
+    """Carrega pares (fingerprint_debito, fingerprint_credito) do cache."""
+    if not path.exists():
+        return []
+
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as exc:
+        logger.warning("Cache de pares ignorado (%s): %s", path, exc)
+        return []
+
+    if data.get("versao") != CACHE_VERSION:
+        logger.warning("Cache de pares com versão incompatível: %s", path)
+        return []
+
+    return [(d, c) for d, c in data.get("pares", [])]
+
+
+def save_pair_cache(path: Path, pairs: list[tuple[str, str]]) -> None:
+    """Grava os pares confirmados, substituindo o cache anterior."""
+    data = {"versao": CACHE_VERSION, "pares": [list(p) for p in pairs]}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=0), encoding="utf-8")
+
+
+def resolve_cached_pairs(
+    cache: list[tuple[str, str]],
+    fingerprints: pd.Series,
+    candidate_indices: set[int] | None = None,
+) -> list[tuple[int, int]]:
+    """
+    Converte pares em cache para índices do DataFrame atual.
+
+    Pares cujo fingerprint sumiu da entrada, ou com uma perna que deixou de
+    ser candidata a transferência (ex: regra nova que a reclassifica como
+    boleto ou pagamento de cartão), são invalidados.
+    """
+    index_by_fp = dict(zip(fingerprints.values, fingerprints.index))
+    pairs = []
+    invalid = 0
+
+    for fp_d, fp_c in cache:
+        d_idx = index_by_fp.get(fp_d)
+        c_idx = index_by_fp.get(fp_c)
+        if d_idx is None or c_idx is None:
+            invalid += 1
+            continue
+        if candidate_indices is not None and (
+            d_idx not in candidate_indices or c_idx not in candidate_indices
+        ):
+            invalid += 1
+            continue
+        pairs.append((int(d_idx), int(c_idx)))
+
+    logger.info("Pares em cache: %d reutilizados, %d invalidados", len(pairs), invalid)
+    return pairs
+
+
+def pairs_to_fingerprints(
+    pairs: list[tuple[int, int]],
+    fingerprints: pd.Series,
+) -> list[tuple[str, str]]:
+    """Converte pares de índices para pares de fingerprints."""
+    return [(fingerprints.at[d], fingerprints.at[c]) for d, c in pairs]
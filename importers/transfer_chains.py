@@ -0,0 +1,255 @@
+"""
+Detecção de cadeias de transferências entre contas (A → B → C).
+
+Responsabilidades:
+- Unir pernas pareadas e órfãs que formam uma mesma movimentação (union-find)
+- Reportar as cadeias encontradas
+- Gerar uma entrada Beancount multi-posting por cadeia
+
+Regras de ligação (mesmo valor em centavos, até JANELA_DIAS dias):
+- Passagem: R numa conta X seguido de D na mesma conta X
+- Quase-par: D órfão numa conta A e R órfão numa conta B diferente
+
+Pernas soltas são órfãos de identify_transfers() e candidatos a transferência
+que ficaram sem contraparte no mesmo dia.
+
+Só viram cadeia os componentes com duas contas ou mais e tantos D quanto R;
+nos demais as pernas seguem o caminho normal (par, órfã, receita/despesa).
+
+Cada perna é indexada por (conta, centavos, bucket de dias), então o passe
+é linear no número de pernas.
+"""
+
+import logging
+from collections import defaultdict
+from typing import Any
+
+import pandas as pd
+
+from organizze_shared import (
+    CENTS_COLUMN,
+    format_cents,
+    generate_chain_id,
+    get_account_path,
+    sanitize_description,
+)
+from transfers_handler import MAX_ORFAOS_LOG, sample_orphans
+
+
+logger = logging.getLogger(__name__)
+
+JANELA_DIAS = 2
+
+
+class _UnionFind:
+    def __init__(self, size: int) -> None:
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+
+
+def find_transfer_chains(
+    df: pd.DataFrame,
+    pairs: list[tuple[int, int]],
+    orphans: list[dict[str, Any]],
+    unpaired_indices: list[int] | None = None,
+    janela_dias: int = JANELA_DIAS,
+    max_detalhes: int = MAX_ORFAOS_LOG,
+) -> list[dict[str, Any]]:
+    """
+    Detecta cadeias de transferências sobre pares, órfãos e pernas soltas.
+
+    Returns:
+        Lista de cadeias com indices, contas (caminho), centavos, data e desc
+    """
+
+    legs: list[dict[str, Any]] = []
+    is_orphan: list[bool] = []
+
+    def add_leg(idx: int, orphan: bool) -> int:
+        row = df.iloc[idx]
+        legs.append(
+            {
+                "idx": idx,
+                "conta": row["CONTA"],
+                "dr": row["D/R"],
+                "centavos": int(row[CENTS_COLUMN]),
+                "dia": row["Data"].toordinal(),
+            }
+        )
+        is_orphan.append(orphan)
+        return len(legs) - 1
+
+    pair_legs = []
+    for d_idx, c_idx in pairs:
+        pair_legs.append((add_leg(d_idx, False), add_leg(c_idx, False)))
+    for orphan in orphans:
+        if orphan.get("tipo"):
+            continue
+        add_leg(orphan["idx"], True)
+    for idx in unpaired_indices or ():
+        add_leg(idx, True)
+
+    uf = _UnionFind(len(legs))
+    for d_pos, c_pos in pair_legs:
+        uf.union(d_pos, c_pos)
+
+    width = janela_dias + 1
+
+    # Passagem: R em X seguido de D em X (D até janela_dias depois do R)
+    credits_by_key: dict[tuple, list[int]] = defaultdict(list)
+    for pos, leg in enumerate(legs):
+        if leg["dr"] == "R":
+            bucket = leg["dia"] // width
+            credits_by_key[(leg["conta"], leg["centavos"], bucket)].append(pos)
+
+    used_credits: set[int] = set()
+    for pos, leg in enumerate(legs):
+        if leg["dr"] != "D":
+            continue
+        bucket = leg["dia"] // width
+        best, best_diff = None, None
+        for b in (bucket, bucket - 1):
+            for cand in credits_by_key.get((leg["conta"], leg["centavos"], b), ()):
+                if cand in used_credits:
+                    continue
+                diff = leg["dia"] - legs[cand]["dia"]
+                if 0 <= diff <= janela_dias and (best is None or diff < best_diff):
+                    best, best_diff = cand, diff
+        if best is not None:
+            used_credits.add(best)
+            uf.union(pos, best)
+
+    # Quase-par: D órfão em A e R órfão em B, A != B
+    orphan_credits: dict[tuple, list[int]] = defaultdict(list)
+    for pos, leg in enumerate(legs):
+        if is_orphan[pos] and leg["dr"] == "R":
+            orphan_credits[(leg["centavos"], leg["dia"] // width)].append(pos)
+
+    used_orphans: set[int] = set()
+    for pos, leg in enumerate(legs):
+        if not is_orphan[pos] or leg["dr"] != "D":
+            continue
+        bucket = leg["dia"] // width
+        best, best_diff = None, None
+        for b in (bucket - 1, bucket, bucket + 1):
+            for cand in orphan_credits.get((leg["centavos"], b), ()):
+                if cand in used_orphans or legs[cand]["conta"] == leg["conta"]:
+                    continue
+                diff = abs(leg["dia"] - legs[cand]["dia"])
+                if diff <= janela_dias and (best is None or diff < best_diff):
+                    best, best_diff = cand, diff
+        if best is not None:
+            used_orphans.add(best)
+            uf.union(pos, best)
+
+    components: dict[int, list[int]] = defaultdict(list)
+    for pos in range(len(legs)):
+        components[uf.find(pos)].append(pos)
+
+    chains = []
+    for members in components.values():
+        if len(members) < 2:
+            continue
+        if len(members) == 2 and not any(is_orphan[pos] for pos in members):
+            continue
+        # Movimentação de uma conta só não é transferência (ex: passagem
+        # R -> D na mesma conta): as pernas seguem o caminho normal
+        if len({legs[pos]["conta"] for pos in members}) < 2:
+            continue
+        # Pernas soltas ficam fora: a cadeia precisa fechar (D == R)
+        debitos = sum(legs[pos]["dr"] == "D" for pos in members)
+        if 2 * debitos != len(members):
+            continue
+
+        members.sort(key=lambda pos: (legs[pos]["dia"], legs[pos]["dr"] != "D"))
+        chain_legs = [legs[pos] for pos in members]
+        chains.append(_describe_chain(df, chain_legs))
+
+    chains.sort(key=lambda chain: (chain["data"], chain["indices"]))
+
+    logger.info("Cadeias de transferência detectadas: %d", len(chains))
+    amostra = sample_orphans(chains, max_detalhes)
+    for chain in amostra:
+        logger.debug(
+            "Cadeia %s | %s | %s",
+            chain["data"].strftime("%Y-%m-%d"),
+            " -> ".join(chain["contas"]),
+            format_cents(chain["centavos"]),
+        )
+    if len(amostra) < len(chains):
+        logger.debug("... mais %d cadeias omitidas", len(chains) - len(amostra))
+
+    return chains
+
+
+def _describe_chain(df: pd.DataFrame, chain_legs: list[dict[str, Any]]) -> dict:
+    first_debit = next((leg for leg in chain_legs if leg["dr"] == "D"), None)
+    path = [first_debit["conta"]] if first_debit else ["?"]
+    for leg in chain_legs:
+        if leg["dr"] == "R" and leg["conta"] != path[-1]:
+            path.append(leg["conta"])
+
+    head = first_debit or chain_legs[0]
+    row = df.iloc[head["idx"]]
+
+    return {
+        "indices": sorted(leg["idx"] for leg in chain_legs),
+        "legs": [(leg["idx"], leg["conta"], leg["dr"]) for leg in chain_legs],
+        "contas": path,
+        "centavos": head["centavos"],
+        "data": df.iloc[chain_legs[0]["idx"]]["Data"],
+        "desc": row.get("Descrição", ""),
+    }
+
+
+def generate_chain_entries(
+    df: pd.DataFrame,
+    chains: list[dict[str, Any]],
+) -> tuple[list[str], int]:
+    """
+    Gera uma entrada Beancount multi-posting por cadeia.
+
+    Cada perna vira um posting (D negativo, R positivo). As cadeias de
+    find_transfer_chains() fecham por construção.
+    """
+    lines = []
+    count = 0
+
+    for chain in chains:
+        date_str = chain["data"].strftime("%Y-%m-%d")
+        desc = sanitize_description(chain["desc"])
+        pago = all(
+            df.iloc[idx].get("Situação", "Pago") == "Pago"
+            for idx, _, _ in chain["legs"]
+        )
+        flag = "*" if pago else "!"
+
+        lines.append(f'{date_str} {flag} "{desc}"')
+        for idx, conta, dr in chain["legs"]:
+            centavos = int(df.iloc[idx][CENTS_COLUMN])
+            signed = -centavos if dr == "D" else centavos
+            lines.append(
+                f"  {get_account_path(conta):40s} {format_cents(signed):>10} BRL"
+            )
+        chain_id = generate_chain_id(chain["indices"])
+        lines.append(f'  origem_id: "transfer_chain:{chain_id}"')
+        lines.append(f'  cadeia: "{" -> ".join(chain["contas"])}"')
+        lines.append("")
+        count += 1
+
+    return lines, count
@@ -10,95 +10,136 @@ Responsabilidades:
 """
 
 import logging
-from collections import defaultdict
-from datetime import timedelta
+from collections import defaultdict, deque
 from typing import Any
 
+import numpy as np
 import pandas as pd
 
+from classification_rules import classify, rule_account, tipo_indices, tipo_mask
+from entry_renderer import (
+    entry_accounts,
+    entry_dates,
+    entry_descriptions,
+    render_entries,
+)
 from organizze_shared import (
+    CENTS_COLUMN,
+    format_cents,
     generate_pair_id,
-    get_account_path,
-    sanitize_description,
 )
 
 
 logger = logging.getLogger(__name__)
 
-CATEGORIAS_TRANSFERENCIA = {
-    "transferências",
-    "transferência",
-    "outros",
-    "pagamento de fatura",
-}
+TIPOS_CANDIDATOS = ("saldo_inicial", "ajuste", "transferencia")
+
+MAX_ORFAOS_LOG = 20
+
+
+def classify_transfer_candidates(
+    df: pd.DataFrame,
+    excluded_indices: set[int],
+) -> pd.Series:
+    """
+    Classifica as linhas fora de `excluded_indices` pelas regras de
+    saldo inicial, ajuste e transferência (nessa prioridade).
+
+    Returns:
+        Series tipo (None para linhas excluídas ou sem regra)
+    """
+    tipos = classify(df, TIPOS_CANDIDATOS)["tipo"]
+    return tipos.where(~df.index.isin(list(excluded_indices)), None)
+
+
+def split_transfer_candidates(
+    df: pd.DataFrame,
+    excluded_indices: set[int],
+) -> tuple[list[int], list[int]]:
+    """
+    Separa candidatos a transferência de saldos iniciais/ajustes.
+
+    Returns:
+        Tuple de (transferencia_indices, saldo_inicial_indices)
+    """
+    tipos = classify_transfer_candidates(df, excluded_indices)
+    transferencia_indices = df.index[tipos.eq("transferencia")].tolist()
+    saldo_inicial_indices = df.index[tipos.isin(["saldo_inicial", "ajuste"])].tolist()
+    return transferencia_indices, saldo_inicial_indices
+
+
+def _pop_first_other_account(
+    filas: dict[Any, deque], conta: Any
+) -> dict[str, Any] | None:
+    """
+    Retira o primeiro crédito (na ordem do grupo) de uma conta diferente.
+
+    `filas` guarda, por conta, os créditos livres em ordem; custa O(contas)
+    por débito em vez de percorrer todos os créditos do grupo.
+    """
+    melhor = None
+    for outra, fila in filas.items():
+        if outra != conta and fila and (melhor is None or fila[0][0] < melhor[0][0]):
+            melhor = fila
+    if melhor is None:
+        return None
+    return melhor.popleft()[1]
 
 
 def identify_transfers(
     df: pd.DataFrame,
     excluded_indices: set[int],
+    confirmed_indices: set[int] | None = None,
+    max_detalhes: int = MAX_ORFAOS_LOG,
 ) -> tuple[set[int], list[dict[str, Any]]]:
     """
     Identifica transferências pareadas usando algoritmo de matching global.
 
+    Linhas em `confirmed_indices` (pares já confirmados, ex: cache) entram
+    nos grupos como já pareadas e não voltam ao matching; a leitura das
+    linhas candidatas continua a mesma. Os órfãos são
+    logados de forma agregada (ver log_orphans).
+
     Returns:
         Tuple de (processed_indices, orphans)
     """
-    transferencia_indices = []
-    saldo_inicial_indices = []
-
-    for idx, row in df.iterrows():
-        if idx in excluded_indices:
-            continue
+    if confirmed_indices is None:
+        confirmed_indices = set()
 
-        desc = (
-            str(row.get("Descrição", "")).lower()
-            if pd.notna(row.get("Descrição"))
-            else ""
-        )
-        cat = (
-            str(row.get("Categoria", "")).lower()
-            if pd.notna(row.get("Categoria"))
-            else ""
-        )
+    tipos = classify_transfer_candidates(df, excluded_indices)
+    transferencia_indices = df.index[tipos.eq("transferencia")].tolist()
+    saldo_inicial_indices = df.index[tipos.isin(["saldo_inicial", "ajuste"])].tolist()
+    saque_indices = tipo_indices(df, "saque_atm")
 
-        if "saldo inicial" in desc or "ajuste" in desc:
-            saldo_inicial_indices.append(idx)
-            continue
-
-        if cat in CATEGORIAS_TRANSFERENCIA:
-            transferencia_indices.append(idx)
-
-    logger.info(
-        f"Entradas com Categoria={CATEGORIAS_TRANSFERENCIA}: {len(transferencia_indices)}"
-    )
-    logger.info(f"Saldos iniciais/ajustes isolados: {len(saldo_inicial_indices)}")
+    logger.info("Candidatos a transferência: %d", len(transferencia_indices))
+    logger.info("Saldos iniciais/ajustes isolados: %d", len(saldo_inicial_indices))
 
     processed_as_transfer: set[int] = set()
     orphans: list[dict[str, Any]] = []
 
-    # Agrupar por (data, valor) para matching global
+    # Agrupar por (data, centavos) para matching global
     groups: dict[tuple, list[dict[str, Any]]] = defaultdict(list)
 
     for idx in transferencia_indices:
         row = df.iloc[idx]
-        valor = abs(row["Valor"])
+        centavos = int(row[CENTS_COLUMN])
         data = row["Data"].date() if hasattr(row["Data"], "date") else row["Data"]
 
-        groups[(data, valor)].append(
+        groups[(data, centavos)].append(
             {
                 "idx": idx,
                 "conta": row["CONTA"],
-                "valor": valor,
+                "centavos": centavos,
                 "data": row["Data"],
                 "dr": row["D/R"],
                 "categoria": str(row.get("Categoria", "")).lower(),
                 "desc": row.get("Descrição", ""),
-                "is_saque": "saque" in str(row.get("Descrição", "")).lower(),
+                "is_saque": idx in saque_indices,
             }
         )
 
     # Processar cada grupo: fazer matching otimizado
-    for (data, valor), entries in groups.items():
+    for (data, centavos), entries in groups.items():
         # Separar D e R
         debits = [e for e in entries if e["dr"] == "D"]
         credits = [e for e in entries if e["dr"] == "R"]
@@ -107,46 +148,44 @@ def identify_transfers(
             continue
 
         # Tentar matching: primeiro por categoria igual, depois por qualquer
-        matched_debits = set()
-        matched_credits = set()
+        matched_debits = {d["idx"] for d in debits if d["idx"] in confirmed_indices}
+        matched_credits = {c["idx"] for c in credits if c["idx"] in confirmed_indices}
+        # Mesmo dia: a janela de ±2 dias vale para todo o grupo
 
         # Primeira fase: matching por categoria IGUAL
+        filas_categoria: dict[str, dict] = defaultdict(dict)
+        for pos, c in enumerate(credits):
+            if c["idx"] not in matched_credits:
+                filas = filas_categoria[c["categoria"]]
+                filas.setdefault(c["conta"], deque()).append((pos, c))
         for d in debits:
             if d["idx"] in matched_debits:
                 continue
-            for c in credits:
-                if c["idx"] in matched_credits:
-                    continue
-                if d["conta"] != c["conta"] and d["categoria"] == c["categoria"]:
-                    date_diff = abs((d["data"] - c["data"]).days)
-                    if date_diff <= 2:
-                        matched_debits.add(d["idx"])
-                        matched_credits.add(c["idx"])
-                        processed_as_transfer.add(d["idx"])
-                        processed_as_transfer.add(c["idx"])
-                        logger.debug(
-                            f"Par encontrado (mesma cat): {d['idx']} <-> {c['idx']}"
-                        )
-                        break
+            c = _pop_first_other_account(filas_categoria[d["categoria"]], d["conta"])
+            if c is not None:
+                matched_debits.add(d["idx"])
+                matched_credits.add(c["idx"])
+                processed_as_transfer.add(d["idx"])
+                processed_as_transfer.add(c["idx"])
+                logger.debug(
+                    "Par encontrado (mesma cat): %s <-> %s", d["idx"], c["idx"]
+                )
 
         # Segunda fase: matching por categoria DIFERENTE (apenas para quem sobrou)
+        filas_conta: dict[Any, deque] = {}
+        for pos, c in enumerate(credits):
+            if c["idx"] not in matched_credits:
+                filas_conta.setdefault(c["conta"], deque()).append((pos, c))
         for d in debits:
             if d["idx"] in matched_debits:
                 continue
-            for c in credits:
-                if c["idx"] in matched_credits:
-                    continue
-                if d["conta"] != c["conta"]:
-                    date_diff = abs((d["data"] - c["data"]).days)
-                    if date_diff <= 2:
-                        matched_debits.add(d["idx"])
-                        matched_credits.add(c["idx"])
-                        processed_as_transfer.add(d["idx"])
-                        processed_as_transfer.add(c["idx"])
-                        logger.debug(
-                            f"Par encontrado (cat diff): {d['idx']} <-> {c['idx']}"
-                        )
-                        break
+            c = _pop_first_other_account(filas_conta, d["conta"])
+            if c is not None:
+                matched_debits.add(d["idx"])
+                matched_credits.add(c["idx"])
+                processed_as_transfer.add(d["idx"])
+                processed_as_transfer.add(c["idx"])
+                logger.debug("Par encontrado (cat diff): %s <-> %s", d["idx"], c["idx"])
 
         # Marcar não pareados como órfãos
         for d in debits:
@@ -159,163 +198,249 @@ def identify_transfers(
     # Processar saldos iniciais e ajustes
     for idx in saldo_inicial_indices:
         row = df.iloc[idx]
-        desc = str(row.get("Descrição", "")).lower()
-
-        if "saldo inicial" in desc:
-            orphans.append(
-                {
-                    "idx": idx,
-                    "conta": row["CONTA"],
-                    "valor": abs(row["Valor"]),
-                    "data": row["Data"],
-                    "dr": row["D/R"],
-                    "desc": row.get("Descrição", ""),
-                    "tipo": "saldo_inicial",
-                }
-            )
-        elif "ajuste" in desc:
-            orphans.append(
-                {
-                    "idx": idx,
-                    "conta": row["CONTA"],
-                    "valor": abs(row["Valor"]),
-                    "data": row["Data"],
-                    "dr": row["D/R"],
-                    "desc": row.get("Descrição", ""),
-                    "tipo": "ajuste",
-                }
-            )
-
-    # Log de órfãos
-    for orphan in orphans:
-        orphan_type = orphan.get("tipo", orphan.get("debug_motivo", "unknown"))
-        logger.warning(
-            f"Transferência órfã: {orphan['data']} | "
-            f"{orphan['conta']} | {orphan['valor']} | D/R={orphan['dr']} | "
-            f"motivo={orphan_type}"
+        orphans.append(
+            {
+                "idx": idx,
+                "conta": row["CONTA"],
+                "centavos": int(row[CENTS_COLUMN]),
+                "data": row["Data"],
+                "dr": row["D/R"],
+                "desc": row.get("Descrição", ""),
+                "tipo": tipos.at[idx],
+            }
         )
 
-    matched = len(processed_as_transfer) // 2
-    logger.info(f"Transferências pareadas: {matched}")
-    logger.info(f"Transferências órfãs: {len(orphans)}")
+    logger.info(
+        "Transferências pareadas: %d (+%d já confirmadas)",
+        len(processed_as_transfer) // 2,
+        len(confirmed_indices) // 2,
+    )
+    log_orphans(orphans, max_detalhes)
 
     return processed_as_transfer, orphans
 
 
-def generate_transfer_entries(
+def orphan_motivo(orphan: dict[str, Any]) -> str:
+    """Motivo do órfão: tipo (saldo_inicial/ajuste) ou debug_motivo."""
+    return orphan.get("tipo") or orphan.get("debug_motivo") or "unknown"
+
+
+def summarize_orphans(orphans: list[dict[str, Any]]) -> pd.DataFrame:
+    """
+    Conta órfãos por conta, mês e motivo.
+
+    Returns:
+        DataFrame com colunas conta, mes, motivo, quantidade e centavos,
+        ordenado por quantidade decrescente
+    """
+    columns = ["conta", "mes", "motivo", "quantidade", "centavos"]
+    if not orphans:
+        return pd.DataFrame(columns=columns)
+
+    frame = pd.DataFrame(
+        {
+            "conta": [o["conta"] for o in orphans],
+            "mes": [pd.Timestamp(o["data"]).strftime("%Y-%m") for o in orphans],
+            "motivo": [orphan_motivo(o) for o in orphans],
+            "centavos": [o["centavos"] for o in orphans],
+        }
+    )
+    summary = (
+        frame.groupby(["conta", "mes", "motivo"])
+        .agg(quantidade=("centavos", "size"), centavos=("centavos", "sum"))
+        .reset_index()
+        .sort_values(["quantidade", "conta", "mes"], ascending=[False, True, True])
+    )
+    return summary[columns].reset_index(drop=True)
+
+
+def sample_orphans(
+    orphans: list[dict[str, Any]],
+    max_detalhes: int = MAX_ORFAOS_LOG,
+) -> list[dict[str, Any]]:
+    """Amostra determinística (espaçada ao longo da lista) de até max_detalhes órfãos."""
+    if max_detalhes <= 0:
+        return []
+    if len(orphans) <= max_detalhes:
+        return list(orphans)
+    positions = np.linspace(0, len(orphans) - 1, max_detalhes).round().astype(int)
+    return [orphans[pos] for pos in positions]
+
+
+def log_orphans(
+    orphans: list[dict[str, Any]],
+    max_detalhes: int = MAX_ORFAOS_LOG,
+) -> None:
+    """Loga o resumo por motivo e conta e uma amostra limitada dos órfãos."""
+    logger.info("Transferências órfãs: %d", len(orphans))
+    if not orphans:
+        return
+
+    summary = summarize_orphans(orphans)
+    for coluna in ("motivo", "conta"):
+        contagem = summary.groupby(coluna)["quantidade"].sum()
+        logger.info(
+            "Órfãos por %s: %s",
+            coluna,
+            ", ".join(f"{chave}={n}" for chave, n in contagem.items()),
+        )
+    meses = summary.groupby("mes")["quantidade"].sum()
+    logger.info(
+        "Órfãos por mês: %d meses, pico %s (%d)",
+        len(meses),
+        meses.idxmax(),
+        meses.max(),
+    )
+
+    amostra = sample_orphans(orphans, max_detalhes)
+    for orphan in amostra:
+        logger.warning(
+            "Transferência órfã: %s | %s | %s | D/R=%s | motivo=%s",
+            orphan["data"],
+            orphan["conta"],
+            format_cents(orphan["centavos"]),
+            orphan["dr"],
+            orphan_motivo(orphan),
+        )
+    if len(amostra) < len(orphans):
+        logger.warning(
+            "... mais %d órfãos omitidos (lista completa: --orfaos-arquivo)",
+            len(orphans) - len(amostra),
+        )
+
+
+def write_orphans_file(orphans: list[dict[str, Any]], path) -> None:
+    """Grava a lista completa de órfãos em CSV."""
+    frame = pd.DataFrame(
+        {
+            "idx": [o["idx"] for o in orphans],
+            "data": [pd.Timestamp(o["data"]).strftime("%Y-%m-%d") for o in orphans],
+            "conta": [o["conta"] for o in orphans],
+            "dr": [o["dr"] for o in orphans],
+            "valor": [format_cents(o["centavos"]) for o in orphans],
+            "motivo": [orphan_motivo(o) for o in orphans],
+            "descricao": [o.get("desc", "") for o in orphans],
+        },
+        columns=["idx", "data", "conta", "dr", "valor", "motivo", "descricao"],
+    )
+    frame.to_csv(path, index=False)
+    logger.info("Órfãos gravados em %s: %d", path, len(frame))
+
+
+def pair_transfers(
     df: pd.DataFrame,
     processed_as_transfer: set[int],
-) -> tuple[list[str], int]:
-    """Gera entradas Beancount para transferências pareadas."""
+) -> list[tuple[int, int]]:
+    """
+    Pareia os lançamentos já identificados como transferência.
+
+    Returns:
+        Lista de (idx_debito, idx_credito) ordenada por (data, centavos)
+    """
     transfer_groups: dict[tuple, list[int]] = defaultdict(list)
     for idx in processed_as_transfer:
         row = df.iloc[idx]
-        key = (row["Data"], abs(row["Valor"]))
+        key = (row["Data"], int(row[CENTS_COLUMN]))
         transfer_groups[key].append(idx)
 
-    lines = []
-    count = 0
-
-    for (date, valor), indices in sorted(transfer_groups.items()):
-        entries = [df.iloc[idx] for idx in indices]
+    pairs = []
 
-        debits = [e for e in entries if e["D/R"] == "D"]
-        credits = [e for e in entries if e["D/R"] == "R"]
+    for _, indices in sorted(transfer_groups.items()):
+        debits = [idx for idx in indices if df.iloc[idx]["D/R"] == "D"]
+        credits = [idx for idx in indices if df.iloc[idx]["D/R"] == "R"]
 
-        matched_debits = set()
         matched_credits = set()
 
         for d in debits:
-            if d.name in matched_debits:
-                continue
             for c in credits:
-                if c.name in matched_credits:
+                if c in matched_credits:
                     continue
-                if d["CONTA"] != c["CONTA"]:
-                    matched_debits.add(d.name)
-                    matched_credits.add(c.name)
-
-                    date_str = pd.to_datetime(date).strftime("%Y-%m-%d")
-                    desc = sanitize_description(d.get("Descrição", ""))
-
-                    desc_lower = str(d.get("Descrição", "")).lower()
-                    is_saque = "saque" in desc_lower
-
-                    from_acc = get_account_path(d.get("CONTA"))
-
-                    if is_saque:
-                        to_acc = get_account_path("Carteira")
-                    else:
-                        to_acc = get_account_path(c.get("CONTA"))
-
-                    lines.append(f'{date_str} * "{desc}"')
-                    lines.append(f"  {from_acc:40s} {-valor:>10.2f} BRL")
-                    lines.append(f"  {to_acc:40s} {valor:>10.2f} BRL")
-                    pair_id = generate_pair_id(d.name, c.name)
-                    origem_id = "saque_atm" if is_saque else f"transfer_pair:{pair_id}"
-                    lines.append(f'  origem_id: "{origem_id}"')
-                    lines.append("")
-                    count += 1
+                if df.iloc[d]["CONTA"] != df.iloc[c]["CONTA"]:
+                    matched_credits.add(c)
+                    pairs.append((d, c))
                     break
 
-    return lines, count
+    return pairs
+
+
+def generate_transfer_entries(
+    df: pd.DataFrame,
+    processed_as_transfer: set[int],
+    pairs: list[tuple[int, int]] | None = None,
+) -> tuple[list[str], int]:
+    """
+    Gera entradas Beancount para transferências pareadas.
+
+    Se `pairs` não for informado, os pares são recalculados a partir de
+    `processed_as_transfer` via pair_transfers().
+    """
+    if pairs is None:
+        pairs = pair_transfers(df, processed_as_transfer)
+
+    d_rows = df.loc[[d for d, _ in pairs]]
+    c_rows = df.loc[[c for _, c in pairs]]
+
+    is_saque = tipo_mask(d_rows, "saque_atm")
+    from_acc = entry_accounts(d_rows).to_numpy()
+    to_acc = np.where(
+        is_saque,
+        rule_account("saque_atm", "credito"),
+        entry_accounts(c_rows).to_numpy(),
+    )
+    pair_ids = [f"transfer_pair:{generate_pair_id(d, c)}" for d, c in pairs]
+    origem_ids = np.where(is_saque, "saque_atm", np.array(pair_ids, dtype=object))
+
+    # Primeira perna é a origem (valor negativo)
+    lines = render_entries(
+        entry_dates(d_rows),
+        np.full(len(pairs), "*", dtype=object),
+        entry_descriptions(d_rows),
+        from_acc,
+        to_acc,
+        -d_rows[CENTS_COLUMN].to_numpy(),
+        origem_ids,
+    )
+    return lines, len(pairs)
 
 
 def generate_orphan_transfer_entries(
     orphans: list[dict[str, Any]],
     df: pd.DataFrame,
 ) -> tuple[list[str], int]:
-    """Gera entradas Beancount para transferências órfãs."""
-    lines = []
-    count = 0
+    """
+    Gera entradas Beancount para transferências órfãs.
 
-    for orphan in orphans:
-        idx = orphan["idx"]
-        row = df.iloc[idx]
+    A conta recebe o valor com o sinal do D/R (D negativo, R positivo), contra
+    Equity:SaldoInicial (saldo inicial), Equity:Ajustes (ajuste) ou
+    Equity:TransferenciasPendentes (demais).
+    """
+    rows = df.loc[[o["idx"] for o in orphans]]
+    tipos = np.array([o.get("tipo") or "" for o in orphans], dtype=object)
+    is_debit = np.array([o["dr"] == "D" for o in orphans], dtype=bool)
+    saldo_inicial = tipos == "saldo_inicial"
+    ajuste = tipos == "ajuste"
+
+    conta = entry_accounts(rows).to_numpy()
+    contrapartida = np.select(
+        [saldo_inicial, ajuste],
+        ["Equity:SaldoInicial", "Equity:Ajustes"],
+        "Equity:TransferenciasPendentes",
+    )
+    assinado = np.where(is_debit, -1, 1) * rows[CENTS_COLUMN].to_numpy()
+    # Saldo inicial e ajuste listam a conta primeiro; as demais, a contrapartida
+    conta_primeiro = saldo_inicial | ajuste
+    origem_ids = np.select(
+        [saldo_inicial, ajuste], ["saldo_inicial", "ajuste_saldo"], "orphan_transfer"
+    )
 
-        date_str = row["Data"].strftime("%Y-%m-%d")
-        desc = sanitize_description(row.get("Descrição", ""))
-        valor = orphan["valor"]
-        dr = orphan["dr"]
-
-        orphan_type = orphan.get("tipo")
-        debug_motivo = orphan.get("debug_motivo", "")
-
-        conta = get_account_path(orphan["conta"])
-
-        if orphan_type == "saldo_inicial":
-            lines.append(f'{date_str} * "{desc}"')
-            lines.append(f"  {conta:40s} {valor:>10.2f} BRL")
-            lines.append(f"  Equity:SaldoInicial {-valor:>10.2f} BRL")
-            lines.append(f'  origem_id: "saldo_inicial"')
-            if debug_motivo:
-                lines.append(f'  debug_motivo: "{debug_motivo}"')
-            lines.append("")
-            count += 1
-
-        elif orphan_type == "ajuste":
-            if dr == "D":
-                lines.append(f'{date_str} * "{desc}"')
-                lines.append(f"  {conta:40s} {valor:>10.2f} BRL")
-                lines.append(f"  Equity:Ajustes {-valor:>10.2f} BRL")
-            else:
-                lines.append(f'{date_str} * "{desc}"')
-                lines.append(f"  Equity:Ajustes {valor:>10.2f} BRL")
-                lines.append(f"  {conta:40s} {-valor:>10.2f} BRL")
-            lines.append(f'  origem_id: "ajuste_saldo"')
-            if debug_motivo:
-                lines.append(f'  debug_motivo: "{debug_motivo}"')
-            lines.append("")
-            count += 1
-
-        else:
-            lines.append(f'{date_str} * "{desc}"')
-            lines.append(f"  Equity:TransferenciasPendentes {valor:>10.2f} BRL")
-            lines.append(f"  {conta:40s} {-valor:>10.2f} BRL")
-            lines.append(f'  origem_id: "orphan_transfer"')
-            if debug_motivo:
-                lines.append(f'  debug_motivo: "{debug_motivo}"')
-            lines.append("")
-            count += 1
-
-    return lines, count
+    lines = render_entries(
+        entry_dates(rows),
+        np.full(len(rows), "*", dtype=object),
+        entry_descriptions(rows),
+        np.where(conta_primeiro, conta, contrapartida),
+        np.where(conta_primeiro, contrapartida, conta),
+        np.where(conta_primeiro, assinado, -assinado),
+        origem_ids,
+        meta={"debug_motivo": [o.get("debug_motivo", "") for o in orphans]},
+    )
+    return lines, len(rows)
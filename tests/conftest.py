@@ -1,6 +1,15 @@
+import sys
+from datetime import datetime
+from pathlib import Path
+
 import pandas as pd
 import pytest
-from datetime import datetime
+
+# Os módulos são scripts soltos (sem pacote): importers/, tools/ e
+# benchmarks/ entram no sys.path antes da coleta dos testes
+ROOT = Path(__file__).parent.parent
+for pasta in ("importers", "tools", "benchmarks"):
+    sys.path.insert(0, str(ROOT / pasta))
 
 
 @pytest.fixture
@@ -0,0 +1,152 @@
+import pandas as pd
+from beancount import loader
+
+from balance_assertions import (
+    build_balance_entries,
+    daily_balances,
+    expected_postings,
+    monthly_assertions,
+    postings_frame,
+)
+from expenses_handler import generate_expense_entries
+from incomes_handler import generate_income_entries
+from organizze_shared import add_cents_column
+
+
+LEDGER = """\
+2024-01-01 open Assets:BR:BbCorrente
+
+2024-01-05 * "Salario"
+  Assets:BR:BbCorrente                        1000.00 BRL
+  Income:Salario                             -1000.00 BRL
+  origem_id: "receita"
+
+2024-01-20 ! "Mercado"
+  Expenses:Alimentacao                          150.50 BRL
+  Assets:BR:BbCorrente                         -150.50 BRL
+
+2024-02-01 balance Assets:BR:BbCorrente         849.50 BRL
+
+2024-02-03 * "Cartao"
+  Expenses:Compras                               80.00 BRL
+  Liabilities:Cartao:Nubank                     -80.00 BRL
+
+2024-03-10 * "Mercado"
+  Expenses:Alimentacao                           49.50 BRL
+  Assets:BR:BbCorrente                          -49.50 BRL
+"""
+
+
+class TestPostingsFrame:
+    def test_only_transaction_postings(self):
+        postings = postings_frame(LEDGER)
+        assert len(postings) == 8
+        assert postings["centavos"].sum() == 0
+        assert postings["centavos"].tolist()[:2] == [100000, -100000]
+        assert postings["data"].iloc[0] == pd.Timestamp("2024-01-05")
+
+    def test_empty_text(self):
+        assert postings_frame("").empty
+
+
+class TestDailyBalances:
+    def test_running_balance_per_account(self):
+        diario = daily_balances(postings_frame(LEDGER))
+        conta = diario[diario["conta"] == "Assets:BR:BbCorrente"]
+        assert conta["saldo"].tolist() == [100000, 84950, 80000]
+
+
+class TestMonthlyAssertions:
+    def test_closed_months_only(self):
+        assertions = monthly_assertions(daily_balances(postings_frame(LEDGER)))
+        # Último mês de cada conta fica aberto; Expenses/Income ficam de fora
+        assert assertions["conta"].tolist() == ["Assets:BR:BbCorrente"]
+        assert assertions["saldo"].tolist() == [84950]
+
+    def test_assertion_dated_first_day_of_next_month(self):
+        lines, count = build_balance_entries(postings_frame(LEDGER))
+        assert count == 1
+        assert lines[0].split() == [
+            "2024-02-01",
+            "balance",
+            "Assets:BR:BbCorrente",
+            "849.50",
+            "BRL",
+        ]
+
+
+def _organizze_frame():
+    df = pd.DataFrame(
+        {
+            "Data": pd.to_datetime(
+                ["2024-01-05", "2024-01-20", "2024-02-03", "2024-03-10"]
+            ),
+            "Descrição": ["Salario", "Mercado", "Farmacia", "Mercado"],
+            "Categoria": ["Salario", "Alimentacao", "Saude", "Alimentacao"],
+            "Valor": [1000.00, 150.50, 80.00, 49.50],
+            "D/R": ["R", "D", "D", "D"],
+            "CONTA": ["BbCorrente", "BbCorrente", "C6Bank", "BbCorrente"],
+            "Situação": "Pago",
+        }
+    )
+    return add_cents_column(df)
+
+
+def _bean_check(esperado: pd.DataFrame, importado: pd.DataFrame) -> list:
+    """Erros do Beancount: asserções de `esperado` sobre o ledger de `importado`."""
+    balances, _ = build_balance_entries(expected_postings(esperado))
+    history = (
+        generate_expense_entries(importado, set())[0]
+        + generate_income_entries(importado, set())[0]
+    )
+    contas = [
+        "Assets:BR:BbCorrente",
+        "Assets:BR:C6Bank",
+        "Expenses:Alimentacao",
+        "Expenses:Saude",
+        "Income:Salario",
+    ]
+    opens = [f"2024-01-01 open {conta}" for conta in contas]
+    _, errors, _ = loader.load_string("\n".join(opens + balances + history))
+    return errors
+
+
+class TestExpectedPostings:
+    def test_signed_by_dr_on_row_account(self):
+        postings = expected_postings(_organizze_frame())
+        assert postings["conta"].tolist()[:3] == [
+            "Assets:BR:BbCorrente",
+            "Assets:BR:BbCorrente",
+            "Assets:BR:C6Bank",
+        ]
+        assert postings["centavos"].tolist() == [100000, -15050, -8000, -4950]
+
+    def test_card_payment_also_moves_the_card(self):
+        df = _organizze_frame()
+        postings = expected_postings(df, {1: "Saraiva"})
+        cartao = postings[postings["conta"] == "Liabilities:Cartao:Saraiva"]
+        assert cartao["centavos"].tolist() == [15050]
+        assert cartao["data"].tolist() == [df.at[1, "Data"]]
+
+    def test_conta_beancount_override(self):
+        df = _organizze_frame().assign(conta_beancount=[None, None, None, "Assets:X"])
+        assert expected_postings(df)["conta"].iloc[3] == "Assets:X"
+
+
+class TestAssertionsCatchImportErrors:
+    def test_correct_import_passes(self):
+        df = _organizze_frame()
+        assert _bean_check(df, df) == []
+
+    def test_misrouted_row_fails(self):
+        df = _organizze_frame()
+        errado = df.copy()
+        errado.loc[1, "CONTA"] = "C6Bank"
+
+        errors = _bean_check(df, errado)
+        assert len(errors) == 1
+        assert "Assets:BR:BbCorrente" in errors[0].message
+
+    def test_dropped_row_fails(self):
+        df = _organizze_frame()
+        assert _bean_check(df, df.drop(index=1))
@@ -0,0 +1,33 @@
+import json
+
+from bench_common import check_baseline, compare, load_baseline, measure, save_baseline
+
+
+class TestMeasure:
+    def test_prepares_each_repetition(self):
+        preparados, recebidos = [], []
+
+        def preparar():
+            preparados.append(len(preparados))
+            return preparados[-1]
+
+        medida = measure(recebidos.append, repeticoes=3, preparar=preparar)
+        assert recebidos == [0, 1, 2]
+        assert medida["repeticoes"] == 3
+
+
+class TestBaseline:
+    def test_missing_baseline_is_reported(self, tmp_path, capsys):
+        assert not check_baseline(tmp_path / "importer.json")
+        assert "--salvar" in capsys.readouterr().err
+
+    def test_round_trip_and_compare(self, tmp_path):
+        path = tmp_path / "importer.json"
+        results = {"caso@10": {"caso": "caso", "tamanho": 10, "melhor": 1.0}}
+        save_baseline(path, results, seed=1)
+        assert check_baseline(path)
+        assert json.loads(path.read_text())["seed"] == 1
+
+        depois = {"caso@10": {"caso": "caso", "tamanho": 10, "melhor": 2.0}}
+        (linha,) = compare(depois, load_baseline(path))
+        assert linha["regressao"]
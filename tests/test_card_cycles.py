@@ -0,0 +1,211 @@
+import pandas as pd
+import pytest
+from beancount import loader
+from datetime import datetime
+
+import card_cycles
+import card_payments_handler
+import organizze_v5
+from balance_assertions import postings_frame
+from card_cycles import (
+    charge_cycle_keys,
+    closing_day,
+    compute_charge_frame,
+    compute_cycle_statements,
+    cycle_dates,
+    generate_cycle_entries,
+    load_cycle_config,
+    payment_cycle_keys,
+)
+from organizze_shared import add_cents_column
+
+
+CONFIG = {"Saraiva": {"fechamento": 5, "vencimento": 15}}
+
+
+def _df(rows):
+    data = {
+        "Data": [r[0] for r in rows],
+        "Descrição": [r[1] for r in rows],
+        "Valor": [r[2] for r in rows],
+        "D/R": [r[3] for r in rows],
+        "CONTA": [r[4] for r in rows],
+        "Categoria": ["Outros"] * len(rows),
+        "Situação": ["Pago"] * len(rows),
+    }
+    return add_cents_column(pd.DataFrame(data))
+
+
+def _statement_df():
+    return _df(
+        [
+            (datetime(2024, 1, 3), "Mercado", -100.00, "D", "Saraiva"),
+            (datetime(2024, 1, 10), "Farmácia", -50.00, "D", "Saraiva"),
+            (datetime(2024, 1, 12), "Estorno farmácia", 20.00, "R", "Saraiva"),
+            (datetime(2024, 1, 15), "Pagamento fatura", -100.00, "D", "BbCorrente"),
+            (datetime(2024, 2, 6), "Pagamento fatura", -10.00, "D", "BbCorrente"),
+        ]
+    )
+
+
+class TestCycleKeys:
+    def test_charge_on_closing_day_stays_in_cycle(self):
+        dates = pd.Series([datetime(2024, 1, 5), datetime(2024, 1, 6)])
+        keys = charge_cycle_keys(dates, 5)
+        assert keys[1] == keys[0] + 1
+
+    def test_payment_on_closing_day_pays_previous_cycle(self):
+        dates = pd.Series([datetime(2024, 2, 5), datetime(2024, 2, 6)])
+        keys = payment_cycle_keys(dates, 5)
+        assert keys[0] == 2024 * 12 + 0
+        assert keys[1] == 2024 * 12 + 1
+
+    def test_cycle_dates_clamp_to_month_end(self):
+        dates = cycle_dates([2024 * 12 + 1], [31])
+        assert dates.iloc[0] == pd.Timestamp(2024, 2, 29)
+
+
+class TestComputeChargeFrame:
+    def test_conta_beancount_reroutes_rows(self):
+        df = _df(
+            [
+                (datetime(2024, 1, 3), "Mercado", -100.00, "D", "Saraiva"),
+                (datetime(2024, 1, 4), "Empréstimo", -32.15, "D", "Saraiva"),
+                (datetime(2024, 1, 4), "Compra", -7.00, "D", "BbCorrente"),
+            ]
+        )
+        df["conta_beancount"] = [
+            None,
+            "Assets:BR:Emprestimos",
+            "Liabilities:Cartao:Saraiva",
+        ]
+        charges = compute_charge_frame(df, CONFIG)
+        assert charges["cartao"].tolist() == ["Saraiva", "Saraiva"]
+        assert charges["centavos"].tolist() == [10000, 700]
+
+
+class TestComputeCycleStatements:
+    def test_paid_in_full(self):
+        stmt = compute_cycle_statements(
+            _statement_df(), {3: "Saraiva", 4: "Saraiva"}, CONFIG
+        )
+        jan, fev = stmt.to_dict("records")
+        assert (jan["compras"], jan["pagamentos"], jan["quitada"]) == (
+            10000,
+            10000,
+            True,
+        )
+        assert fev["compras"] == 3000
+        assert fev["saldo_fatura"] == 3000
+        assert not fev["quitada"]
+        assert fev["diferenca"] == 2000
+
+    def test_unpaid_balance_carries_over(self):
+        stmt = compute_cycle_statements(_statement_df(), {}, CONFIG)
+        assert stmt["saldo_fatura"].tolist() == [10000, 13000]
+
+    def test_due_date_in_next_month_when_before_closing(self):
+        config = {"Saraiva": {"fechamento": 25, "vencimento": 5}}
+        stmt = compute_cycle_statements(_statement_df(), {}, config)
+        first = stmt.iloc[0]
+        assert first["fechamento"] == pd.Timestamp(2024, 1, 25)
+        assert first["vencimento"] == pd.Timestamp(2024, 2, 5)
+
+    def test_unconfigured_card_is_reported(self, caplog):
+        df = _df([(datetime(2024, 1, 3), "Compra", -10.00, "D", "LatamPass")])
+        with caplog.at_level("ERROR", logger="card_cycles"):
+            stmt = compute_cycle_statements(df, {}, CONFIG)
+        assert stmt.empty
+        assert "LatamPass" in caplog.records[0].getMessage()
+
+    def test_empty_input(self):
+        df = _df([(datetime(2024, 1, 3), "Mercado", -100.00, "D", "BbCorrente")])
+        assert compute_cycle_statements(df, {}, CONFIG).empty
+
+
+class TestGenerateCycleEntries:
+    def test_balance_assertion_and_pad_candidate(self):
+        stmt = compute_cycle_statements(
+            _statement_df(), {3: "Saraiva", 4: "Saraiva"}, CONFIG
+        )
+        lines, count = generate_cycle_entries(stmt)
+        assert count == 2
+        assert lines[0].startswith("2024-01-06 balance Liabilities:Cartao:Saraiva")
+        assert lines[0].endswith("-100.00 BRL")
+        assert not any("pad" in line for line in lines[:3])
+        assert "; 2024-02-15 pad Liabilities:Cartao:Saraiva Equity:Ajustes" in lines
+
+    def test_assertion_follows_ledger_postings_outside_the_invoice(self):
+        stmt = compute_cycle_statements(
+            _statement_df(), {3: "Saraiva", 4: "Saraiva"}, CONFIG
+        )
+        postings = pd.DataFrame(
+            {
+                "data": [pd.Timestamp(2024, 1, 2), pd.Timestamp(2024, 1, 3)],
+                "conta": ["Liabilities:Cartao:Saraiva"] * 2,
+                "centavos": [5000, -10000],
+            }
+        )
+        lines, _ = generate_cycle_entries(stmt, postings)
+        assert lines[0].endswith("-50.00 BRL")
+        assert lines[2].startswith("; saldo do cartão tem 50.00 fora da fatura")
+
+
+def _export_with_card_extras():
+    """Compras e pagamentos do Saraiva mais lançamentos no cartão fora da fatura."""
+    return _df(
+        [
+            (datetime(2024, 1, 1), "Salário", 1000.00, "R", "BbCorrente"),
+            (datetime(2024, 1, 2), "Saldo inicial", -80.00, "D", "Saraiva"),
+            (datetime(2024, 1, 3), "Mercado", -100.00, "D", "Saraiva"),
+            (datetime(2024, 1, 4), "Ajuste", 30.00, "R", "Saraiva"),
+            (datetime(2024, 1, 10), "Transferência", 50.00, "R", "Saraiva"),
+            (datetime(2024, 1, 15), "Pagamento fatura", -100.00, "D", "BbCorrente"),
+            (datetime(2024, 1, 16), "Pagamento recebido", 60.00, "R", "Saraiva"),
+            (datetime(2024, 2, 3), "Farmácia", -40.00, "D", "Saraiva"),
+            (datetime(2024, 3, 3), "Padaria", -10.00, "D", "Saraiva"),
+        ]
+    ).assign(
+        Categoria=["Salário", "Transferências", "Alimentação", "Transferências"]
+        + ["Transferências", "Pagamento de fatura", "Outros", "Saúde", "Alimentação"],
+        conta_beancount="",
+    )
+
+
+class TestCycleEntriesAgainstLedger:
+    @pytest.fixture(autouse=True)
+    def ciclos(self, monkeypatch):
+        for module in (card_cycles, card_payments_handler):
+            monkeypatch.setattr(module, "get_cycle_config", lambda: CONFIG)
+
+    def test_bean_check_with_history(self, tmp_path):
+        entrada = tmp_path / "export.csv"
+        _export_with_card_extras().drop(columns=["valor_centavos"]).to_csv(
+            entrada, index=False
+        )
+        ledger = tmp_path / "ledger"
+        organizze_v5.main(["--entrada", str(entrada), "--ledger", str(ledger)])
+
+        history = (ledger / "history.beancount").read_text(encoding="utf-8")
+        ciclos = (ledger / "ciclos_cartoes.beancount").read_text(encoding="utf-8")
+        assert ciclos.count(" balance Liabilities:Cartao:Saraiva") == 3
+        opens = [
+            f"2000-01-01 open {conta}"
+            for conta in postings_frame(history)["conta"].unique()
+        ]
+        _, errors, _ = loader.load_string("\n".join(opens + [ciclos, history]))
+        assert errors == []
+
+
+class TestLoadCycleConfig:
+    def test_rejects_invalid_day(self, tmp_path):
+        path = tmp_path / "ciclos.yaml"
+        path.write_text("cartoes:\n  X:\n    fechamento: 0\n    vencimento: 10\n")
+        with pytest.raises(ValueError):
+            load_cycle_config(path)
+
+    def test_closing_day_requires_configured_card(self, monkeypatch):
+        monkeypatch.setattr(card_cycles, "get_cycle_config", lambda: CONFIG)
+        assert closing_day("Saraiva") == 5
+        with pytest.raises(ValueError, match="LatamPass"):
+            closing_day("LatamPass")
@@ -2,53 +2,42 @@ import pandas as pd
 import pytest
 from datetime import datetime
 
-import sys
-
-sys.path.insert(0, "/home/s015533607/Documentos/desenv/pla/importers")
-
+import card_cycles
+import card_payments_handler
 from card_payments_handler import (
-    _get_cartao_from_conta,
+    compute_cycle_totals,
+    detect_card_payment_indices,
+    match_payments_by_invoice,
     identify_card_payment_indices,
     generate_card_payment_entries,
 )
+from card_routing import route_payments
+from organizze_shared import add_cents_column, ACCOUNTS_TYPE
 
 
-class TestGetCartaoFromConta:
-    def test_banco_inter_returns_cartao_inter(self):
-        result = _get_cartao_from_conta("BancoInter", "qualquer", datetime(2024, 1, 1))
-        assert result == "CartaoDeCreditoInter"
-
-    def test_c6bank_returns_mastercard(self):
-        result = _get_cartao_from_conta("C6Bank", "qualquer", datetime(2024, 1, 1))
-        assert result == "MastercardC6Bank"
-
-    def test_itau_returns_latam(self):
-        result = _get_cartao_from_conta(
-            "ItauPersonalite", "qualquer", datetime(2024, 1, 1)
-        )
-        assert result == "LatamPass"
-
-    def test_bb_before_threshold_returns_saraiva(self):
-        result = _get_cartao_from_conta("BbCorrente", "qualquer", datetime(2023, 1, 1))
-        assert result == "Saraiva"
-
-    def test_bb_smiles_after_threshold_returns_smiles(self):
-        result = _get_cartao_from_conta("BbCorrente", "Smiles", datetime(2024, 1, 1))
-        assert result == "SmilesBbPlatinum"
-
-    def test_bb_other_after_threshold_returns_saraiva(self):
-        result = _get_cartao_from_conta("BbCorrente", "Fatura", datetime(2024, 1, 1))
-        assert result == "Saraiva"
-
-    def test_bb_after_2025_returns_pendente(self):
-        result = _get_cartao_from_conta("BbCorrente", "Fatura", datetime(2025, 3, 1))
-        assert result == "BbCorrente_Pendente"
-
-    def test_unknown_conta_returns_none(self):
-        result = _get_cartao_from_conta(
-            "ContaDesconhecida", "qualquer", datetime(2024, 1, 1)
-        )
-        assert result is None
+class TestRoutePayments:
+    def test_routes_each_payment_to_its_card(self):
+        rows = [
+            ("BancoInter", "qualquer", datetime(2024, 1, 1)),
+            ("C6Bank", "qualquer", datetime(2024, 1, 1)),
+            ("ItauPersonalite", "qualquer", datetime(2024, 1, 1)),
+            ("BbCorrente", "qualquer", datetime(2023, 1, 1)),
+            ("BbCorrente", "Smiles", datetime(2024, 1, 1)),
+            ("BbCorrente", "Fatura", datetime(2024, 1, 1)),
+            ("BbCorrente", "Fatura", datetime(2025, 3, 1)),
+            ("ContaDesconhecida", "qualquer", datetime(2024, 1, 1)),
+        ]
+        contas, descs, datas = (pd.Series(col) for col in zip(*rows))
+        assert route_payments(contas, descs, datas).tolist() == [
+            "CartaoDeCreditoInter",
+            "MastercardC6Bank",
+            "LatamPass",
+            "Saraiva",
+            "SmilesBbPlatinum",
+            "Saraiva",
+            "BbCorrente_Pendente",
+            None,
+        ]
 
 
 class TestIdentifyCardPaymentIndices:
@@ -62,7 +51,7 @@ class TestIdentifyCardPaymentIndices:
             "Categoria": ["Outros"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         result = identify_card_payment_indices(df)
         assert 0 in result
 
@@ -76,7 +65,7 @@ class TestIdentifyCardPaymentIndices:
             "Categoria": ["Outros"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         result = identify_card_payment_indices(df)
         assert 0 in result
 
@@ -90,7 +79,7 @@ class TestIdentifyCardPaymentIndices:
             "Categoria": ["Outros"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         result = identify_card_payment_indices(df)
         assert len(result) == 0
 
@@ -104,11 +93,78 @@ class TestIdentifyCardPaymentIndices:
             "Categoria": ["Outros"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         result = identify_card_payment_indices(df)
         assert len(result) == 0
 
 
+class TestDetectCardPaymentIndices:
+    @staticmethod
+    def _reference_indices(df):
+        """Implementação linha a linha anterior, usada como referência."""
+        indices = set()
+        for idx, row in df.iterrows():
+            if row["D/R"] != "D":
+                continue
+            cat = row.get("Categoria", "")
+            desc = (
+                str(row.get("Descrição", "")).lower()
+                if pd.notna(row.get("Descrição"))
+                else ""
+            )
+            if pd.notna(cat) and str(cat).lower() in ["outros", "pagamento de fatura"]:
+                if any(
+                    kw in desc for kw in ["pagamento", "fatura", "invoice", "payment"]
+                ):
+                    if ACCOUNTS_TYPE.get(row.get("CONTA", "")) == "Assets":
+                        indices.add(idx)
+        return indices
+
+    def test_matches_row_by_row_reference(self):
+        data = {
+            "Data": [datetime(2024, 1, d) for d in range(1, 9)],
+            "Descrição": [
+                "Pagamento de fatura",
+                None,
+                "FATURA Smiles",
+                "Payment",
+                "Mercado",
+                "Pagamento de fatura",
+                "invoice",
+                "Pagamento",
+            ],
+            "Valor": [-500.00] * 8,
+            "D/R": ["D", "D", "D", "D", "D", "R", "D", "D"],
+            "CONTA": [
+                "BbCorrente",
+                "BbCorrente",
+                "C6Bank",
+                "Saraiva",
+                "BbCorrente",
+                "BbCorrente",
+                "ContaDesconhecida",
+                "BancoInter",
+            ],
+            "Categoria": [
+                "Outros",
+                "Outros",
+                "Pagamento de fatura",
+                "Outros",
+                "Outros",
+                "Outros",
+                "Outros",
+                None,
+            ],
+            "Situação": ["Pago"] * 8,
+        }
+        df = add_cents_column(pd.DataFrame(data))
+        result = detect_card_payment_indices(df)
+        assert set(result.tolist()) == self._reference_indices(df) == {0, 2}
+
+    def test_empty_df(self, empty_df):
+        assert len(detect_card_payment_indices(add_cents_column(empty_df))) == 0
+
+
 class TestGenerateCardPaymentEntries:
     def test_generates_entry(self):
         data = {
@@ -120,7 +176,7 @@ class TestGenerateCardPaymentEntries:
             "Categoria": ["Outros"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         lines, count = generate_card_payment_entries(df, {0})
         assert count == 1
         assert "Liabilities:Cartao:Saraiva" in lines[1]
@@ -135,7 +191,7 @@ class TestGenerateCardPaymentEntries:
             "Categoria": ["Outros"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         lines, count = generate_card_payment_entries(df, {0})
         assert count == 1
         assert "Liabilities:Cartao:CartaoDeCreditoInter" in lines[1]
@@ -150,7 +206,97 @@ class TestGenerateCardPaymentEntries:
             "Categoria": ["Outros"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         lines, count = generate_card_payment_entries(df, set())
         assert count == 0
         assert len(lines) == 0
+
+
+def _bb_invoice_df():
+    data = {
+        "Data": [
+            datetime(2025, 2, 5),
+            datetime(2025, 2, 20),
+            datetime(2025, 2, 10),
+            datetime(2025, 2, 12),
+            datetime(2025, 3, 10),
+            datetime(2025, 3, 10),
+            datetime(2025, 3, 11),
+        ],
+        "Descrição": [
+            "Livraria",
+            "Livraria",
+            "Restaurante",
+            "Estorno restaurante",
+            "Pagamento de fatura",
+            "Pagamento de fatura",
+            "Pagamento de fatura",
+        ],
+        "Valor": [-600.00, -400.00, -350.00, 50.00, -1000.00, -300.00, -77.00],
+        "D/R": ["D", "D", "D", "R", "D", "D", "D"],
+        "CONTA": [
+            "Saraiva",
+            "Saraiva",
+            "SmilesBbPlatinum",
+            "SmilesBbPlatinum",
+            "BbCorrente",
+            "BbCorrente",
+            "BbCorrente",
+        ],
+        "Categoria": [
+            "Compras",
+            "Compras",
+            "Alimentação",
+            "Alimentação",
+            "Outros",
+            "Outros",
+            "Outros",
+        ],
+        "Situação": ["Pago"] * 7,
+    }
+    return add_cents_column(pd.DataFrame(data))
+
+
+BB_CYCLES = {
+    "Saraiva": {"fechamento": 1, "vencimento": 10},
+    "SmilesBbPlatinum": {"fechamento": 1, "vencimento": 10},
+}
+
+
+@pytest.fixture
+def bb_cycles(monkeypatch):
+    for module in (card_cycles, card_payments_handler):
+        monkeypatch.setattr(module, "get_cycle_config", lambda: BB_CYCLES)
+
+
+@pytest.mark.usefixtures("bb_cycles")
+class TestInvoiceMatching:
+    def test_cycle_totals_net_refunds(self):
+        totals = compute_cycle_totals(_bb_invoice_df())
+        ciclo = 2025 * 12 + 2
+        assert totals["Saraiva"] == {ciclo: 100000}
+        assert totals["SmilesBbPlatinum"] == {ciclo: 30000}
+
+    def test_matches_payment_to_invoice_total(self):
+        df = _bb_invoice_df()
+        result = match_payments_by_invoice(df, [4, 5, 6])
+        assert result == {4: "Saraiva", 5: "SmilesBbPlatinum"}
+
+    def test_invoice_match_overrides_month_heuristic(self):
+        df = _bb_invoice_df()
+        lines, count = generate_card_payment_entries(df, {4, 5, 6})
+        assert count == 3
+        headers = [i for i, line in enumerate(lines) if line.startswith("2025")]
+        by_value = {lines[i + 2].split()[-2]: lines[i + 1] for i in headers}
+        assert "Liabilities:Cartao:Saraiva" in by_value["-1000.00"]
+        assert "Liabilities:Cartao:SmilesBbPlatinum" in by_value["-300.00"]
+        assert "Liabilities:Cartao:SmilesBbPlatinum" in by_value["-77.00"]
+
+
+def test_unconfigured_cycles_fall_back_to_heuristic(monkeypatch):
+    for module in (card_cycles, card_payments_handler):
+        monkeypatch.setattr(module, "get_cycle_config", lambda: {})
+    df = _bb_invoice_df()
+    assert match_payments_by_invoice(df, [4, 5, 6]) == {}
+    lines, count = generate_card_payment_entries(df, {4, 5, 6})
+    assert count == 3
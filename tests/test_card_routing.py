@@ -0,0 +1,87 @@
+import pandas as pd
+import pytest
+from datetime import datetime
+
+from card_routing import (
+    CARTAO_PENDENTE,
+    compile_routing_rules,
+    get_compiled_routing,
+    load_routing_rules,
+    route_payments,
+)
+
+
+def _route(rows, compiled=None):
+    contas = pd.Series([r[0] for r in rows])
+    descs = pd.Series([r[1] for r in rows])
+    datas = pd.Series([r[2] for r in rows])
+    return route_payments(contas, descs, datas, compiled).tolist()
+
+
+class TestCompileRoutingRules:
+    def test_pattern_rules_take_precedence(self):
+        compiled = compile_routing_rules(
+            [
+                {"conta": "X", "cartao": "Padrao"},
+                {"conta": "X", "cartao": "Especial", "padrao": "vip"},
+            ]
+        )
+        rows = [
+            ("X", "Fatura VIP", datetime(2024, 1, 1)),
+            ("X", "Fatura", datetime(2024, 1, 1)),
+        ]
+        assert _route(rows, compiled) == ["Especial", "Padrao"]
+
+    def test_interval_bounds(self):
+        compiled = compile_routing_rules(
+            [
+                {"conta": "X", "cartao": "A", "fim": "2024-01-10"},
+                {"conta": "X", "cartao": "B", "inicio": "2024-01-10"},
+            ]
+        )
+        rows = [("X", "", datetime(2024, 1, 9)), ("X", "", datetime(2024, 1, 10))]
+        assert _route(rows, compiled) == ["A", "B"]
+
+    def test_gap_between_rules_returns_none(self):
+        compiled = compile_routing_rules(
+            [
+                {"conta": "X", "cartao": "A", "fim": "2024-01-10"},
+                {"conta": "X", "cartao": "B", "inicio": "2024-02-01"},
+            ]
+        )
+        assert _route([("X", "", datetime(2024, 1, 15))], compiled) == [None]
+
+    def test_rule_without_conta_is_rejected(self, tmp_path):
+        path = tmp_path / "regras.yaml"
+        path.write_text("regras:\n  - cartao: A\n")
+        with pytest.raises(ValueError):
+            load_routing_rules(path)
+
+
+class TestDefaultRouting:
+    def test_matches_historical_thresholds(self):
+        rows = [
+            ("BancoInter", "Pagamento", datetime(2024, 1, 1)),
+            ("BbCorrente", "Pagamento Smiles", datetime(2023, 4, 9)),
+            ("BbCorrente", "Pagamento SMILES", datetime(2023, 4, 10)),
+            ("BbCorrente", "Pagamento", datetime(2025, 1, 31)),
+            ("BbCorrente", "Pagamento", datetime(2025, 2, 1)),
+            ("Desconhecida", "Pagamento", datetime(2024, 1, 1)),
+        ]
+        assert _route(rows, get_compiled_routing()) == [
+            "CartaoDeCreditoInter",
+            "Saraiva",
+            "SmilesBbPlatinum",
+            "Saraiva",
+            CARTAO_PENDENTE,
+            None,
+        ]
+
+    def test_preserves_index(self):
+        contas = pd.Series(["C6Bank"], index=[7])
+        result = route_payments(
+            contas,
+            pd.Series([""], index=[7]),
+            pd.Series([datetime(2024, 1, 1)], index=[7]),
+        )
+        assert result.to_dict() == {7: "MastercardC6Bank"}
@@ -0,0 +1,100 @@
+import pandas as pd
+import pytest
+from datetime import datetime
+
+from classification_rules import (
+    classify,
+    compile_classification_rules,
+    load_classification_rules,
+    rule_account,
+    tipo_indices,
+)
+
+
+def _df():
+    data = {
+        "Data": [
+            datetime(2024, 1, 10),
+            datetime(2024, 1, 11),
+            datetime(2024, 1, 12),
+            datetime(2024, 1, 13),
+            datetime(2024, 1, 14),
+        ],
+        "Descrição": [
+            "Pagamento de título",
+            "Saldo inicial",
+            "Ajuste de saldo",
+            "Transferência",
+            None,
+        ],
+        "Valor": [-10.0, 100.0, -5.0, -50.0, -1.0],
+        "D/R": ["D", "R", "D", "D", "D"],
+        "CONTA": ["BbCorrente", "BbCorrente", "Saraiva", "BbCorrente", "Saraiva"],
+        "Categoria": ["Moradia", "Outros", "Outros", "Transferências", "Outros"],
+        "Situação": ["Pago", "Pago", "Pago", "Agendado", "Pago"],
+    }
+    return pd.DataFrame(data)
+
+
+class TestDefaultRules:
+    def test_tipo_indices(self):
+        df = _df()
+        assert tipo_indices(df, "boleto") == {0}
+        assert tipo_indices(df, "despesa_cartao") == {2, 4}
+        assert tipo_indices(df, "ajuste_saldo") == {2}
+
+    def test_classify_uses_file_order(self):
+        result = classify(_df())
+        assert result["tipo"].tolist() == [
+            "boleto",
+            "saldo_inicial",
+            "ajuste",
+            "transferencia",
+            "transferencia",
+        ]
+        assert result.at[2, "regra"] == "ajuste_transferencia"
+
+    def test_classify_restricted_to_tipos(self):
+        result = classify(_df(), {"despesa_cartao"})
+        assert result["tipo"].tolist() == [
+            None,
+            None,
+            "despesa_cartao",
+            None,
+            "despesa_cartao",
+        ]
+
+    def test_rule_account(self):
+        assert rule_account("boleto", "debito") == "Expenses:Boletos"
+        with pytest.raises(KeyError):
+            rule_account("boleto", "credito")
+
+
+class TestCustomRules:
+    def test_conditions_are_combined(self):
+        rules = compile_classification_rules(
+            [
+                {
+                    "nome": "agendado_bb",
+                    "tipo": "agendado",
+                    "conta": ["BbCorrente"],
+                    "situacao": "Agendado",
+                    "inicio": "2024-01-13",
+                    "fim": "2024-01-14",
+                },
+            ]
+        )
+        result = classify(_df(), rules=rules)
+        assert result["tipo"].tolist() == [None, None, None, "agendado", None]
+
+    def test_unknown_field_is_rejected(self, tmp_path):
+        path = tmp_path / "regras.yaml"
+        path.write_text("regras:\n  - nome: x\n    tipo: y\n    descricão: [a]\n")
+        with pytest.raises(ValueError):
+            load_classification_rules(path)
+
+    def test_duplicate_name_is_rejected(self, tmp_path):
+        path = tmp_path / "regras.yaml"
+        path.write_text("regras:\n  - nome: x\n    tipo: y\n  - nome: x\n    tipo: z\n")
+        with pytest.raises(ValueError):
+            load_classification_rules(path)
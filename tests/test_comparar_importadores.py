@@ -0,0 +1,61 @@
+from beancount.parser import parser
+
+from comparar_importadores import compare_transactions, entry_key
+
+
+def _transactions(text):
+    entries, errors, _ = parser.parse_string(text)
+    assert not errors
+    return entries
+
+
+REFERENCIA = """
+2024-01-15 * "Supermercado"
+  Expenses:Alimentacao   150.50 BRL
+  Assets:BR:BbCorrente  -150.50 BRL
+
+2024-01-20 * "Transferência"
+  Assets:BR:BancoInter   200.00 BRL
+  Assets:BR:BbCorrente  -200.00 BRL
+"""
+
+
+class TestCompareTransactions:
+    def test_same_entries_in_any_order_are_equivalent(self):
+        ref = _transactions(REFERENCIA)
+        diffs = compare_transactions(ref, list(reversed(ref)))
+        assert diffs == {"so_referencia": [], "so_candidato": [], "alterados": []}
+
+    def test_key_ignores_posting_order_and_amount_format(self):
+        a = _transactions(
+            '2024-01-15 * "x"\n  Assets:A  10.0 BRL\n  Expenses:B  -10.0 BRL\n'
+        )
+        b = _transactions(
+            '2024-01-15 * "y"\n  Expenses:B  -10.00 BRL\n  Assets:A  10.00 BRL\n'
+        )
+        assert entry_key(a[0]) == entry_key(b[0])
+
+    def test_reports_missing_extra_and_changed_entries(self):
+        ref = _transactions(REFERENCIA)
+        cand = _transactions(
+            """
+2024-01-15 ! "Supermercado"
+  Expenses:Alimentacao   150.50 BRL
+  Assets:BR:BbCorrente  -150.50 BRL
+
+2024-01-21 * "Transferência"
+  Assets:BR:BancoInter   200.00 BRL
+  Assets:BR:BbCorrente  -200.00 BRL
+"""
+        )
+        diffs = compare_transactions(ref, cand)
+        assert [str(k[0]) for k in diffs["so_referencia"]] == ["2024-01-20"]
+        assert [str(k[0]) for k in diffs["so_candidato"]] == ["2024-01-21"]
+        assert [(a, d) for _, a, d in diffs["alterados"]] == [
+            (("*", "Supermercado"), ("!", "Supermercado"))
+        ]
+
+    def test_duplicates_count_as_differences(self):
+        ref = _transactions(REFERENCIA)
+        diffs = compare_transactions(ref, ref + ref[:1])
+        assert len(diffs["so_candidato"]) == 1
@@ -0,0 +1,116 @@
+import pandas as pd
+from datetime import datetime
+
+from entry_renderer import (
+    LINES_PER_ENTRY,
+    conta_beancount_override,
+    render_entries,
+    render_postings,
+    render_rows,
+)
+from organizze_shared import add_cents_column, format_cents, format_cents_array
+
+
+class TestFormatCentsArray:
+    def test_matches_scalar_version(self):
+        cents = [0, 5, -5, 99, 100, -123456, 10**9]
+        assert list(format_cents_array(cents)) == [format_cents(c) for c in cents]
+
+
+class TestRenderEntries:
+    def test_matches_fstring_layout(self):
+        lines = render_entries(
+            ["2024-01-15"],
+            ["*"],
+            ["Mercado"],
+            ["Expenses:Alimentacao"],
+            ["Assets:BR:BbCorrente"],
+            [12345],
+            "despesa",
+        )
+        assert lines == [
+            '2024-01-15 * "Mercado"',
+            f"  {'Expenses:Alimentacao':40s} {'123.45':>10} BRL",
+            f"  {'Assets:BR:BbCorrente':40s} {'-123.45':>10} BRL",
+            '  origem_id: "despesa"',
+            "",
+        ]
+
+    def test_per_entry_origem_and_scalar_account(self):
+        lines = render_entries(
+            ["2024-01-15", "2024-01-16"],
+            ["*", "!"],
+            ["A", "B"],
+            "Expenses:Boletos",
+            ["Assets:BR:C6Bank", "Assets:BR:BancoInter"],
+            [100, 200],
+            ["x", "y"],
+        )
+        assert len(lines) == 2 * LINES_PER_ENTRY
+        assert lines[5] == '2024-01-16 ! "B"'
+        assert lines[6].startswith("  Expenses:Boletos ")
+        assert lines[8] == '  origem_id: "y"'
+
+    def test_long_account_is_not_truncated(self):
+        account = "Expenses:" + "X" * 50
+        lines = render_entries(["2024-01-15"], ["*"], ["A"], [account], ["B"], [1], "o")
+        assert lines[1] == f"  {account:40s} {'0.01':>10} BRL"
+
+    def test_empty_batch(self):
+        assert render_entries([], [], [], [], [], [], "despesa") == []
+
+
+class TestRenderPostings:
+    def test_empty_accounts_and_meta_are_omitted(self):
+        lines = render_postings(
+            ["2024-01-15", "2024-01-16"],
+            "*",
+            ["A", "B"],
+            [
+                (["Assets:BR:BbCorrente", "Assets:BR:C6Bank"], [-300, -200]),
+                ("Assets:BR:BancoInter", [299, 200]),
+                (["Equity:Ajustes", ""], [1, 0]),
+            ],
+            {"origem_id": ["x", "y"], "debug_motivo": ["", "sem_par"]},
+        )
+        assert lines == [
+            '2024-01-15 * "A"',
+            f"  {'Assets:BR:BbCorrente':40s} {'-3.00':>10} BRL",
+            f"  {'Assets:BR:BancoInter':40s} {'2.99':>10} BRL",
+            f"  {'Equity:Ajustes':40s} {'0.01':>10} BRL",
+            '  origem_id: "x"',
+            "",
+            '2024-01-16 * "B"',
+            f"  {'Assets:BR:C6Bank':40s} {'-2.00':>10} BRL",
+            f"  {'Assets:BR:BancoInter':40s} {'2.00':>10} BRL",
+            '  origem_id: "y"',
+            '  debug_motivo: "sem_par"',
+            "",
+        ]
+
+
+class TestRenderRows:
+    def _df(self):
+        df = pd.DataFrame(
+            {
+                "Data": [datetime(2024, 1, 15), datetime(2024, 1, 16)],
+                "Descrição": ['Loja "X"\nabc', None],
+                "Valor": [-10.5, -20.0],
+                "D/R": ["D", "D"],
+                "CONTA": ["BbCorrente", "Saraiva"],
+                "Situação": ["Pago", "Agendado"],
+                "conta_beancount": [None, " Expenses:Custom "],
+            }
+        )
+        return add_cents_column(df)
+
+    def test_flags_and_descriptions(self):
+        lines = render_rows(self._df(), "Expenses:X", ["A", "B"], "despesa")
+        assert lines[0] == "2024-01-15 * \"Loja 'X' abc\""
+        assert lines[5] == '2024-01-16 ! "Sem descricao"'
+
+    def test_conta_beancount_override(self):
+        df = self._df()
+        default = pd.Series(["Expenses:A", "Expenses:B"], index=df.index)
+        result = conta_beancount_override(df, default)
+        assert result.tolist() == ["Expenses:A", "Expenses:Custom"]
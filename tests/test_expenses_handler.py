@@ -2,10 +2,6 @@ import pandas as pd
 import pytest
 from datetime import datetime
 
-import sys
-
-sys.path.insert(0, "/home/s015533607/Documentos/desenv/pla/importers")
-
 from expenses_handler import (
     identify_boleto_indices,
     identify_cartao_expense_indices,
@@ -13,6 +9,7 @@ from expenses_handler import (
     generate_cartao_expense_entries,
     generate_expense_entries,
 )
+from organizze_shared import add_cents_column
 
 
 class TestIdentifyBoletoIndices:
@@ -26,7 +23,7 @@ class TestIdentifyBoletoIndices:
             "Categoria": ["Outros", "Alimentação"],
             "Situação": ["Pago", "Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         result = identify_boleto_indices(df)
         assert 0 in result
         assert 1 not in result
@@ -41,7 +38,7 @@ class TestIdentifyBoletoIndices:
             "Categoria": ["Outros"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         result = identify_boleto_indices(df)
         assert 0 in result
 
@@ -55,7 +52,7 @@ class TestIdentifyBoletoIndices:
             "Categoria": ["Outros"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         result = identify_boleto_indices(df)
         assert len(result) == 0
 
@@ -71,7 +68,7 @@ class TestIdentifyCartaoExpenseIndices:
             "Categoria": ["Outros", "Outros"],
             "Situação": ["Pago", "Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         result = identify_cartao_expense_indices(df)
         assert 0 in result
         assert 1 not in result
@@ -86,7 +83,7 @@ class TestIdentifyCartaoExpenseIndices:
             "Categoria": ["Outros"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         result = identify_cartao_expense_indices(df)
         assert len(result) == 0
 
@@ -100,7 +97,7 @@ class TestIdentifyCartaoExpenseIndices:
             "Categoria": ["Alimentação"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         result = identify_cartao_expense_indices(df)
         assert len(result) == 0
 
@@ -116,7 +113,7 @@ class TestGenerateBoletoEntries:
             "Categoria": ["Outros"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         lines, count = generate_boleto_entries(df, {0})
         assert count == 1
         assert "2024-01-15" in lines[0]
@@ -133,7 +130,7 @@ class TestGenerateBoletoEntries:
             "Categoria": ["Outros"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         lines, count = generate_boleto_entries(df, set())
         assert count == 0
         assert len(lines) == 0
@@ -150,7 +147,7 @@ class TestGenerateCartaoExpenseEntries:
             "Categoria": ["Outros"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         lines, count = generate_cartao_expense_entries(df, {0})
         assert count == 1
         assert "Expenses:OutrosCartao" in lines[1]
@@ -158,11 +155,11 @@ class TestGenerateCartaoExpenseEntries:
 
 class TestGenerateExpenseEntries:
     def test_generates_expense_entry(self, sample_df):
-        lines, count = generate_expense_entries(sample_df, set())
+        lines, count = generate_expense_entries(add_cents_column(sample_df), set())
         assert count == 5
 
     def test_excludes_indices(self, sample_df):
-        lines, count = generate_expense_entries(sample_df, {0})
+        lines, count = generate_expense_entries(add_cents_column(sample_df), {0})
         assert count == 4
 
     def test_excludes_saldo_inicial(self):
@@ -175,7 +172,7 @@ class TestGenerateExpenseEntries:
             "Categoria": ["Outros"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         lines, count = generate_expense_entries(df, set())
         assert count == 0
 
@@ -189,7 +186,7 @@ class TestGenerateExpenseEntries:
             "Categoria": ["Alimentação"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         lines, count = generate_expense_entries(df, set())
         assert "*" in lines[0]
 
@@ -203,6 +200,6 @@ class TestGenerateExpenseEntries:
             "Categoria": ["Alimentação"],
             "Situação": ["Pendente"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         lines, count = generate_expense_entries(df, set())
         assert "!" in lines[0]
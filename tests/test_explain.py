@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+from datetime import datetime
+
+from explain import ExplainLog, load_explain, write_explain
+from organizze_shared import add_cents_column
+
+
+def _df():
+    data = {
+        "Data": [datetime(2024, 1, 15), datetime(2024, 1, 15), datetime(2024, 1, 16)],
+        "Descrição": ["Transferência", "Transferência", "Mercado"],
+        "Valor": [-200.00, 200.00, -50.00],
+        "D/R": ["D", "R", "D"],
+        "CONTA": ["BbCorrente", "BancoInter", "BbCorrente"],
+        "Categoria": ["Transferências", "Transferências", "Alimentação"],
+        "Situação": ["Pago", "Pago", "Pago"],
+    }
+    return add_cents_column(pd.DataFrame(data))
+
+
+class TestExplainLog:
+    def test_first_decision_wins(self):
+        log = ExplainLog(3)
+        log.record([0, 1], "transferencia", "pair_transfers", contraparte=[1, 0])
+        log.record([0, 1, 2], "despesa", "expenses_handler")
+        frame = log.to_frame(_df())
+        assert frame["classificacao"].tolist() == [
+            "transferencia",
+            "transferencia",
+            "despesa",
+        ]
+        assert frame["contraparte"].tolist() == [1, 0, pd.NA]
+
+    def test_per_index_values_follow_free_rows(self):
+        log = ExplainLog(3)
+        log.record([1], "receita", "incomes_handler")
+        log.record([0, 1, 2], "x", ["a", "b", "c"], debug_motivo=["m0", "m1", "m2"])
+        frame = log.to_frame(_df())
+        assert frame["decidido_por"].tolist() == ["a", "incomes_handler", "c"]
+        assert frame["debug_motivo"].tolist()[2] == "m2"
+
+    def test_frame_has_row_identification(self):
+        frame = ExplainLog(3).to_frame(_df())
+        assert frame["centavos"].tolist() == [20000, 20000, 5000]
+        assert frame["conta"].tolist()[1] == "BancoInter"
+
+
+class TestWriteExplain:
+    def _frame(self):
+        log = ExplainLog(3)
+        log.record([0, 1], "transferencia", "pair_transfers", contraparte=[1, 0])
+        return log.to_frame(_df())
+
+    def test_parquet_roundtrip(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        path = write_explain(self._frame(), tmp_path / "explain.parquet")
+        assert path.suffix == ".parquet"
+        loaded = load_explain(path)
+        assert loaded["contraparte"].tolist() == [1, 0, pd.NA]
+
+    def test_falls_back_to_csv(self, tmp_path, monkeypatch):
+        def no_engine(*args, **kwargs):
+            raise ImportError("sem engine parquet")
+
+        monkeypatch.setattr(pd.DataFrame, "to_parquet", no_engine)
+        path = write_explain(self._frame(), tmp_path / "explain.parquet")
+        assert path.suffix == ".csv"
+        loaded = load_explain(tmp_path / "explain.parquet")
+        assert loaded["classificacao"].tolist()[:2] == ["transferencia"] * 2
+        assert loaded["contraparte"].tolist() == [1, 0, pd.NA]
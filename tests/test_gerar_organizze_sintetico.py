@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+
+import card_cycles
+import card_payments_handler
+from gerar_organizze_sintetico import CICLOS, gerar_exportacao, salvar_exportacao
+from organizze_shared import add_cents_column
+
+
+def _importer_frame(df):
+    df = df.sort_values(["Data", "Valor"], kind="stable").reset_index(drop=True)
+    return add_cents_column(df)
+
+
+@pytest.fixture
+def ciclos_sinteticos(monkeypatch):
+    for module in (card_cycles, card_payments_handler):
+        monkeypatch.setattr(module, "get_cycle_config", lambda: CICLOS)
+
+
+class TestGerarExportacao:
+    def test_same_seed_same_bytes(self, tmp_path):
+        caminhos = [tmp_path / "a.csv", tmp_path / "b.csv"]
+        for caminho in caminhos:
+            salvar_exportacao(gerar_exportacao(3_000, seed=11), caminho)
+        assert caminhos[0].read_bytes() == caminhos[1].read_bytes()
+
+        salvar_exportacao(gerar_exportacao(3_000, seed=12), tmp_path / "c.csv")
+        assert (tmp_path / "c.csv").read_bytes() != caminhos[0].read_bytes()
+
+    @pytest.mark.parametrize("linhas", [200, 5_000])
+    def test_exact_row_count(self, linhas):
+        assert len(gerar_exportacao(linhas, seed=1)) == linhas
+
+    @pytest.mark.usefixtures("ciclos_sinteticos")
+    def test_payments_settle_each_cycle(self):
+        df = _importer_frame(gerar_exportacao(8_000, seed=5))
+        pagamentos = card_payments_handler.identify_card_payment_indices(df)
+        resolvidos = card_payments_handler.resolve_card_payments(df, pagamentos)
+        assert len(resolvidos) == len(pagamentos)
+
+        extrato = card_cycles.compute_cycle_statements(df, resolvidos, CICLOS)
+        assert len(extrato) == len(pagamentos)
+        assert extrato["quitada"].all()
+
+    @pytest.mark.usefixtures("ciclos_sinteticos")
+    def test_bb_payments_match_invoices(self):
+        df = _importer_frame(gerar_exportacao(8_000, seed=5))
+        pagamentos = card_payments_handler.identify_card_payment_indices(df)
+        bb = [
+            idx
+            for idx in sorted(pagamentos)
+            if df.at[idx, "CONTA"] == "BbCorrente"
+            and df.at[idx, "Data"] >= pd.Timestamp("2025-02-01")
+        ]
+        casados = card_payments_handler.match_payments_by_invoice(df, bb)
+        assert bb and len(casados) == len(bb)
+        assert all(
+            df.at[idx, "Descrição"].endswith(cartao) for idx, cartao in casados.items()
+        )
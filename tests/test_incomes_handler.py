@@ -2,10 +2,6 @@ import pandas as pd
 import pytest
 from datetime import datetime
 
-import sys
-
-sys.path.insert(0, "/home/s015533607/Documentos/desenv/pla/importers")
-
 from incomes_handler import (
     identify_transferencia_recebida_indices,
     identify_ajuste_indices,
@@ -13,6 +9,7 @@ from incomes_handler import (
     generate_ajuste_entries,
     generate_income_entries,
 )
+from organizze_shared import add_cents_column
 
 
 class TestIdentifyTransferenciaRecebidaIndices:
@@ -26,7 +23,7 @@ class TestIdentifyTransferenciaRecebidaIndices:
             "Categoria": ["Outros", "Alimentação"],
             "Situação": ["Pago", "Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         result = identify_transferencia_recebida_indices(df)
         assert 0 in result
         assert 1 not in result
@@ -41,7 +38,7 @@ class TestIdentifyTransferenciaRecebidaIndices:
             "Categoria": ["Outros"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         result = identify_transferencia_recebida_indices(df)
         assert len(result) == 0
 
@@ -57,7 +54,7 @@ class TestIdentifyAjusteIndices:
             "Categoria": ["Outros", "Alimentação"],
             "Situação": ["Pago", "Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         result = identify_ajuste_indices(df)
         assert 0 in result
         assert 1 not in result
@@ -74,7 +71,7 @@ class TestGenerateTransferenciaRecebidaEntries:
             "Categoria": ["Outros"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         lines, count = generate_transferencia_recebida_entries(df, {0})
         assert count == 1
         assert "Income:TransferenciasRecebidas" in lines[2]
@@ -91,7 +88,7 @@ class TestGenerateAjusteEntries:
             "Categoria": ["Outros"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         lines, count = generate_ajuste_entries(df, {0})
         assert count == 1
         assert "Equity:Ajustes" in lines[2]
@@ -106,7 +103,7 @@ class TestGenerateAjusteEntries:
             "Categoria": ["Outros"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         lines, count = generate_ajuste_entries(df, {0})
         assert count == 1
         assert "Equity:Ajustes" in lines[1]
@@ -123,7 +120,7 @@ class TestGenerateIncomeEntries:
             "Categoria": ["Recebimentos"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         lines, count = generate_income_entries(df, set())
         assert count == 1
         assert "Assets:BR:BbCorrente" in lines[1]
@@ -139,7 +136,7 @@ class TestGenerateIncomeEntries:
             "Categoria": ["Recebimentos"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         lines, count = generate_income_entries(df, {0})
         assert count == 0
 
@@ -153,6 +150,6 @@ class TestGenerateIncomeEntries:
             "Categoria": ["Alimentação"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         lines, count = generate_income_entries(df, set())
         assert count == 0
@@ -0,0 +1,67 @@
+import pytest
+from beancount import loader
+from beancount.parser import parser
+
+import ledger_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    # install() troca funções globais do Beancount; o monkeypatch as restaura
+    monkeypatch.setattr(parser, "parse_file", parser.parse_file)
+    monkeypatch.setattr(loader, "_load_file", loader._load_file)
+    monkeypatch.setattr(ledger_cache, "CACHE_DIR", tmp_path / "cache")
+    return tmp_path / "cache"
+
+
+def _ledger(pasta, despesa="10.00 BRL"):
+    pasta.mkdir(exist_ok=True)
+    (pasta / "contas.beancount").write_text(
+        "2024-01-01 open Assets:Banco\n2024-01-01 open Expenses:Mercado\n"
+    )
+    (pasta / "lancamentos.beancount").write_text(
+        f'2024-01-10 * "Mercado"\n  Expenses:Mercado  {despesa}\n  Assets:Banco\n'
+    )
+    main = pasta / "main.beancount"
+    main.write_text('include "contas.beancount"\ninclude "lancamentos.beancount"\n')
+    return main
+
+
+class TestWarm:
+    def test_second_load_hits_cache(self, tmp_path):
+        main = _ledger(tmp_path / "ledger")
+        primeira = ledger_cache.warm(main)
+        assert primeira == {"hits": 0, "misses": 3, "removidos": 0}
+
+        segunda = ledger_cache.warm(main)
+        assert segunda == {"hits": 3, "misses": 0, "removidos": 0}
+
+    def test_changed_file_is_reparsed_and_old_entry_pruned(self, tmp_path, cache_dir):
+        main = _ledger(tmp_path / "ledger")
+        ledger_cache.warm(main)
+        _ledger(tmp_path / "ledger", despesa="25.00 BRL")
+
+        stats = ledger_cache.warm(main)
+        assert stats == {"hits": 2, "misses": 1, "removidos": 1}
+        assert len(list(cache_dir.glob("*.pickle"))) == 3
+
+        entries, errors, _ = loader.load_file(str(main))
+        assert not errors
+        (txn,) = [e for e in entries if hasattr(e, "postings")]
+        assert str(txn.postings[0].units) == "25.00 BRL"
+
+    def test_other_ledgers_entries_are_kept(self, tmp_path, cache_dir):
+        outro = _ledger(tmp_path / "outro")
+        ledger_cache.warm(outro)
+        main = _ledger(tmp_path / "ledger")
+
+        stats = ledger_cache.warm(main)
+        assert stats["removidos"] == 0
+        assert len(list(cache_dir.glob("*.pickle"))) == 6
+        assert ledger_cache.warm(outro)["hits"] == 3
+
+
+def test_clear_removes_everything(tmp_path, cache_dir):
+    ledger_cache.warm(_ledger(tmp_path / "ledger"))
+    assert ledger_cache.clear() == 3
+    assert not list(cache_dir.glob("*.pickle"))
@@ -0,0 +1,116 @@
+import pandas as pd
+
+from balance_assertions import postings_frame
+from liquidity_projection import (
+    FLAG_PROJECAO,
+    build_projection,
+    detect_recurring,
+    forecast,
+    transaction_frame,
+)
+
+
+def _entry(data, desc, conta, contrapartida, valor):
+    return (
+        f'{data} * "{desc}"\n'
+        f"  {conta}  {valor:.2f} BRL\n"
+        f"  {contrapartida}  {-valor:.2f} BRL\n"
+    )
+
+
+def _ledger():
+    entradas = []
+    for mes, valor in zip(range(1, 7), [1500, 1500, 1520, 1500, 1490, 1500]):
+        entradas.append(
+            _entry(
+                f"2024-{mes:02d}-31" if mes in (1, 3, 5) else f"2024-{mes:02d}-28",
+                f"Aluguel {mes}/2024",
+                "Assets:BR:BbCorrente",
+                "Expenses:Moradia",
+                -valor,
+            )
+        )
+    for ano in (2022, 2023, 2024):
+        entradas.append(
+            _entry(
+                f"{ano}-02-10", "IPVA", "Assets:BR:BbCorrente", "Expenses:Carro", -900
+            )
+        )
+    # Valores e intervalos irregulares: não são recorrência
+    for data, valor in [("2024-01-03", -40), ("2024-01-09", -310), ("2024-04-20", -7)]:
+        entradas.append(
+            _entry(data, "Mercado", "Assets:BR:BbCorrente", "Expenses:Mercado", valor)
+        )
+    return "\n".join(entradas)
+
+
+REFERENCIA = pd.Timestamp("2024-06-30")
+
+
+def _series():
+    transacoes = transaction_frame(postings_frame(_ledger()))
+    return detect_recurring(transacoes, REFERENCIA)
+
+
+class TestTransactionFrame:
+    def test_patrimonial_leg_first(self):
+        transacoes = transaction_frame(postings_frame(_ledger()))
+        assert set(transacoes["conta"]) == {"Assets:BR:BbCorrente"}
+        assert transacoes["centavos"].iloc[0] == -150000
+
+    def test_skips_equity_counterpart(self):
+        texto = _entry(
+            "2024-01-01", "Saldo", "Assets:BR:BbCorrente", "Equity:SaldoInicial", 10
+        )
+        assert transaction_frame(postings_frame(texto)).empty
+
+
+class TestDetectRecurring:
+    def test_monthly_and_annual_series(self):
+        series = _series()
+        periodos = dict(zip(series["descricao"], series["periodo"]))
+        assert periodos == {"Aluguel 6/2024": "mensal", "IPVA": "anual"}
+        aluguel = series[series["periodo"] == "mensal"].iloc[0]
+        assert aluguel["centavos"] == -150000
+
+    def test_inactive_series_dropped(self):
+        transacoes = transaction_frame(postings_frame(_ledger()))
+        series = detect_recurring(transacoes, pd.Timestamp("2025-01-31"))
+        assert series["periodo"].tolist() == ["anual"]
+
+
+class TestForecast:
+    def test_dates_within_horizon_clamped_to_month_end(self):
+        previsoes = forecast(_series(), REFERENCIA, horizonte_meses=3)
+        aluguel = previsoes[previsoes["periodo"] == "mensal"]
+        assert aluguel["data"].dt.strftime("%Y-%m-%d").tolist() == [
+            "2024-07-28",
+            "2024-08-28",
+            "2024-09-28",
+        ]
+        assert previsoes[previsoes["periodo"] == "anual"].empty
+
+    def test_annual_series_in_long_horizon(self):
+        previsoes = forecast(_series(), REFERENCIA, horizonte_meses=12)
+        anual = previsoes[previsoes["periodo"] == "anual"]
+        assert anual["data"].tolist() == [pd.Timestamp("2025-02-10")]
+
+
+class TestBuildProjection:
+    def test_budget_entries_and_projected_balance(self):
+        lines, count, saldos = build_projection(_ledger(), horizonte_meses=3)
+        assert count == 3
+        assert lines[0] == f'2024-07-28 {FLAG_PROJECAO} "Aluguel 6/2024"'
+        assert lines[3] == '  projecao: "mensal"'
+
+        # Referência padrão: última data do ledger (2024-06-28)
+        conta = saldos[saldos["conta"] == "Assets:BR:BbCorrente"]
+        assert conta["data"].iloc[0] == pd.Timestamp("2024-06-29")
+        assert conta["data"].iloc[-1] == pd.Timestamp("2024-09-28")
+        inicial = conta["saldo"].iloc[0]
+        assert conta["saldo"].iloc[-1] == inicial - 3 * 150000
+
+    def test_empty_ledger(self):
+        lines, count, saldos = build_projection("")
+        assert (lines, count) == ([], 0)
+        assert saldos.empty
@@ -3,8 +3,14 @@ import pytest
 from datetime import datetime
 
 from organizze_shared import (
+    CENTS_COLUMN,
+    add_cents_column,
+    format_cents,
+    lower_column,
     sanitize_name,
     sanitize_description,
+    sanitize_descriptions,
+    sanitize_names,
     get_account_path,
     get_cartao_from_conta,
     generate_pair_id,
@@ -59,6 +65,73 @@ class TestSanitizeDescription:
         assert sanitize_description(pd.NA) == "Sem descricao"
 
 
+class TestSanitizeBatched:
+    def test_names_match_scalar_version(self):
+        values = pd.Series(["Alimentação", None, "Ênfase Ñandu", "Alimentação", ""])
+        expected = [sanitize_name(v) for v in values]
+        assert sanitize_names(values).tolist() == expected
+
+    def test_names_keep_index(self):
+        values = pd.Series(["Saúde"], index=[42])
+        assert sanitize_names(values).to_dict() == {42: "Saude"}
+
+    def test_descriptions_match_scalar_version(self):
+        values = pd.Series(['Loja "X"\r\n', None, "B" * 70, 'Loja "X"\r\n'])
+        expected = [sanitize_description(v) for v in values]
+        assert sanitize_descriptions(values).tolist() == expected
+
+
+class TestCents:
+    def test_add_cents_column_rounds_float_noise(self):
+        df = add_cents_column(pd.DataFrame({"Valor": [0.1 + 0.2]}))
+        assert df[CENTS_COLUMN].tolist() == [30]
+
+    def test_add_cents_column_uses_absolute_value(self):
+        df = add_cents_column(pd.DataFrame({"Valor": [-150.50]}))
+        assert df[CENTS_COLUMN].tolist() == [15050]
+
+    def test_add_cents_column_na_value(self):
+        df = add_cents_column(pd.DataFrame({"Valor": [None, "x"]}))
+        assert df[CENTS_COLUMN].tolist() == [0, 0]
+
+    def test_add_cents_column(self, sample_df):
+        df = add_cents_column(sample_df)
+        assert df[CENTS_COLUMN].dtype == "int64"
+        assert df[CENTS_COLUMN].tolist() == [
+            10000,
+            300000,
+            20000,
+            20000,
+            50000,
+            30000,
+            150000,
+        ]
+        assert CENTS_COLUMN not in sample_df.columns
+
+    def test_add_cents_column_keeps_existing(self, sample_df):
+        df = add_cents_column(sample_df)
+        assert add_cents_column(df) is df
+
+    def test_format_cents(self):
+        assert format_cents(123456) == "1234.56"
+        assert format_cents(-5) == "-0.05"
+        assert format_cents(0) == "0.00"
+
+
+class TestLowerColumn:
+    def test_lowers_and_fills_na(self):
+        df = pd.DataFrame({"Categoria": ["Outros", None, "TRANSFERÊNCIAS"]})
+        assert lower_column(df, "Categoria").tolist() == [
+            "outros",
+            "",
+            "transferências",
+        ]
+
+    def test_missing_column(self):
+        df = pd.DataFrame({"Valor": [1.0, 2.0]})
+        assert lower_column(df, "Categoria").tolist() == ["", ""]
+
+
 class TestGetAccountPath:
     def test_asset_account(self):
         assert get_account_path("BbCorrente") == "Assets:BR:BbCorrente"
@@ -129,6 +202,18 @@ class TestExtractAccountsFromDf:
         assert len(banks) == 0
         assert len(cards) == 0
 
+    def test_return_counts(self, sample_df):
+        banks, cards, counts = extract_accounts_from_df(sample_df, return_counts=True)
+        assert set(counts) == banks | cards
+        assert sum(counts.values()) == sample_df["CONTA"].notna().sum()
+
+    def test_separates_credit_cards(self):
+        df = pd.DataFrame({"CONTA": ["Saraiva", "BbCorrente", "Saraiva", None]})
+        banks, cards, counts = extract_accounts_from_df(df, return_counts=True)
+        assert banks == {"BbCorrente"}
+        assert cards == {"Saraiva"}
+        assert counts == {"Saraiva": 2, "BbCorrente": 1}
+
 
 class TestExtractCategoriesFromDf:
     def test_extracts_expense_categories(self, sample_df):
@@ -163,3 +248,21 @@ class TestExtractCategoriesFromDf:
         expenses, incomes = extract_categories_from_df(empty_df)
         assert len(expenses) == 0
         assert len(incomes) == 0
+
+    def test_return_counts_by_account_name(self):
+        df = pd.DataFrame(
+            {
+                "Categoria": [
+                    "Alimentação",
+                    "Alimentacao",
+                    "Salário",
+                    None,
+                    "transferência",
+                ],
+                "D/R": ["D", "D", "R", "D", "D"],
+            }
+        )
+        expenses, incomes, counts = extract_categories_from_df(df, return_counts=True)
+        assert expenses == {"Alimentacao"}
+        assert incomes == {"Salario"}
+        assert counts == {"Expenses:Alimentacao": 2, "Income:Salario": 1}
@@ -0,0 +1,170 @@
+import pandas as pd
+from datetime import datetime
+
+from organizze_shared import add_cents_column
+from orphan_reconciliation import (
+    find_counterpart_candidates,
+    generate_relaxed_pair_entries,
+    reconcile_orphans,
+)
+
+
+def _legs_df(rows, categorias=None):
+    data = {
+        "Data": [r[0] for r in rows],
+        "Descrição": ["Transferência"] * len(rows),
+        "Valor": [r[1] for r in rows],
+        "D/R": [r[2] for r in rows],
+        "CONTA": [r[3] for r in rows],
+        "Categoria": categorias or ["Transferências"] * len(rows),
+        "Situação": ["Pago"] * len(rows),
+    }
+    return add_cents_column(pd.DataFrame(data))
+
+
+class TestFindCounterpartCandidates:
+    def test_finds_counterpart_days_apart(self):
+        df = _legs_df(
+            [
+                (datetime(2024, 1, 5), -300.00, "D", "BbCorrente"),
+                (datetime(2024, 1, 8), 300.00, "R", "BancoInter"),
+            ]
+        )
+        candidates = find_counterpart_candidates(df, [0, 1])
+        assert list(candidates) == [0]
+        assert candidates[0][0]["credito"] == 1
+        assert candidates[0][0]["dias"] == 3
+
+    def test_ignores_same_account(self):
+        df = _legs_df(
+            [
+                (datetime(2024, 1, 5), -300.00, "D", "BbCorrente"),
+                (datetime(2024, 1, 6), 300.00, "R", "BbCorrente"),
+            ]
+        )
+        assert find_counterpart_candidates(df, [0, 1]) == {}
+
+    def test_ignores_outside_window(self):
+        df = _legs_df(
+            [
+                (datetime(2024, 1, 5), -300.00, "D", "BbCorrente"),
+                (datetime(2024, 2, 5), 300.00, "R", "BancoInter"),
+            ]
+        )
+        assert find_counterpart_candidates(df, [0, 1]) == {}
+
+    def test_ignores_large_relative_difference(self):
+        df = _legs_df(
+            [
+                (datetime(2024, 1, 5), -0.10, "D", "BbCorrente"),
+                (datetime(2024, 1, 5), 0.29, "R", "BancoInter"),
+            ]
+        )
+        assert find_counterpart_candidates(df, [0, 1]) == {}
+
+    def test_ignores_plain_expense_and_income(self):
+        df = _legs_df(
+            [
+                (datetime(2024, 1, 5), -300.00, "D", "BbCorrente"),
+                (datetime(2024, 1, 6), 300.00, "R", "BancoInter"),
+            ],
+            categorias=["Outros", "Salário"],
+        )
+        assert find_counterpart_candidates(df, [0, 1]) == {}
+
+    def test_ranks_closest_first(self):
+        df = _legs_df(
+            [
+                (datetime(2024, 1, 5), -300.00, "D", "BbCorrente"),
+                (datetime(2024, 1, 9), 300.00, "R", "BancoInter"),
+                (datetime(2024, 1, 6), 300.00, "R", "C6Bank"),
+            ]
+        )
+        candidates = find_counterpart_candidates(df, [0, 1, 2])
+        assert [c["credito"] for c in candidates[0]] == [2, 1]
+
+
+class TestReconcileOrphans:
+    def test_accepts_above_threshold(self):
+        df = _legs_df(
+            [
+                (datetime(2024, 1, 5), -300.00, "D", "BbCorrente"),
+                (datetime(2024, 1, 6), 300.00, "R", "BancoInter"),
+            ]
+        )
+        accepted, pending = reconcile_orphans(df, [0, 1])
+        assert [(p["debito"], p["credito"]) for p in accepted] == [(0, 1)]
+        assert pending == []
+
+    def test_reports_below_threshold(self):
+        df = _legs_df(
+            [
+                (datetime(2024, 1, 5), -300.00, "D", "BbCorrente"),
+                (datetime(2024, 1, 10), 300.00, "R", "BancoInter"),
+            ]
+        )
+        accepted, pending = reconcile_orphans(df, [0, 1])
+        assert accepted == []
+        assert pending[0]["idx"] == 0
+
+    def test_pending_details_are_capped_debug_logs(self, caplog):
+        df = _legs_df(
+            [
+                (datetime(2024, 1, 5), -300.00, "D", "BbCorrente"),
+                (datetime(2024, 1, 10), 300.00, "R", "BancoInter"),
+            ]
+        )
+        with caplog.at_level("DEBUG", logger="orphan_reconciliation"):
+            reconcile_orphans(df, [0, 1], max_detalhes=0)
+        mensagens = [r.getMessage() for r in caplog.records]
+        assert not any(m.startswith("Candidato") for m in mensagens)
+        assert "... mais 1 candidatos omitidos" in mensagens
+
+        caplog.clear()
+        with caplog.at_level("DEBUG", logger="orphan_reconciliation"):
+            reconcile_orphans(df, [0, 1])
+        detalhes = [r for r in caplog.records if r.getMessage().startswith("Candidato")]
+        assert [r.levelname for r in detalhes] == ["DEBUG"]
+
+    def test_plain_expense_income_pair_is_not_merged(self):
+        df = _legs_df(
+            [
+                (datetime(2024, 1, 5), -300.00, "D", "BbCorrente"),
+                (datetime(2024, 1, 6), 300.00, "R", "BancoInter"),
+                (datetime(2024, 1, 5), -120.00, "D", "C6Bank"),
+                (datetime(2024, 1, 5), 120.00, "R", "BancoInter"),
+            ],
+            categorias=["Outros", "Outros", "Transferências", "Outros"],
+        )
+        accepted, pending = reconcile_orphans(df, [0, 1, 2, 3])
+        assert accepted == []
+        assert pending == []
+
+    def test_each_leg_used_once(self):
+        df = _legs_df(
+            [
+                (datetime(2024, 1, 5), -300.00, "D", "BbCorrente"),
+                (datetime(2024, 1, 5), -300.00, "D", "C6Bank"),
+                (datetime(2024, 1, 6), 300.00, "R", "BancoInter"),
+            ]
+        )
+        accepted, _ = reconcile_orphans(df, [0, 1, 2])
+        assert len(accepted) == 1
+
+
+class TestGenerateRelaxedPairEntries:
+    def test_difference_goes_to_ajustes(self):
+        df = _legs_df(
+            [
+                (datetime(2024, 1, 5), -300.00, "D", "BbCorrente"),
+                (datetime(2024, 1, 6), 299.50, "R", "BancoInter"),
+            ]
+        )
+        accepted, _ = reconcile_orphans(df, [0, 1])
+        lines, count = generate_relaxed_pair_entries(df, accepted)
+        assert count == 1
+        assert "Assets:BR:BbCorrente" in lines[1]
+        assert "-300.00" in lines[1]
+        assert "Assets:BR:BancoInter" in lines[2]
+        assert "Equity:Ajustes" in lines[3]
+        assert "0.50" in lines[3]
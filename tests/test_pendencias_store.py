@@ -0,0 +1,88 @@
+import pandas as pd
+from datetime import datetime
+
+from organizze_shared import add_cents_column
+from pendencias_store import (
+    MOTIVO_AGENDADO,
+    MOTIVO_TRANSFERENCIA,
+    add_items,
+    list_pendencias,
+    open_store,
+    organizze_pendencias,
+    remove_items,
+    sync_source,
+)
+from transfer_cache import compute_row_fingerprints
+
+
+def _df():
+    data = {
+        "Data": [datetime(2024, 1, 15), datetime(2024, 1, 16), datetime(2024, 1, 17)],
+        "Descrição": ["Aluguel", "Transferência", "Mercado"],
+        "Valor": [-1500.00, -200.00, -50.00],
+        "D/R": ["D", "D", "D"],
+        "CONTA": ["BbCorrente", "BbCorrente", "BancoInter"],
+        "Categoria": ["Moradia", "Transferências", "Alimentação"],
+        "Situação": ["Não pago", "Pago", "Pago"],
+    }
+    return add_cents_column(pd.DataFrame(data))
+
+
+def _item(id_, centavos=-1000, fonte="organizze"):
+    return {
+        "id": id_,
+        "fonte": fonte,
+        "motivo": MOTIVO_AGENDADO,
+        "data": "2024-01-15",
+        "conta": "Assets:BR:BbCorrente",
+        "centavos": centavos,
+        "descricao": "x",
+    }
+
+
+class TestOrganizzePendencias:
+    def test_agendados_and_orphan_transfers(self):
+        df = _df()
+        items = organizze_pendencias(
+            df,
+            ["despesa", "transferencia_orfa", "despesa"],
+            compute_row_fingerprints(df),
+        )
+        assert [i["motivo"] for i in items] == [MOTIVO_AGENDADO, MOTIVO_TRANSFERENCIA]
+        assert items[0]["centavos"] == -150000
+        assert items[0]["conta"] == "Assets:BR:BbCorrente"
+        assert items[1]["data"] == "2024-01-16"
+
+    def test_confirmed_classifications_are_not_pending(self):
+        df = _df()
+        items = organizze_pendencias(
+            df,
+            ["saldo_inicial", "transferencia", "despesa"],
+            compute_row_fingerprints(df),
+        )
+        assert items == []
+
+
+class TestStore:
+    def test_sync_removes_reconciled_items(self, tmp_path):
+        conn = open_store(tmp_path / "pendencias.sqlite")
+        assert sync_source(conn, "organizze", [_item("a"), _item("b")]) == (2, 0)
+        assert sync_source(conn, "organizze", [_item("b"), _item("c")]) == (1, 1)
+        assert list_pendencias(conn)["id"].tolist() == ["b", "c"]
+
+    def test_sync_keeps_other_sources(self, tmp_path):
+        conn = open_store(tmp_path / "pendencias.sqlite")
+        add_items(conn, [_item("ofx:1", fonte="ofx")])
+        sync_source(conn, "organizze", [])
+        assert list_pendencias(conn)["id"].tolist() == ["ofx:1"]
+
+    def test_remove_and_filter_by_motivo(self, tmp_path):
+        path = tmp_path / "pendencias.sqlite"
+        conn = open_store(path)
+        add_items(conn, [_item("a"), {**_item("b"), "motivo": MOTIVO_TRANSFERENCIA}])
+        assert remove_items(conn, ["a"]) == 1
+        conn.close()
+
+        conn = open_store(path)
+        assert list_pendencias(conn, MOTIVO_TRANSFERENCIA)["id"].tolist() == ["b"]
+        assert list_pendencias(conn, MOTIVO_AGENDADO).empty
@@ -0,0 +1,208 @@
+from datetime import datetime
+
+import pandas as pd
+
+from organizze_shared import add_cents_column
+from pendencias_store import (
+    MOTIVO_TRANSFERENCIA,
+    add_items,
+    list_pendencias,
+    load_conciliacoes,
+    open_store,
+    orphan_transfer_items,
+)
+from pending_reconciliation import (
+    generate_reconciled_entries,
+    ofx_leg_postings,
+    orphan_block_matcher,
+    reconcile,
+    reconcile_organizze_orphans,
+    rewrite_entries,
+)
+from smart_ofx_importer import conciliar_transferencias
+from transfer_cache import compute_row_fingerprints
+from transfers_handler import generate_orphan_transfer_entries
+
+
+def _leg(id_, data, conta, centavos, fonte="ofx"):
+    return {
+        "id": id_,
+        "fonte": fonte,
+        "motivo": MOTIVO_TRANSFERENCIA,
+        "data": data,
+        "conta": conta,
+        "centavos": centavos,
+        "descricao": "PIX JOSE",
+    }
+
+
+def _ofx_entry(fitid, data, conta, centavos):
+    valor = centavos / 100
+    return (
+        f'{data} * "PIX JOSE"\n'
+        f"  {conta}  {valor:.2f} BRL\n"
+        f"  Equity:TransferenciasPendentes  {-valor:.2f} BRL\n"
+        f'  origem_id: "{fitid}"\n'
+        '  transferencia: "true"\n'
+    )
+
+
+class TestReconcile:
+    def test_matches_opposite_leg_in_other_account(self, tmp_path):
+        conn = open_store(tmp_path / "p.sqlite")
+        add_items(conn, [_leg("ofx:A", "2024-01-10", "Assets:BR:BbCorrente", -5000)])
+        pares = reconcile(
+            conn, [_leg("ofx:B", "2024-01-11", "Assets:BR:BancoInter", 5000)]
+        )
+        assert len(pares) == 1
+        aberta, conciliacao = pares[0]
+        assert aberta["id"] == "ofx:A"
+        assert conciliacao["id"] == "ofx:A"
+        assert conciliacao["contraparte"] == "ofx:B"
+        assert conciliacao["conta_destino"] == "Assets:BR:BancoInter"
+        assert conciliacao["centavos"] == 5000
+        assert list_pendencias(conn).empty
+        assert set(load_conciliacoes(conn)) == {"ofx:A", "ofx:B"}
+
+    def test_ignores_same_account_and_dates_outside_window(self, tmp_path):
+        conn = open_store(tmp_path / "p.sqlite")
+        add_items(
+            conn,
+            [
+                _leg("ofx:A", "2024-01-10", "Assets:BR:BancoInter", -5000),
+                _leg("ofx:C", "2024-01-20", "Assets:BR:BbCorrente", -5000),
+            ],
+        )
+        novo = _leg("ofx:B", "2024-01-11", "Assets:BR:BancoInter", 5000)
+        assert reconcile(conn, [novo]) == []
+        assert len(list_pendencias(conn)) == 2
+
+    def test_prefers_closest_date_and_uses_each_leg_once(self, tmp_path):
+        conn = open_store(tmp_path / "p.sqlite")
+        add_items(
+            conn,
+            [
+                _leg("ofx:A", "2024-01-08", "Assets:BR:BbCorrente", -5000),
+                _leg("ofx:C", "2024-01-10", "Assets:BR:BbCorrente", -5000),
+            ],
+        )
+        pares = reconcile(
+            conn,
+            [
+                _leg("ofx:B", "2024-01-10", "Assets:BR:BancoInter", 5000),
+                _leg("ofx:D", "2024-01-10", "Assets:BR:BancoInter", 5000),
+            ],
+        )
+        assert [aberta["id"] for aberta, _ in pares] == ["ofx:C", "ofx:A"]
+
+    def test_reconciled_entry_balances(self):
+        lines, count = generate_reconciled_entries(
+            [
+                {
+                    "id": "ofx:A",
+                    "contraparte": "organizze:abc",
+                    "data": "2024-01-10",
+                    "conta_origem": "Assets:BR:BbCorrente",
+                    "conta_destino": "Assets:BR:BancoInter",
+                    "centavos": 5000,
+                    "descricao": "PIX",
+                }
+            ]
+        )
+        assert count == 1
+        assert "-50.00 BRL" in lines[1] and "50.00 BRL" in lines[2]
+        assert lines[3] == '  origem_id: "A"'
+        assert lines[4] == '  contraparte_id: "organizze:abc"'
+
+
+class TestRewriteEntries:
+    def test_replaces_and_removes_blocks(self, tmp_path):
+        path = tmp_path / "imports.beancount"
+        path.write_text(
+            "; header\n\n"
+            + _ofx_entry("A", "2024-01-10", "Assets:BR:BbCorrente", -5000)
+            + "\n"
+            + _ofx_entry("B", "2024-01-11", "Assets:BR:BancoInter", 700)
+        )
+        trocados = rewrite_entries(
+            path,
+            [
+                (lambda b: 'origem_id: "A"' in b, ""),
+                (lambda b: 'origem_id: "B"' in b, "; trocado"),
+            ],
+        )
+        assert trocados == 2
+        assert path.read_text() == "; header\n\n; trocado\n"
+
+
+class TestOrganizzeOrphans:
+    def _df(self):
+        data = {
+            "Data": [datetime(2024, 1, 10)],
+            "Descrição": ["Transferência para Inter"],
+            "Valor": [-50.00],
+            "D/R": ["D"],
+            "CONTA": ["BbCorrente"],
+            "Categoria": ["Transferências"],
+            "Situação": ["Pago"],
+        }
+        return add_cents_column(pd.DataFrame(data))
+
+    def test_orphan_reconciled_with_open_ofx_leg(self, tmp_path):
+        df = self._df()
+        fingerprints = compute_row_fingerprints(df)
+        orphans = [{"idx": 0, "conta": "BbCorrente", "dr": "D", "centavos": 5000}]
+        imports = tmp_path / "imports.beancount"
+        imports.write_text(_ofx_entry("B", "2024-01-11", "Assets:BR:BancoInter", 5000))
+
+        conn = open_store(tmp_path / "p.sqlite")
+        add_items(conn, [_leg("ofx:B", "2024-01-11", "Assets:BR:BancoInter", 5000)])
+
+        conciliados = reconcile_organizze_orphans(
+            conn, df, orphans, fingerprints, imports
+        )
+        assert conciliados[0]["conta_origem"] == "Assets:BR:BbCorrente"
+        assert conciliados[0]["contraparte"] == "ofx:B"
+        assert 'origem_id: "B"' not in imports.read_text()
+
+        # Próxima execução: a conciliação volta pela tabela
+        again = reconcile_organizze_orphans(conn, df, orphans, fingerprints, imports)
+        assert again == conciliados
+
+        # A perna OFX sai do imports e fica só na entrada conciliada
+        (perna,) = ofx_leg_postings(list(conciliados.values())).itertuples()
+        assert (perna.data, perna.conta, perna.centavos) == (
+            pd.Timestamp("2024-01-10"),
+            "Assets:BR:BancoInter",
+            5000,
+        )
+
+    def test_block_matcher_finds_rendered_credit_orphan(self):
+        df = self._df().assign(**{"D/R": "R", "CONTA": "BancoInter"})
+        orphans = [{"idx": 0, "conta": "BancoInter", "dr": "R"}]
+        lines, _ = generate_orphan_transfer_entries(orphans, df)
+        (item,) = orphan_transfer_items(df, orphans, compute_row_fingerprints(df))
+        assert orphan_block_matcher(item)("\n".join(lines))
+
+
+class TestConciliarTransferenciasOfx:
+    def test_two_ofx_legs_become_one_entry(self, tmp_path):
+        imports = tmp_path / "imports.beancount"
+        imports.write_text(_ofx_entry("A", "2024-01-10", "Assets:BR:BbCorrente", -5000))
+        conn = open_store(tmp_path / "p.sqlite")
+        add_items(conn, [_leg("ofx:A", "2024-01-10", "Assets:BR:BbCorrente", -5000)])
+
+        nova = _leg("ofx:B", "2024-01-11", "Assets:BR:BancoInter", 5000)
+        outra = _ofx_entry("X", "2024-01-12", "Assets:BR:BancoInter", -100)
+        lancamentos, abertas, conciliadas = conciliar_transferencias(
+            conn,
+            [_ofx_entry("B", "2024-01-11", "Assets:BR:BancoInter", 5000), outra],
+            [nova],
+            imports,
+            tmp_path / "history.beancount",
+        )
+        assert conciliadas == 1
+        assert abertas == []
+        assert lancamentos[0] == outra
+        assert 'contraparte_id: "B"' in lancamentos[1]
+        assert 'origem_id: "A"' not in imports.read_text()
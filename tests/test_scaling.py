@@ -0,0 +1,173 @@
+"""
+Testes de escala: falham quando o tempo cresce bem acima do linear.
+
+Cada caso é medido em dois tamanhos (razão 8x). O expoente k de t ~ n^k é
+estimado com o menor tempo de CPU de algumas repetições; só falha se k
+passar de LIMITE_EXPOENTE em duas medições seguidas, para não quebrar em
+máquina de CI ruidosa. Quadrático dá k ~ 2; o limite deixa folga para o
+custo fixo e para fatores log n.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import balance_assertions
+import card_payments_handler
+import expenses_handler
+import incomes_handler
+import liquidity_projection
+import organizze_v5
+import transfers_handler
+from gerar_organizze_sintetico import gerar_exportacao
+from organizze_shared import add_cents_column
+from smart_ofx_importer import classificar_transacao
+
+
+LIMITE_EXPOENTE = 1.4
+TAMANHOS = (1_000, 8_000)
+REPETICOES = 3
+TENTATIVAS = 2
+
+
+def _cpu_time(fn) -> float:
+    melhor = float("inf")
+    for _ in range(REPETICOES):
+        inicio = time.process_time()
+        fn()
+        melhor = min(melhor, time.process_time() - inicio)
+    return max(melhor, 1e-6)
+
+
+def growth_exponent(make_case, tamanhos=TAMANHOS) -> float:
+    """Expoente de crescimento entre o menor e o maior tamanho."""
+    n1, n2 = tamanhos[0], tamanhos[-1]
+    t1 = _cpu_time(make_case(n1))
+    t2 = _cpu_time(make_case(n2))
+    return float(np.log(t2 / t1) / np.log(n2 / n1))
+
+
+def assert_near_linear(make_case, tamanhos=TAMANHOS, limite=LIMITE_EXPOENTE):
+    expoentes = []
+    for _ in range(TENTATIVAS):
+        expoentes.append(growth_exponent(make_case, tamanhos))
+        if expoentes[-1] <= limite:
+            return
+    pytest.fail(f"crescimento superlinear: k={expoentes} (limite {limite})")
+
+
+def _synthetic_frame(n: int) -> pd.DataFrame:
+    df = gerar_exportacao(n, seed=n)
+    df = df.sort_values(["Data", "Valor"], kind="stable").reset_index(drop=True)
+    return add_cents_column(df)
+
+
+def _transfer_setup(n: int):
+    df = _synthetic_frame(n)
+    pagto = card_payments_handler.identify_card_payment_indices(df)
+    processed, orphans = transfers_handler.identify_transfers(df, pagto)
+    excluded = pagto | processed | {o["idx"] for o in orphans}
+    return df, pagto, processed, excluded
+
+
+@pytest.fixture(autouse=True)
+def _quiet_logs(caplog):
+    caplog.set_level("CRITICAL")
+
+
+def test_identify_transfers_scales_linearly():
+    def make_case(n):
+        df, pagto, _, _ = _transfer_setup(n)
+        return lambda: transfers_handler.identify_transfers(df, pagto)
+
+    assert_near_linear(make_case)
+
+
+def _same_day_groups(n: int) -> pd.DataFrame:
+    """
+    Transferências no mesmo dia e valor: dois grupos (data, centavos) que
+    crescem com n. Metade das linhas é D no BbCorrente; os R alternam entre
+    o BbCorrente (nunca pareiam) e o BancoInter, e cada débito percorre os
+    créditos já usados ou impossíveis antes de achar um par.
+    """
+    posicao = np.arange(n)
+    tipo = posicao % 4
+    df = pd.DataFrame(
+        {
+            "Data": pd.Timestamp("2024-03-01")
+            + pd.to_timedelta((posicao // 4) % 2, "D"),
+            "Descrição": "Transferência",
+            "Categoria": "Transferências",
+            "Valor": np.where(tipo < 2, -50.0, 50.0),
+            "D/R": np.where(tipo < 2, "D", "R"),
+            "CONTA": np.where(tipo == 3, "BancoInter", "BbCorrente"),
+            "Situação": "Pago",
+        }
+    )
+    return add_cents_column(df)
+
+
+def test_identify_transfers_scales_with_large_same_day_groups():
+    def make_case(n):
+        df = _same_day_groups(n)
+        return lambda: transfers_handler.identify_transfers(df, set())
+
+    assert_near_linear(make_case, tamanhos=(2_000, 16_000))
+
+
+def test_generate_transfer_entries_scales_linearly():
+    def make_case(n):
+        df, _, processed, _ = _transfer_setup(n)
+        return lambda: transfers_handler.generate_transfer_entries(df, processed)
+
+    assert_near_linear(make_case)
+
+
+def test_expense_and_income_entries_scale_linearly():
+    def make_case(n):
+        df, _, _, excluded = _transfer_setup(n)
+
+        def run():
+            expenses_handler.generate_expense_entries(df, excluded)
+            incomes_handler.generate_income_entries(df, excluded)
+
+        return run
+
+    assert_near_linear(make_case, tamanhos=(4_000, 32_000))
+
+
+def test_saldo_inicial_entries_scale_linearly():
+    def make_case(n):
+        df = _synthetic_frame(n)
+        return lambda: organizze_v5.generate_saldo_inicial_entries(df)
+
+    assert_near_linear(make_case)
+
+
+def test_balances_and_projection_scale_linearly_with_ledger_size():
+    def make_case(n):
+        df, _, _, excluded = _transfer_setup(n)
+        expense_lines, _ = expenses_handler.generate_expense_entries(df, excluded)
+        income_lines, _ = incomes_handler.generate_income_entries(df, excluded)
+        texto = "\n".join(expense_lines + income_lines)
+
+        def run():
+            esperado = balance_assertions.expected_postings(df)
+            balance_assertions.build_balance_entries(esperado)
+            liquidity_projection.build_projection(texto)
+
+        return run
+
+    assert_near_linear(make_case, tamanhos=(4_000, 32_000))
+
+
+def test_classificar_transacao_scales_linearly_with_mapping_size():
+    textos = [f"COMPRA LOJA {i} SEM PADRAO" for i in range(50)]
+
+    def make_case(n):
+        mapping = {f"PADRAO {i:06d} LOJA": "Expenses:Teste" for i in range(n)}
+        return lambda: [classificar_transacao(t, "", mapping) for t in textos]
+
+    assert_near_linear(make_case, tamanhos=(2_000, 16_000))
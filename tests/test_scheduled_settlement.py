@@ -0,0 +1,212 @@
+from datetime import datetime
+
+import pandas as pd
+
+from organizze_shared import add_cents_column
+from pendencias_store import (
+    MOTIVO_AGENDADO,
+    MOTIVO_CONFERIR,
+    add_items,
+    add_liquidacoes,
+    list_pendencias,
+    load_liquidacoes,
+    open_store,
+)
+from scheduled_settlement import (
+    MODO_CONFERIR,
+    MODO_PAGO,
+    MODO_SUBSTITUIDO,
+    apply_settlements,
+    flip_settled_entries,
+    same_entry,
+    settle,
+)
+from smart_ofx_importer import liquidar_agendados
+from transfer_cache import compute_row_fingerprints
+
+
+def _agendado(id_, data="2024-02-10", conta="Assets:BR:BbCorrente", centavos=-150000):
+    return {
+        "id": id_,
+        "fonte": "organizze",
+        "motivo": MOTIVO_AGENDADO,
+        "data": data,
+        "conta": conta,
+        "centavos": centavos,
+        "descricao": "Aluguel",
+    }
+
+
+def _pagamento(id_, data="2024-02-11", conta="Assets:BR:BbCorrente", centavos=-150000):
+    return {"id": id_, "data": data, "conta": conta, "centavos": centavos}
+
+
+def _df(rows):
+    return add_cents_column(
+        pd.DataFrame(
+            [
+                {
+                    "Data": datetime.fromisoformat(data),
+                    "Descrição": desc,
+                    "Valor": -1500.00,
+                    "D/R": "D",
+                    "CONTA": "BbCorrente",
+                    "Categoria": categoria,
+                    "Situação": situacao,
+                }
+                for data, desc, situacao, categoria in (
+                    (*row, "Moradia")[:4] for row in rows
+                )
+            ]
+        )
+    )
+
+
+class TestSettle:
+    def test_payment_settles_scheduled_entry(self, tmp_path):
+        conn = open_store(tmp_path / "p.sqlite")
+        add_items(conn, [_agendado("organizze:a")])
+        pares = settle(conn, [_pagamento("ofx:1")], MODO_PAGO)
+        assert [agendado["id"] for agendado, _ in pares] == ["organizze:a"]
+        assert list_pendencias(conn).empty
+        assert load_liquidacoes(conn)["organizze:a"]["liquidado_por"] == "ofx:1"
+
+    def test_requires_same_account_amount_and_window(self, tmp_path):
+        conn = open_store(tmp_path / "p.sqlite")
+        add_items(conn, [_agendado("organizze:a")])
+        pagamentos = [
+            _pagamento("ofx:1", conta="Assets:BR:BancoInter"),
+            _pagamento("ofx:2", centavos=-140000),
+            _pagamento("ofx:3", data="2024-03-10"),
+        ]
+        assert settle(conn, pagamentos, MODO_PAGO) == []
+        assert len(list_pendencias(conn)) == 1
+
+
+class TestApplySettlements:
+    def test_first_run_only_records_rows(self, tmp_path):
+        conn = open_store(tmp_path / "p.sqlite")
+        add_items(conn, [_agendado("organizze:x")])
+        df = _df([("2024-02-10", "Aluguel", "Pago")])
+        result, _ = apply_settlements(conn, df, compute_row_fingerprints(df))
+        assert len(result) == 1
+        assert load_liquidacoes(conn) == {}
+
+    def test_new_paid_row_replaces_scheduled_row(self, tmp_path):
+        conn = open_store(tmp_path / "p.sqlite")
+        antes = _df([("2024-02-10", "Aluguel", "Agendado")])
+        fingerprints = compute_row_fingerprints(antes)
+        apply_settlements(conn, antes, fingerprints)
+        add_items(conn, [_agendado(f"organizze:{fingerprints[0]}")])
+
+        depois = _df(
+            [
+                ("2024-02-10", "Aluguel", "Agendado"),
+                ("2024-02-12", "Aluguel pago", "Pago"),
+            ]
+        )
+        result, result_fps = apply_settlements(
+            conn, depois, compute_row_fingerprints(depois)
+        )
+        assert result["Descrição"].tolist() == ["Aluguel pago"]
+        assert result_fps.tolist() == compute_row_fingerprints(depois)[1:].tolist()
+        liquidacao = load_liquidacoes(conn)[f"organizze:{fingerprints[0]}"]
+        assert liquidacao["modo"] == MODO_SUBSTITUIDO
+
+    def test_unrelated_paid_row_keeps_scheduled_row_for_review(self, tmp_path):
+        conn = open_store(tmp_path / "p.sqlite")
+        antes = _df([("2024-02-10", "Aluguel", "Agendado")])
+        fingerprints = compute_row_fingerprints(antes)
+        apply_settlements(conn, antes, fingerprints)
+        add_items(conn, [_agendado(f"organizze:{fingerprints[0]}")])
+
+        depois = _df(
+            [
+                ("2024-02-10", "Aluguel", "Agendado"),
+                ("2024-02-12", "Conserto do carro", "Pago", "Transporte"),
+            ]
+        )
+        result, result_fps = apply_settlements(
+            conn, depois, compute_row_fingerprints(depois)
+        )
+        assert result["Situação"].tolist() == ["Pago", "Pago"]
+        assert result_fps.tolist() == compute_row_fingerprints(depois).tolist()
+        liquidacao = load_liquidacoes(conn)[f"organizze:{fingerprints[0]}"]
+        assert liquidacao["modo"] == MODO_CONFERIR
+        (revisao,) = list_pendencias(conn, MOTIVO_CONFERIR).itertuples(index=False)
+        assert revisao.id == f"organizze:{fingerprints[0]}"
+        assert revisao.descricao == "Aluguel"
+
+        # A linha some do export: a pendência de revisão sai junto
+        apply_settlements(conn, depois[1:], compute_row_fingerprints(depois)[1:])
+        assert list_pendencias(conn, MOTIVO_CONFERIR).empty
+
+    def test_paid_settlement_flips_situacao(self, tmp_path):
+        conn = open_store(tmp_path / "p.sqlite")
+        df = _df([("2024-02-10", "Aluguel", "Agendado")])
+        fingerprints = compute_row_fingerprints(df)
+        add_liquidacoes(
+            conn,
+            [
+                {
+                    "id": f"organizze:{fingerprints[0]}",
+                    "liquidado_por": "ofx:1",
+                    "data": "2024-02-11",
+                    "modo": MODO_PAGO,
+                }
+            ],
+        )
+        result, _ = apply_settlements(conn, df, fingerprints)
+        assert result["Situação"].tolist() == ["Pago"]
+
+
+class TestSameEntry:
+    def test_description_contained_ignoring_accents_and_case(self):
+        agendado = {"id": "a", "descricao": "Condomínio"}
+        assert same_entry(agendado, {"id": "b", "descricao": "CONDOMINIO fev"}, {})
+
+    def test_same_category(self):
+        categorias = {"a": "Moradia", "b": "Moradia"}
+        assert same_entry(
+            {"id": "a", "descricao": "Aluguel"},
+            {"id": "b", "descricao": "Boleto"},
+            categorias,
+        )
+
+    def test_different_description_and_category(self):
+        categorias = {"a": "Alimentação", "b": "Lazer"}
+        assert not same_entry(
+            {"id": "a", "descricao": "Mercado"},
+            {"id": "b", "descricao": "Cinema"},
+            categorias,
+        )
+
+
+class TestLiquidarAgendadosOfx:
+    def test_flips_history_and_skips_ofx_entry(self, tmp_path):
+        history = tmp_path / "history.beancount"
+        history.write_text(
+            '2024-02-10 ! "Aluguel"\n'
+            "  Expenses:Moradia                            1500.00 BRL\n"
+            "  Assets:BR:BbCorrente                       -1500.00 BRL\n"
+            '  origem_id: "despesa"\n'
+        )
+        conn = open_store(tmp_path / "p.sqlite")
+        add_items(conn, [_agendado("organizze:a")])
+
+        lancamento = '2024-02-11 * "ALUGUEL"\n  origem_id: "1"\n'
+        lancamentos, liquidados = liquidar_agendados(
+            conn, [lancamento], [_pagamento("ofx:1")], history
+        )
+        assert liquidados == 1
+        assert lancamentos == []
+        assert history.read_text().startswith('2024-02-10 * "Aluguel"')
+
+    def test_flip_settled_entries_leaves_other_blocks(self, tmp_path):
+        history = tmp_path / "history.beancount"
+        history.write_text(
+            '2024-02-10 ! "Luz"\n  Assets:BR:BbCorrente  -90.00 BRL\n\n'
+            '2024-02-10 ! "Aluguel"\n  Assets:BR:BbCorrente  -1500.00 BRL\n'
+        )
+        assert flip_settled_entries(history, [_agendado("organizze:a")]) == 1
+        assert history.read_text().count(" ! ") == 1
@@ -0,0 +1,93 @@
+import pandas as pd
+from datetime import datetime
+
+from organizze_shared import add_cents_column
+from transfer_cache import (
+    compute_row_fingerprints,
+    load_pair_cache,
+    pairs_to_fingerprints,
+    resolve_cached_pairs,
+    save_pair_cache,
+)
+from transfers_handler import identify_transfers, split_transfer_candidates
+
+
+def _df():
+    data = {
+        "Data": [
+            datetime(2024, 1, 15),
+            datetime(2024, 1, 15),
+            datetime(2024, 1, 16),
+            datetime(2024, 1, 16),
+        ],
+        "Descrição": ["Transferência", "Transferência", "Mercado", "Mercado"],
+        "Valor": [-200.00, 200.00, -50.00, -50.00],
+        "D/R": ["D", "R", "D", "D"],
+        "CONTA": ["BbCorrente", "BancoInter", "BbCorrente", "BbCorrente"],
+        "Categoria": ["Transferências", "Transferências", "Alimentação", "Alimentação"],
+        "Situação": ["Pago", "Pago", "Pago", "Pago"],
+    }
+    return add_cents_column(pd.DataFrame(data))
+
+
+class TestComputeRowFingerprints:
+    def test_stable_across_row_order(self):
+        df = _df()
+        shuffled = df.iloc[[3, 1, 0, 2]].reset_index(drop=True)
+        fps = set(compute_row_fingerprints(df))
+        assert fps == set(compute_row_fingerprints(shuffled))
+
+    def test_identical_rows_get_distinct_fingerprints(self):
+        fps = compute_row_fingerprints(_df())
+        assert fps.nunique() == 4
+
+
+class TestPairCache:
+    def test_roundtrip(self, tmp_path):
+        path = tmp_path / "cache.json"
+        save_pair_cache(path, [("a", "b")])
+        assert load_pair_cache(path) == [("a", "b")]
+
+    def test_missing_file_returns_empty(self, tmp_path):
+        assert load_pair_cache(tmp_path / "nao_existe.json") == []
+
+    def test_corrupt_file_returns_empty(self, tmp_path):
+        path = tmp_path / "cache.json"
+        path.write_text("{nao e json")
+        assert load_pair_cache(path) == []
+
+    def test_resolves_pairs_by_fingerprint(self):
+        df = _df()
+        fps = compute_row_fingerprints(df)
+        cache = pairs_to_fingerprints([(0, 1)], fps)
+
+        shuffled = df.iloc[[3, 1, 0, 2]].reset_index(drop=True)
+        pairs = resolve_cached_pairs(cache, compute_row_fingerprints(shuffled))
+        assert pairs == [(2, 1)]
+
+    def test_invalidates_pair_when_row_disappears(self):
+        df = _df()
+        cache = pairs_to_fingerprints([(0, 1)], compute_row_fingerprints(df))
+
+        reduced = df.drop(index=1).reset_index(drop=True)
+        pairs = resolve_cached_pairs(cache, compute_row_fingerprints(reduced))
+        assert pairs == []
+
+    def test_invalidates_pair_whose_leg_is_no_longer_candidate(self):
+        df = _df()
+        fps = compute_row_fingerprints(df)
+        cache = pairs_to_fingerprints([(0, 1)], fps)
+        assert resolve_cached_pairs(cache, fps, {0, 1, 2, 3}) == [(0, 1)]
+
+        # Regra nova tira a perna de débito das transferências
+        reclassified = df.assign(Categoria=["Boletos"] + df["Categoria"].tolist()[1:])
+        candidates, _ = split_transfer_candidates(reclassified, set())
+        assert resolve_cached_pairs(cache, fps, set(candidates)) == []
+
+
+class TestIdentifyTransfersWithConfirmed:
+    def test_confirmed_rows_are_not_rematched(self):
+        df = _df()
+        processed, orphans = identify_transfers(df, set(), {0, 1})
+        assert processed == set()
+        assert orphans == []
@@ -0,0 +1,132 @@
+import pandas as pd
+from datetime import datetime
+
+from organizze_shared import add_cents_column
+from transfer_chains import (
+    find_transfer_chains,
+    generate_chain_entries,
+)
+from transfers_handler import (
+    identify_transfers,
+    pair_transfers,
+    split_transfer_candidates,
+)
+
+
+def _transfer_df(rows):
+    data = {
+        "Data": [r[0] for r in rows],
+        "Descrição": ["Transferência"] * len(rows),
+        "Valor": [r[1] for r in rows],
+        "D/R": [r[2] for r in rows],
+        "CONTA": [r[3] for r in rows],
+        "Categoria": ["Transferências"] * len(rows),
+        "Situação": ["Pago"] * len(rows),
+    }
+    return add_cents_column(pd.DataFrame(data))
+
+
+def _chains(df):
+    processed, orphans = identify_transfers(df, set())
+    pairs = pair_transfers(df, processed)
+    candidates, _ = split_transfer_candidates(df, set())
+    taken = processed | {o["idx"] for o in orphans}
+    unpaired = [idx for idx in candidates if idx not in taken]
+    return find_transfer_chains(df, pairs, orphans, unpaired), pairs, unpaired
+
+
+class TestFindTransferChains:
+    def test_links_two_matched_hops(self):
+        df = _transfer_df(
+            [
+                (datetime(2024, 1, 5), -1000.00, "D", "BbCorrente"),
+                (datetime(2024, 1, 5), 1000.00, "R", "BancoInter"),
+                (datetime(2024, 1, 6), -1000.00, "D", "BancoInter"),
+                (datetime(2024, 1, 6), 1000.00, "R", "CdbInter"),
+            ]
+        )
+        chains, pairs, _ = _chains(df)
+        assert len(pairs) == 2
+        assert len(chains) == 1
+        assert chains[0]["indices"] == [0, 1, 2, 3]
+        assert chains[0]["contas"] == ["BbCorrente", "BancoInter", "CdbInter"]
+
+    def test_single_pair_is_not_a_chain(self):
+        df = _transfer_df(
+            [
+                (datetime(2024, 1, 5), -1000.00, "D", "BbCorrente"),
+                (datetime(2024, 1, 5), 1000.00, "R", "BancoInter"),
+            ]
+        )
+        chains, _, _ = _chains(df)
+        assert chains == []
+
+    def test_links_orphans_across_days(self):
+        df = _transfer_df(
+            [
+                (datetime(2024, 1, 5), -300.00, "D", "BbCorrente"),
+                (datetime(2024, 1, 6), 300.00, "R", "BancoInter"),
+            ]
+        )
+        chains, pairs, unpaired = _chains(df)
+        assert pairs == []
+        assert unpaired == [0, 1]
+        assert len(chains) == 1
+        assert chains[0]["contas"] == ["BbCorrente", "BancoInter"]
+
+    def test_single_account_passage_is_not_a_chain(self):
+        df = _transfer_df(
+            [
+                (datetime(2024, 1, 5), 10.00, "R", "C6Bank"),
+                (datetime(2024, 1, 5), -10.00, "D", "C6Bank"),
+            ]
+        )
+        chains, _, _ = _chains(df)
+        assert chains == []
+
+    def test_ignores_hop_outside_window(self):
+        df = _transfer_df(
+            [
+                (datetime(2024, 1, 5), -1000.00, "D", "BbCorrente"),
+                (datetime(2024, 1, 5), 1000.00, "R", "BancoInter"),
+                (datetime(2024, 1, 20), -1000.00, "D", "BancoInter"),
+                (datetime(2024, 1, 20), 1000.00, "R", "CdbInter"),
+            ]
+        )
+        chains, _, _ = _chains(df)
+        assert chains == []
+
+
+class TestGenerateChainEntries:
+    def test_generates_single_multi_posting_entry(self):
+        df = _transfer_df(
+            [
+                (datetime(2024, 1, 5), -1000.00, "D", "BbCorrente"),
+                (datetime(2024, 1, 5), 1000.00, "R", "BancoInter"),
+                (datetime(2024, 1, 6), -1000.00, "D", "BancoInter"),
+                (datetime(2024, 1, 6), 1000.00, "R", "CdbInter"),
+            ]
+        )
+        chains, _, _ = _chains(df)
+        lines, count = generate_chain_entries(df, chains)
+        assert count == 1
+        postings = [line for line in lines if line.endswith("BRL")]
+        assert len(postings) == 4
+        assert "Assets:BR:BbCorrente" in postings[0]
+        assert "-1000.00" in postings[0]
+        assert "Assets:BR:CdbInter" in postings[-1]
+        assert not any("TransferenciasPendentes" in line for line in lines)
+        assert '  cadeia: "BbCorrente -> BancoInter -> CdbInter"' in lines
+
+    def test_unbalanced_component_is_not_a_chain(self):
+        df = _transfer_df(
+            [
+                (datetime(2024, 1, 5), 500.00, "R", "BancoInter"),
+                (datetime(2024, 1, 6), -500.00, "D", "BancoInter"),
+                (datetime(2024, 1, 6), 500.00, "R", "CdbInter"),
+            ]
+        )
+        chains, pairs, _ = _chains(df)
+        # O par do dia 6 segue como par; o R solto não vai para Equity
+        assert chains == []
+        assert pairs == [(1, 2)]
@@ -2,14 +2,15 @@ import pandas as pd
 import pytest
 from datetime import datetime
 
-import sys
-
-sys.path.insert(0, "/home/s015533607/Documentos/desenv/pla/importers")
-
+from organizze_shared import add_cents_column
 from transfers_handler import (
     identify_transfers,
     generate_transfer_entries,
     generate_orphan_transfer_entries,
+    log_orphans,
+    sample_orphans,
+    summarize_orphans,
+    write_orphans_file,
 )
 
 
@@ -30,11 +31,29 @@ class TestIdentifyTransfers:
             "Categoria": ["Transferências", "Transferências"],
             "Situação": ["Pago", "Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         processed, orphans = identify_transfers(df, set())
         assert len(processed) == 2
         assert len(orphans) == 0
 
+    def test_pairs_amounts_with_float_noise(self):
+        data = {
+            "Data": [
+                datetime(2024, 1, 15),
+                datetime(2024, 1, 15),
+            ],
+            "Descrição": ["Transferência D", "Transferência R"],
+            "Valor": [-(0.1 + 0.2), 0.3],
+            "D/R": ["D", "R"],
+            "CONTA": ["BbCorrente", "BancoInter"],
+            "Categoria": ["Transferências", "Transferências"],
+            "Situação": ["Pago", "Pago"],
+        }
+        df = add_cents_column(pd.DataFrame(data))
+        processed, orphans = identify_transfers(df, set())
+        assert processed == {0, 1}
+        assert len(orphans) == 0
+
     def test_identifies_saldo_inicial(self):
         data = {
             "Data": [datetime(2024, 1, 1)],
@@ -45,7 +64,7 @@ class TestIdentifyTransfers:
             "Categoria": ["Outros"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         processed, orphans = identify_transfers(df, set())
         assert len(processed) == 0
         assert len(orphans) == 1
@@ -61,7 +80,7 @@ class TestIdentifyTransfers:
             "Categoria": ["Outros"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         processed, orphans = identify_transfers(df, set())
         assert len(processed) == 0
         assert len(orphans) == 1
@@ -77,7 +96,7 @@ class TestIdentifyTransfers:
             "Categoria": ["Transferências"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         processed, orphans = identify_transfers(df, {0})
         assert len(processed) == 0
         assert len(orphans) == 0
@@ -95,7 +114,7 @@ class TestIdentifyTransfers:
             "Categoria": ["outros", "outros"],
             "Situação": ["Pago", "Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         processed, orphans = identify_transfers(df, set())
         assert len(processed) == 2
         assert len(orphans) == 0
@@ -118,7 +137,7 @@ class TestGenerateTransferEntries:
             "Categoria": ["Transferências", "Transferências"],
             "Situação": ["Pago", "Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         processed = {0, 1}
         lines, count = generate_transfer_entries(df, processed)
         assert count == 1
@@ -135,7 +154,7 @@ class TestGenerateTransferEntries:
             "Categoria": ["Outros"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         processed = {0}
         lines, count = generate_transfer_entries(df, processed)
         assert count == 0
@@ -163,7 +182,7 @@ class TestGenerateOrphanTransferEntries:
             "Categoria": ["Outros"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         lines, count = generate_orphan_transfer_entries(orphans, df)
         assert count == 1
         assert "Equity:SaldoInicial" in lines[2]
@@ -189,7 +208,7 @@ class TestGenerateOrphanTransferEntries:
             "Categoria": ["Outros"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         lines, count = generate_orphan_transfer_entries(orphans, df)
         assert count == 1
         assert "Equity:Ajustes" in lines[2]
@@ -215,7 +234,92 @@ class TestGenerateOrphanTransferEntries:
             "Categoria": ["Transferências"],
             "Situação": ["Pago"],
         }
-        df = pd.DataFrame(data)
+        df = add_cents_column(pd.DataFrame(data))
         lines, count = generate_orphan_transfer_entries(orphans, df)
         assert count == 1
         assert "Equity:TransferenciasPendentes" in lines[1]
+
+    @pytest.mark.parametrize(
+        "tipo,dr,esperado",
+        [
+            (None, "R", "50.00"),
+            (None, "D", "-50.00"),
+            ("saldo_inicial", "D", "-50.00"),
+            ("saldo_inicial", "R", "50.00"),
+            ("ajuste", "D", "-50.00"),
+            ("ajuste", "R", "50.00"),
+        ],
+    )
+    def test_account_posting_signed_by_dr(self, tipo, dr, esperado):
+        df = add_cents_column(
+            pd.DataFrame(
+                {
+                    "Data": [datetime(2024, 1, 1)],
+                    "Descrição": ["Ajuste"],
+                    "Valor": [50.00],
+                    "D/R": [dr],
+                    "CONTA": ["BbCorrente"],
+                }
+            )
+        )
+        orphans = [{"idx": 0, "conta": "BbCorrente", "dr": dr, "tipo": tipo}]
+        lines, _ = generate_orphan_transfer_entries(orphans, df)
+        postings = [line.split() for line in lines[1:3]]
+        assert ["Assets:BR:BbCorrente", esperado, "BRL"] in postings
+
+
+def _orphans(n, conta="BbCorrente"):
+    return [
+        {
+            "idx": i,
+            "conta": conta,
+            "centavos": 1000 + i,
+            "data": datetime(2024, 1 + i % 2, 10),
+            "dr": "D",
+            "desc": f"Transferência {i}",
+            "debug_motivo": "sem_par_identificado_D",
+        }
+        for i in range(n)
+    ]
+
+
+class TestOrphanLogging:
+    def test_summarizes_by_account_month_and_reason(self):
+        orphans = _orphans(3) + [
+            {**_orphans(1, "BancoInter")[0], "tipo": "saldo_inicial"}
+        ]
+        summary = summarize_orphans(orphans)
+        assert summary.iloc[0].to_dict() == {
+            "conta": "BbCorrente",
+            "mes": "2024-01",
+            "motivo": "sem_par_identificado_D",
+            "quantidade": 2,
+            "centavos": 1000 + 1002,
+        }
+        assert summary["quantidade"].sum() == 4
+        assert "saldo_inicial" in set(summary["motivo"])
+
+    def test_sample_is_capped_and_spread(self):
+        orphans = _orphans(100)
+        amostra = sample_orphans(orphans, 5)
+        assert [o["idx"] for o in amostra] == [0, 25, 50, 74, 99]
+        assert sample_orphans(orphans, 0) == []
+        assert len(sample_orphans(orphans[:3], 5)) == 3
+
+    def test_log_caps_detail_warnings(self, caplog):
+        with caplog.at_level("INFO", logger="transfers_handler"):
+            log_orphans(_orphans(50), max_detalhes=3)
+        warnings = [r for r in caplog.records if r.levelname == "WARNING"]
+        assert len(warnings) == 4
+        assert "mais 47" in warnings[-1].getMessage()
+        assert any(
+            "Órfãos por conta: BbCorrente=50" in r.getMessage() for r in caplog.records
+        )
+
+    def test_writes_full_orphan_file(self, tmp_path):
+        path = tmp_path / "orfaos.csv"
+        write_orphans_file(_orphans(30), path)
+        frame = pd.read_csv(path)
+        assert len(frame) == 30
+        assert list(frame.columns[:3]) == ["idx", "data", "conta"]
+        assert frame.loc[0, "valor"] == 10.0
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Compara a saída de duas implementações do importador Organizze.
+
+Cada importador (ex: organizze_v5 e um motor novo) roda como script, numa
+cópia temporária do projeto (importers/ e config/), sobre a mesma entrada
+em data/unificado_dr_ordenado.xlsx. Os history.beancount gerados são
+comparados lançamento a lançamento, pela chave (data, contas e valores):
+- lançamentos só na referência ou só no candidato
+- lançamentos com a mesma chave mas flag ou descrição diferentes
+- contas abertas em accounts.beancount que diferem
+
+Também reporta o tempo de cada execução e o speedup do candidato.
+Sai com código 1 se houver qualquer diferença.
+
+Uso:
+    python tools/comparar_importadores.py organizze_v5 organizze_v6
+    python tools/comparar_importadores.py organizze_v4 organizze_v5 --sintetico 20000
+"""
+
+import argparse
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+import pandas as pd
+from beancount.core import data as bdata
+from beancount.parser import parser as bparser
+
+from gerar_organizze_sintetico import gerar_exportacao
+
+
+PROJECT_DIR = Path(__file__).parent.parent
+DEFAULT_INPUT = PROJECT_DIR / "data" / "unificado_dr_ordenado.xlsx"
+INPUT_NAME = "unificado_dr_ordenado.xlsx"
+MAX_DIFFS_EXIBIDOS = 20
+
+
+def entry_key(entry: bdata.Transaction) -> tuple:
+    """Chave de comparação: data e (conta, valor, moeda) de cada posting."""
+    postings = sorted(
+        (p.account, p.units.number, p.units.currency) for p in entry.postings
+    )
+    return (entry.date, tuple(postings))
+
+
+def load_transactions(path: Path) -> list[bdata.Transaction]:
+    """Transações de um arquivo Beancount (só parse, sem validação)."""
+    entries, errors, _ = bparser.parse_file(str(path))
+    if errors:
+        raise ValueError(f"{path}: {len(errors)} erros de parse; primeiro: {errors[0]}")
+    return [e for e in entries if isinstance(e, bdata.Transaction)]
+
+
+def load_open_accounts(path: Path) -> set[str]:
+    """Contas abertas (diretivas open) de um arquivo Beancount."""
+    if not path.exists():
+        return set()
+    entries, _, _ = bparser.parse_file(str(path))
+    return {e.account for e in entries if isinstance(e, bdata.Open)}
+
+
+def _flags_and_narrations(entries: list[bdata.Transaction]) -> dict[tuple, Counter]:
+    info: dict[tuple, Counter] = {}
+    for entry in entries:
+        info.setdefault(entry_key(entry), Counter())[(entry.flag, entry.narration)] += 1
+    return info
+
+
+def compare_transactions(
+    referencia: list[bdata.Transaction],
+    candidato: list[bdata.Transaction],
+) -> dict[str, list]:
+    """
+    Compara dois conjuntos de transações como multiconjuntos de chaves.
+
+    Returns:
+        Dict com so_referencia e so_candidato (chaves, com repetição) e
+        alterados (chave, (flag, descrição) ref, (flag, descrição) cand)
+    """
+    ref_keys = Counter(entry_key(e) for e in referencia)
+    cand_keys = Counter(entry_key(e) for e in candidato)
+    ref_info = _flags_and_narrations(referencia)
+    cand_info = _flags_and_narrations(candidato)
+
+    alterados = []
+    for key in ref_keys.keys() & cand_keys.keys():
+        so_ref = ref_info[key] - cand_info[key]
+        so_cand = cand_info[key] - ref_info[key]
+        for antes, depois in zip(sorted(so_ref.elements()), sorted(so_cand.elements())):
+            alterados.append((key, antes, depois))
+
+    return {
+        "so_referencia": sorted((ref_keys - cand_keys).elements()),
+        "so_candidato": sorted((cand_keys - ref_keys).elements()),
+        "alterados": sorted(alterados),
+    }
+
+
+def run_importer(modulo: str, entrada: Path, projeto: Path) -> tuple[Path, float]:
+    """
+    Roda importers/<modulo>.py numa cópia do projeto criada em `projeto`.
+
+    Returns:
+        Tuple (diretório ledger gerado, segundos de execução)
+    """
+    shutil.copytree(
+        PROJECT_DIR / "importers",
+        projeto / "importers",
+        ignore=shutil.ignore_patterns("__pycache__"),
+    )
+    shutil.copytree(PROJECT_DIR / "config", projeto / "config")
+    (projeto / "data").mkdir()
+    (projeto / "ledger").mkdir()
+    shutil.copy(entrada, projeto / "data" / INPUT_NAME)
+
+    script = projeto / "importers" / f"{modulo}.py"
+    if not script.exists():
+        raise FileNotFoundError(f"Importador não encontrado: importers/{modulo}.py")
+
+    inicio = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, str(script)],
+        cwd=script.parent,
+        capture_output=True,
+        text=True,
+    )
+    segundos = time.perf_counter() - inicio
+    if result.returncode != 0:
+        raise RuntimeError(f"{modulo} falhou:\n{result.stderr[-2000:]}")
+    return projeto / "ledger", segundos
+
+
+def format_key(key: tuple) -> str:
+    data, postings = key
+    partes = ", ".join(f"{conta} {valor} {moeda}" for conta, valor, moeda in postings)
+    return f"{data} [{partes}]"
+
+
+def print_report(
+    diffs: dict[str, list],
+    contas: tuple[set[str], set[str]],
+    tempos: tuple[float, float],
+    nomes: tuple[str, str],
+    totais: tuple[int, int],
+) -> bool:
+    """
+    Imprime o relatório da comparação.
+
+    Returns:
+        True se as saídas são equivalentes
+    """
+    ref, cand = nomes
+    print(f"Lançamentos: {ref}={totais[0]} {cand}={totais[1]}")
+    print(
+        f"Tempo: {ref}={tempos[0]:.2f}s {cand}={tempos[1]:.2f}s "
+        f"(speedup {tempos[0] / tempos[1]:.2f}x)"
+    )
+
+    secoes = [
+        (f"Só em {ref}", [format_key(k) for k in diffs["so_referencia"]]),
+        (f"Só em {cand}", [format_key(k) for k in diffs["so_candidato"]]),
+        (
+            "Flag/descrição diferentes",
+            [
+                f"{format_key(k)}: {antes} -> {depois}"
+                for k, antes, depois in diffs["alterados"]
+            ],
+        ),
+        (f"Contas só em {ref}", sorted(contas[0] - contas[1])),
+        (f"Contas só em {cand}", sorted(contas[1] - contas[0])),
+    ]
+
+    equivalentes = True
+    for titulo, linhas in secoes:
+        if not linhas:
+            continue
+        equivalentes = False
+        print(f"{titulo}: {len(linhas)}")
+        for linha in linhas[:MAX_DIFFS_EXIBIDOS]:
+            print(f"  {linha}")
+        if len(linhas) > MAX_DIFFS_EXIBIDOS:
+            print(f"  ... mais {len(linhas) - MAX_DIFFS_EXIBIDOS}")
+
+    print("Saídas equivalentes" if equivalentes else "Saídas DIFERENTES")
+    return equivalentes
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Compara a saída de duas implementações do importador"
+    )
+    parser.add_argument("referencia", help="Módulo de referência (ex: organizze_v5)")
+    parser.add_argument("candidato", help="Módulo candidato (ex: organizze_v6)")
+    parser.add_argument(
+        "--entrada",
+        type=Path,
+        default=DEFAULT_INPUT,
+        help="Exportação .xlsx usada pelos dois importadores",
+    )
+    parser.add_argument(
+        "--sintetico",
+        type=int,
+        metavar="LINHAS",
+        help="Usa uma exportação sintética com este número de linhas",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Semente do sintético")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        entrada = args.entrada
+        if args.sintetico:
+            entrada = workdir / INPUT_NAME
+            gerar_exportacao(args.sintetico, seed=args.seed).to_excel(
+                entrada, index=False
+            )
+        elif entrada.suffix != ".xlsx":
+            convertida = workdir / INPUT_NAME
+            leitor = pd.read_parquet if entrada.suffix == ".parquet" else pd.read_csv
+            leitor(entrada).to_excel(convertida, index=False)
+            entrada = convertida
+
+        ledger_ref, tempo_ref = run_importer(
+            args.referencia, entrada, workdir / "referencia"
+        )
+        ledger_cand, tempo_cand = run_importer(
+            args.candidato, entrada, workdir / "candidato"
+        )
+
+        ref = load_transactions(ledger_ref / "history.beancount")
+        cand = load_transactions(ledger_cand / "history.beancount")
+        contas = (
+            load_open_accounts(ledger_ref / "accounts.beancount"),
+            load_open_accounts(ledger_cand / "accounts.beancount"),
+        )
+
+    equivalentes = print_report(
+        compare_transactions(ref, cand),
+        contas,
+        (tempo_ref, tempo_cand),
+        (args.referencia, args.candidato),
+        (len(ref), len(cand)),
+    )
+    return 0 if equivalentes else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
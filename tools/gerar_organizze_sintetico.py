@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+"""
+Gerador de exportações sintéticas do Organizze para testes de escala.
+
+Produz o mesmo formato de data/unificado_dr_ordenado.xlsx (Data, Descrição,
+Categoria, Valor, D/R, CONTA, Situação, conta_beancount), com as contas de
+ACCOUNTS_TYPE e os casos que o importador trata:
+- despesas e receitas regulares
+- pares de transferência (incluindo saques para a Carteira)
+- pagamentos de fatura (um por ciclo com compras, no vencimento, com o
+  total do ciclo) e boletos
+- despesas "Outros" em cartão, ajustes de saldo e um saldo inicial por conta
+- pernas de transferência sem contraparte (taxa configurável)
+
+Compras em cartão caem nos ciclos de CICLOS (lidos de
+config/ciclos_cartoes.yaml, a mesma configuração do importador) e cada ciclo
+é pago pelo seu total (calculado com card_cycles.compute_charge_frame, como
+o importador faz): o casamento de pagamentos com faturas e as asserções de
+ciclo fecham.
+
+A mesma semente gera sempre o mesmo arquivo. Tudo é gerado em arrays numpy,
+sem laço por linha, para chegar a milhões de linhas.
+
+Uso:
+    python tools/gerar_organizze_sintetico.py --linhas 100000 --seed 7 \\
+        --saida data/sintetico_100k.parquet
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "importers"))
+
+from card_cycles import (
+    charge_cycle_keys,
+    compute_charge_frame,
+    cycle_dates,
+    load_cycle_config,
+)
+from organizze_shared import ACCOUNTS_TYPE, CENTS_COLUMN
+
+
+COLUNAS = [
+    "Data",
+    "Descrição",
+    "Categoria",
+    "Valor",
+    "D/R",
+    "CONTA",
+    "Situação",
+    "conta_beancount",
+]
+
+BANCOS = [
+    c for c, tipo in ACCOUNTS_TYPE.items() if tipo == "Assets" and c != "Carteira"
+]
+CARTOES = [c for c, tipo in ACCOUNTS_TYPE.items() if tipo == "Liabilities"]
+
+# Proporção das linhas por tipo de lançamento; o restante vira despesa
+PROPORCOES = {
+    "receita": 0.10,
+    "transferencia": 0.18,
+    "saque": 0.03,
+    "pagamento_cartao": 0.04,
+    "boleto": 0.04,
+    "despesa_cartao": 0.02,
+    "ajuste": 0.005,
+}
+
+DESPESAS = [
+    ("Supermercado", "Alimentação"),
+    ("Restaurante", "Alimentação"),
+    ("Farmácia", "Saúde"),
+    ("Consulta médica", "Saúde"),
+    ("Aluguel", "Moradia"),
+    ("Condomínio", "Moradia"),
+    ("Uber", "Transporte"),
+    ("Combustível", "Transporte"),
+    ("Cinema", "Lazer"),
+    ("Curso online", "Educação"),
+]
+RECEITAS = ["Salário", "Rendimento", "Reembolso", "Freelance"]
+
+# Cartão -> conta que paga a fatura (como em config/roteamento_cartoes.yaml)
+PAGAMENTOS_CARTAO = {
+    "CartaoDeCreditoInter": "BancoInter",
+    "MastercardC6Bank": "C6Bank",
+    "LatamPass": "ItauPersonalite",
+    "Saraiva": "BbCorrente",
+    "SmilesBbPlatinum": "BbCorrente",
+}
+
+# Dias de fechamento/vencimento: os mesmos de config/ciclos_cartoes.yaml que
+# o importador usa, para faturas e pagamentos fecharem
+CICLOS = load_cycle_config()
+
+# Cartões abertos depois do início: antes de 2023-04-10 o roteamento manda
+# todo pagamento do BB para o Saraiva
+ABERTURA_CARTOES = {"SmilesBbPlatinum": "2023-04-10"}
+
+OVERRIDES = ["Expenses:Reembolsavel", "Assets:BR:Emprestimos"]
+
+LIMITE_XLSX = 1_048_575
+
+
+def _centavos(rng: np.random.Generator, n: int, mediana: float) -> np.ndarray:
+    """Valores log-normais em centavos (mínimo 1)."""
+    valores = rng.lognormal(np.log(mediana * 100), 1.0, n)
+    return np.maximum(valores.round(), 1).astype(np.int64)
+
+
+def _bloco(datas, descricoes, categorias, centavos, dr, contas, **extra) -> dict:
+    n = len(datas)
+    return {
+        "Data": datas,
+        "Descrição": np.broadcast_to(np.asarray(descricoes, dtype=object), n),
+        "Categoria": np.broadcast_to(np.asarray(categorias, dtype=object), n),
+        "centavos": centavos,
+        "D/R": np.broadcast_to(np.asarray(dr, dtype=object), n),
+        "CONTA": np.broadcast_to(np.asarray(contas, dtype=object), n),
+        **extra,
+    }
+
+
+def _ciclos_pagaveis(inicio: pd.Timestamp, fim: pd.Timestamp) -> pd.DataFrame:
+    """
+    Ciclos de cada cartão entre a abertura e fim com vencimento até fim.
+
+    Returns:
+        DataFrame com cartao, ciclo, abertura (primeiro dia de compras),
+        fechamento e vencimento
+    """
+    partes = []
+    for cartao, dias in CICLOS.items():
+        fechamento, vencimento = dias["fechamento"], dias["vencimento"]
+        abertura = max(inicio, pd.Timestamp(ABERTURA_CARTOES.get(cartao, inicio)))
+        datas = pd.Series([abertura, fim])
+        primeiro, ultimo = charge_cycle_keys(datas, fechamento)
+        ciclos = np.arange(primeiro, ultimo + 1)
+        partes.append(
+            pd.DataFrame(
+                {
+                    "cartao": cartao,
+                    "ciclo": ciclos,
+                    "abertura": (
+                        cycle_dates(ciclos - 1, fechamento) + pd.Timedelta(days=1)
+                    ).clip(lower=abertura),
+                    "fechamento": cycle_dates(ciclos, fechamento),
+                    "vencimento": cycle_dates(
+                        ciclos + (vencimento <= fechamento), vencimento
+                    ),
+                }
+            )
+        )
+    ciclos = pd.concat(partes, ignore_index=True)
+    return ciclos[ciclos["vencimento"] <= fim].reset_index(drop=True)
+
+
+def _frame(blocos: list[dict]) -> pd.DataFrame:
+    """Concatena os blocos (centavos em CENTS_COLUMN)."""
+    colunas = {
+        nome: np.concatenate([np.asarray(b[nome]) for b in blocos])
+        for nome in ("Data", "Descrição", "Categoria", "centavos", "D/R", "CONTA")
+    }
+    override = np.concatenate(
+        [
+            b["conta_beancount"]
+            if "conta_beancount" in b
+            else np.full(len(b["Data"]), None, dtype=object)
+            for b in blocos
+        ]
+    )
+    return pd.DataFrame(
+        {
+            "Data": pd.to_datetime(colunas["Data"]),
+            "Descrição": pd.Series(colunas["Descrição"], dtype=object),
+            "Categoria": pd.Series(colunas["Categoria"], dtype=object),
+            CENTS_COLUMN: colunas["centavos"].astype(np.int64),
+            "D/R": pd.Series(colunas["D/R"], dtype=object),
+            "CONTA": pd.Series(colunas["CONTA"], dtype=object),
+            "conta_beancount": pd.Series(override, dtype=object),
+        }
+    )
+
+
+def _contagens(linhas: int, taxa_orfaos: float, n_saldos: int) -> dict[str, int]:
+    """Número de linhas (ou pares) de cada tipo, somando exatamente `linhas`."""
+    livres = linhas - n_saldos
+    if livres < 0:
+        raise ValueError(f"São necessárias ao menos {n_saldos} linhas")
+
+    contagens = {
+        "orfao": int(livres * taxa_orfaos),
+        "receita": int(livres * PROPORCOES["receita"]),
+        "transferencia": int(livres * PROPORCOES["transferencia"]) // 2,
+        "saque": int(livres * PROPORCOES["saque"]) // 2,
+        "pagamento_cartao": int(livres * PROPORCOES["pagamento_cartao"]),
+        "boleto": int(livres * PROPORCOES["boleto"]),
+        "despesa_cartao": int(livres * PROPORCOES["despesa_cartao"]),
+        "ajuste": int(livres * PROPORCOES["ajuste"]),
+    }
+    usadas = sum(contagens.values()) + contagens["transferencia"] + contagens["saque"]
+    contagens["despesa"] = livres - usadas
+    if contagens["despesa"] < 0:
+        raise ValueError(f"taxa de órfãos alta demais: {taxa_orfaos}")
+    return contagens
+
+
+def gerar_exportacao(
+    linhas: int,
+    seed: int = 0,
+    taxa_orfaos: float = 0.02,
+    inicio: str = "2022-01-01",
+    fim: str = "2025-12-31",
+    taxa_agendado: float = 0.03,
+    taxa_override: float = 0.01,
+) -> pd.DataFrame:
+    """
+    Gera uma exportação sintética determinística.
+
+    Returns:
+        DataFrame com COLUNAS, `linhas` linhas, ordenado por Data, Valor e D/R
+        (como a saída da etapa2_ordenar)
+    """
+    rng = np.random.default_rng(seed)
+    inicio_ts = pd.Timestamp(inicio)
+    dias = (pd.Timestamp(fim) - inicio_ts).days + 1
+    contas_saldo = list(ACCOUNTS_TYPE)
+    n = _contagens(linhas, taxa_orfaos, len(contas_saldo))
+
+    # Ciclos pagos: o primeiro de cada cartão (recebe o saldo inicial) e uma
+    # amostra dos demais, um pagamento por ciclo
+    ciclos = _ciclos_pagaveis(inicio_ts, pd.Timestamp(fim))
+    primeiros = ciclos.groupby("cartao").head(1).index.to_numpy()
+    outros = ciclos.index.difference(primeiros).to_numpy()
+    extras = min(max(n["pagamento_cartao"] - len(primeiros), 0), len(outros))
+    pagos = ciclos.loc[
+        np.sort(np.concatenate([primeiros, rng.choice(outros, extras, replace=False)]))
+    ].reset_index(drop=True)
+    # Cada ciclo pago tem ao menos uma despesa "Outros" no cartão; a diferença
+    # nas contagens sai das despesas regulares, e o total continua `linhas`
+    n_cartao = max(n["despesa_cartao"], len(pagos))
+    n["despesa"] -= len(pagos) - n["pagamento_cartao"] + n_cartao - n["despesa_cartao"]
+    n["pagamento_cartao"], n["despesa_cartao"] = len(pagos), n_cartao
+    if n["despesa"] < 0:
+        raise ValueError(f"linhas insuficientes para {len(pagos)} ciclos de fatura")
+
+    def datas(k: int) -> np.ndarray:
+        offsets = rng.integers(1, dias, k).astype("timedelta64[D]")
+        return np.datetime64(inicio_ts.date()) + offsets
+
+    def datas_ciclo(posicoes: np.ndarray) -> np.ndarray:
+        """Data sorteada dentro de cada ciclo pago em `posicoes`."""
+        abertura = pagos["abertura"].to_numpy()[posicoes]
+        duracao = (pagos["fechamento"].to_numpy()[posicoes] - abertura).astype(
+            "timedelta64[D]"
+        ).astype(np.int64) + 1
+        offsets = (rng.random(len(posicoes)) * duracao).astype(np.int64)
+        return (abertura + offsets.astype("timedelta64[D]")).astype("datetime64[D]")
+
+    blocos = []
+
+    # Saldo inicial: um por conta, no primeiro dia (cartões: na abertura, no
+    # primeiro ciclo); nos cartões é dívida (D)
+    k = len(contas_saldo)
+    e_cartao = np.isin(contas_saldo, CARTOES)
+    blocos.append(
+        _bloco(
+            pd.to_datetime(
+                [ABERTURA_CARTOES.get(conta, inicio) for conta in contas_saldo]
+            ).to_numpy(dtype="datetime64[D]"),
+            "Saldo inicial",
+            "Transferências",
+            _centavos(rng, k, 2000),
+            np.where(e_cartao | (rng.random(k) >= 0.8), "D", "R").astype(object),
+            np.array(contas_saldo, dtype=object),
+        )
+    )
+
+    # Despesas regulares em bancos e cartões
+    k = n["despesa"]
+    escolha = rng.integers(0, len(DESPESAS), k)
+    contas = np.array(BANCOS + CARTOES, dtype=object)
+    despesas = np.array(DESPESAS, dtype=object)
+    override = np.where(
+        rng.random(k) < taxa_override,
+        np.array(OVERRIDES, dtype=object)[rng.integers(0, len(OVERRIDES), k)],
+        None,
+    )
+    conta_despesa = contas[rng.integers(0, len(contas), k)]
+    # Compras em cartão caem só em ciclos pagos
+    data_despesa = datas(k)
+    em_cartao = np.flatnonzero(np.isin(conta_despesa, CARTOES))
+    por_cartao = pagos.groupby("cartao").indices
+    for cartao, posicoes in por_cartao.items():
+        linhas_cartao = em_cartao[conta_despesa[em_cartao] == cartao]
+        sorteio = posicoes[rng.integers(0, len(posicoes), len(linhas_cartao))]
+        data_despesa[linhas_cartao] = datas_ciclo(sorteio)
+    blocos.append(
+        _bloco(
+            data_despesa,
+            despesas[escolha, 0],
+            despesas[escolha, 1],
+            _centavos(rng, k, 80),
+            "D",
+            conta_despesa,
+            conta_beancount=override,
+        )
+    )
+
+    # Receitas
+    k = n["receita"]
+    blocos.append(
+        _bloco(
+            datas(k),
+            np.array(RECEITAS, dtype=object)[rng.integers(0, len(RECEITAS), k)],
+            "Recebimentos",
+            _centavos(rng, k, 1500),
+            "R",
+            np.array(BANCOS, dtype=object)[rng.integers(0, len(BANCOS), k)],
+        )
+    )
+
+    # Pares de transferência entre bancos distintos (mesma data e valor)
+    k = n["transferencia"]
+    bancos = np.array(BANCOS, dtype=object)
+    origem = rng.integers(0, len(BANCOS), k)
+    destino = (origem + rng.integers(1, len(BANCOS), k)) % len(BANCOS)
+    data_par = datas(k)
+    valor_par = _centavos(rng, k, 500)
+    blocos.append(
+        _bloco(
+            data_par,
+            "Transferência para " + bancos[destino],
+            "Transferências",
+            valor_par,
+            "D",
+            bancos[origem],
+        )
+    )
+    blocos.append(
+        _bloco(
+            data_par,
+            "Transferência de " + bancos[origem],
+            "Transferências",
+            valor_par,
+            "R",
+            bancos[destino],
+        )
+    )
+
+    # Saques: banco -> Carteira
+    k = n["saque"]
+    data_par = datas(k)
+    valor_par = rng.choice([2000, 5000, 10000, 20000], k).astype(np.int64)
+    blocos.append(
+        _bloco(
+            data_par,
+            "Saque ATM",
+            "Transferências",
+            valor_par,
+            "D",
+            bancos[rng.integers(0, len(BANCOS), k)],
+        )
+    )
+    blocos.append(
+        _bloco(data_par, "Saque ATM", "Transferências", valor_par, "R", "Carteira")
+    )
+
+    # Pernas de transferência sem contraparte
+    k = n["orfao"]
+    blocos.append(
+        _bloco(
+            datas(k),
+            "Transferência",
+            "Transferências",
+            _centavos(rng, k, 300),
+            np.where(rng.random(k) < 0.5, "D", "R").astype(object),
+            bancos[rng.integers(0, len(BANCOS), k)],
+        )
+    )
+
+    # Boletos
+    k = n["boleto"]
+    blocos.append(
+        _bloco(
+            datas(k),
+            np.where(rng.random(k) < 0.5, "Pagamento de título", "Boleto luz").astype(
+                object
+            ),
+            "Moradia",
+            _centavos(rng, k, 250),
+            "D",
+            bancos[rng.integers(0, len(BANCOS), k)],
+        )
+    )
+
+    # Despesas "Outros" em cartão: uma em cada ciclo pago, o resto sorteado
+    k = n["despesa_cartao"]
+    posicoes = np.concatenate(
+        [np.arange(len(pagos)), rng.integers(0, len(pagos), k - len(pagos))]
+    )
+    blocos.append(
+        _bloco(
+            datas_ciclo(posicoes),
+            "Compra parcelada",
+            "Outros",
+            _centavos(rng, k, 150),
+            "D",
+            pagos["cartao"].to_numpy(dtype=object)[posicoes],
+        )
+    )
+
+    # Ajustes de saldo
+    k = n["ajuste"]
+    blocos.append(
+        _bloco(
+            datas(k),
+            "Ajuste de saldo",
+            "Moradia",
+            _centavos(rng, k, 20),
+            np.where(rng.random(k) < 0.5, "D", "R").astype(object),
+            bancos[rng.integers(0, len(BANCOS), k)],
+        )
+    )
+
+    # Pagamentos de fatura (só a perna bancária, como no Organizze): no
+    # vencimento, com o total do ciclo no cartão
+    compras = compute_charge_frame(_frame(blocos), CICLOS)
+    totais = compras.groupby(["cartao", "ciclo"])["centavos"].sum()
+    pagos = pagos.join(totais.rename("total"), on=["cartao", "ciclo"])
+    blocos.append(
+        _bloco(
+            pagos["vencimento"].to_numpy(),
+            "Pagamento de fatura " + pagos["cartao"].to_numpy(dtype=object),
+            "Pagamento de fatura",
+            pagos["total"].to_numpy(dtype=np.int64),
+            "D",
+            pagos["cartao"].map(PAGAMENTOS_CARTAO).to_numpy(dtype=object),
+        )
+    )
+
+    colunas = _frame(blocos)
+    total = len(colunas)
+    situacao = np.where(rng.random(total) < taxa_agendado, "Agendado", "Pago")
+
+    colunas["Valor"] = colunas[CENTS_COLUMN] / 100
+    colunas["Situação"] = pd.Series(situacao, dtype=object)
+    df = colunas[COLUNAS]
+    return df.sort_values(["Data", "Valor", "D/R"], kind="stable").reset_index(
+        drop=True
+    )
+
+
+def salvar_exportacao(df: pd.DataFrame, path: Path) -> None:
+    """Grava conforme a extensão: .xlsx, .csv ou .parquet."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == ".xlsx":
+        if len(df) > LIMITE_XLSX:
+            raise ValueError(
+                f"{len(df)} linhas excedem o limite do xlsx ({LIMITE_XLSX}); "
+                "use .csv ou .parquet"
+            )
+        df.to_excel(path, index=False)
+    elif path.suffix == ".csv":
+        df.to_csv(path, index=False)
+    elif path.suffix == ".parquet":
+        df.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"Extensão não suportada: {path.suffix}")
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        description="Gera exportação sintética do Organizze para testes de escala"
+    )
+    parser.add_argument("--linhas", type=int, default=10_000, help="Total de linhas")
+    parser.add_argument("--seed", type=int, default=0, help="Semente do gerador")
+    parser.add_argument(
+        "--taxa-orfaos",
+        type=float,
+        default=0.02,
+        help="Fração das linhas que são pernas de transferência sem par",
+    )
+    parser.add_argument("--inicio", default="2022-01-01", help="Primeira data")
+    parser.add_argument("--fim", default="2025-12-31", help="Última data")
+    parser.add_argument(
+        "--saida",
+        type=Path,
+        required=True,
+        help="Arquivo de saída (.xlsx, .csv ou .parquet)",
+    )
+    args = parser.parse_args(argv)
+
+    df = gerar_exportacao(
+        args.linhas,
+        seed=args.seed,
+        taxa_orfaos=args.taxa_orfaos,
+        inicio=args.inicio,
+        fim=args.fim,
+    )
+    salvar_exportacao(df, args.saida)
+    print(f"{len(df)} lançamentos gravados em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
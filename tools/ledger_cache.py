@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Cache de parse do ledger, por arquivo incluído.
+
+O loader do Beancount reparseia todos os arquivos incluídos em
+ledger/main.beancount a cada início do Fava, do bean-query ou do bean-check.
+Este módulo guarda o resultado de parser.parse_file de cada arquivo em
+pickle, com chave pelo hash do caminho seguido do hash do conteúdo (mais
+versão do Beancount). Só os arquivos que mudaram são parseados de novo; booking,
+plugins e validação continuam rodando normalmente sobre o resultado.
+
+Uso:
+    python tools/ledger_cache.py aquecer ledger/main.beancount
+    python tools/ledger_cache.py fava ledger/main.beancount
+    python tools/ledger_cache.py bean-query ledger/main.beancount queries/pendencias.bean
+    python tools/ledger_cache.py bean-check ledger/main.beancount
+    python tools/ledger_cache.py limpar
+
+Diretório do cache: .cache/ledger/ (ou PLA_LEDGER_CACHE).
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import pickle
+import sys
+import time
+from importlib.metadata import entry_points
+from pathlib import Path
+
+import beancount
+from beancount import loader
+from beancount.parser import parser
+
+
+PROJECT_DIR = Path(__file__).parent.parent
+CACHE_DIR = Path(os.getenv("PLA_LEDGER_CACHE", PROJECT_DIR / ".cache" / "ledger"))
+COMANDOS = ("fava", "bean-query", "bean-check")
+
+logger = logging.getLogger(__name__)
+
+_parse_file_original = parser.parse_file
+_stats = {"hits": 0, "misses": 0}
+
+
+def path_prefix(filename: str) -> str:
+    """Prefixo da chave: identifica o arquivo, qualquer que seja o conteúdo."""
+    return hashlib.sha256(os.path.abspath(filename).encode()).hexdigest()[:16]
+
+
+def cache_key(filename: str, content: bytes) -> str:
+    """
+    Prefixo do caminho + hash do conteúdo, do caminho (vai nos metadados) e
+    da versão do parser.
+    """
+    digest = hashlib.sha256()
+    digest.update(beancount.__version__.encode())
+    digest.update(b"\0")
+    digest.update(os.path.abspath(filename).encode())
+    digest.update(b"\0")
+    digest.update(content)
+    return f"{path_prefix(filename)}-{digest.hexdigest()}"
+
+
+def cached_parse_file(filename, *args, **kwargs):
+    """parser.parse_file com cache em disco por conteúdo do arquivo."""
+    if not isinstance(filename, str | os.PathLike) or args or kwargs.get("encoding"):
+        return _parse_file_original(filename, *args, **kwargs)
+
+    with open(filename, "rb") as f:
+        content = f.read()
+    cache_file = CACHE_DIR / f"{cache_key(filename, content)}.pickle"
+
+    if cache_file.exists():
+        try:
+            with open(cache_file, "rb") as f:
+                result = pickle.load(f)
+            _stats["hits"] += 1
+            return result
+        except (OSError, pickle.UnpicklingError, EOFError):
+            logger.warning("Cache corrompido, reparseando: %s", cache_file)
+
+    result = _parse_file_original(filename, *args, **kwargs)
+    _stats["misses"] += 1
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(cache_file)
+    except OSError as exc:
+        logger.warning("Não foi possível gravar o cache %s: %s", cache_file, exc)
+    return result
+
+
+def install() -> None:
+    """
+    Faz o loader do Beancount usar o cache por arquivo neste processo.
+
+    Desliga o picklecache do próprio Beancount, que guarda o ledger inteiro e
+    é invalidado por qualquer arquivo alterado.
+    """
+    loader.initialize(use_cache=False)
+    parser.parse_file = cached_parse_file
+
+
+def warm(ledger: Path) -> dict[str, int]:
+    """
+    Carrega o ledger pelo cache e remove entradas de arquivos que mudaram.
+
+    Só remove versões antigas dos arquivos incluídos por este ledger; o cache
+    de outros ledgers no mesmo diretório fica intacto.
+
+    Returns:
+        Dict com hits, misses e removidos
+    """
+    install()
+    _stats.update(hits=0, misses=0)
+    _, _, options_map = loader.load_file(str(ledger))
+
+    vivos = set()
+    prefixos = set()
+    for filename in options_map["include"]:
+        with open(filename, "rb") as f:
+            vivos.add(f"{cache_key(filename, f.read())}.pickle")
+        prefixos.add(path_prefix(filename))
+
+    removidos = 0
+    for prefixo in prefixos:
+        for cache_file in CACHE_DIR.glob(f"{prefixo}-*.pickle"):
+            if cache_file.name in vivos:
+                continue
+            cache_file.unlink()
+            removidos += 1
+    return {**_stats, "removidos": removidos}
+
+
+def clear() -> int:
+    """Apaga todo o cache. Returns: número de arquivos removidos."""
+    removidos = 0
+    for cache_file in CACHE_DIR.glob("*.pickle"):
+        cache_file.unlink()
+        removidos += 1
+    return removidos
+
+
+def run_command(comando: str, argv: list[str]) -> int:
+    """Roda fava/bean-query/bean-check neste processo, com o cache instalado."""
+    install()
+    (entry_point,) = entry_points(group="console_scripts", name=comando)
+    sys.argv = [comando, *argv]
+    try:
+        result = entry_point.load()()
+    except SystemExit as exc:
+        result = exc.code
+    return result if isinstance(result, int) else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMANDOS:
+        return run_command(argv[0], argv[1:])
+
+    arg_parser = argparse.ArgumentParser(
+        description="Cache de parse do ledger por arquivo incluído",
+        epilog=f"Também aceita: {', '.join(COMANDOS)} <argumentos do comando>",
+    )
+    sub = arg_parser.add_subparsers(dest="acao", required=True)
+    aquecer = sub.add_parser("aquecer", help="Preenche o cache e remove o que mudou")
+    aquecer.add_argument(
+        "ledger", type=Path, nargs="?", default=PROJECT_DIR / "ledger/main.beancount"
+    )
+    sub.add_parser("limpar", help="Apaga o cache")
+    args = arg_parser.parse_args(argv)
+
+    if args.acao == "limpar":
+        print(f"{clear()} arquivos removidos de {CACHE_DIR}")
+        return 0
+
+    inicio = time.perf_counter()
+    stats = warm(args.ledger)
+    print(
+        f"{args.ledger}: {stats['hits']} do cache, {stats['misses']} parseados, "
+        f"{stats['removidos']} entradas antigas removidas "
+        f"({time.perf_counter() - inicio:.2f}s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,16 +2,24 @@
 """
 Smart OFX Importer - Transforma transações OFX em lançamentos Beancount.
 Utiliza mapping.csv para classificação automática e FITID para deduplicação.
+Transferências próprias ficam registradas no relatório de pendências.
 """
 
 import argparse
 import csv
 import re
+import sys
 from datetime import datetime
 from pathlib import Path
 
 import ofxparse
 
+sys.path.insert(0, str(Path(__file__).parent.parent / "importers"))
+
+import pendencias_store
+import pending_reconciliation
+import scheduled_settlement
+
 
 def extrair_fitids_existentes(history_path: Path, imports_path: Path) -> set:
     """Extrai todos os FITIDs dos arquivos Beancount existentes."""
@@ -23,7 +31,7 @@ def extrair_fitids_existentes(history_path: Path, imports_path: Path) -> set:
 
         content = file_path.read_text(encoding="utf-8")
 
-        pattern = r'origem_id:\s*"([^"]+)"'
+        pattern = r'(?:origem|contraparte)_id:\s*"([^"]+)"'
         matches = re.findall(pattern, content)
         fitids.update(matches)
 
@@ -167,8 +175,18 @@ def processar_ofx(
     mapping: dict,
     fitids_existentes: set,
     nome_usuario: str = "Jose Eduardo",
+    pendencias: list | None = None,
+    pagamentos: list | None = None,
 ) -> tuple[list[str], int, int]:
-    """Processa arquivo OFX e retorna lista de lançamentos Beancount."""
+    """
+    Processa arquivo OFX e retorna lista de lançamentos Beancount.
+
+    Se `pendencias` for uma lista, recebe uma pendência (ver
+    pendencias_store) por transferência própria lançada contra
+    Equity:TransferenciasPendentes. Se `pagamentos` for uma lista, recebe
+    as demais transações novas no mesmo formato, para a liquidação de
+    agendados (ver scheduled_settlement).
+    """
 
     import tempfile
     import os
@@ -226,9 +244,30 @@ def processar_ofx(
             if is_transferencia_propria:
                 conta_alvo = "Equity:TransferenciasPendentes"
                 is_transferencia = True
+                if pendencias is not None:
+                    pendencias.append(
+                        {
+                            "id": f"ofx:{fitid}",
+                            "fonte": "ofx",
+                            "motivo": pendencias_store.MOTIVO_TRANSFERENCIA,
+                            "data": formatar_data_beancount(transacao.date),
+                            "conta": conta_bancaria,
+                            "centavos": int(round(transacao.amount * 100)),
+                            "descricao": re.sub(r"\s+", " ", memo or payee).strip(),
+                        }
+                    )
             else:
                 conta_alvo, _ = classificar_transacao(payee, memo, mapping)
                 is_transferencia = False
+                if pagamentos is not None:
+                    pagamentos.append(
+                        {
+                            "id": f"ofx:{fitid}",
+                            "data": formatar_data_beancount(transacao.date),
+                            "conta": conta_bancaria,
+                            "centavos": int(round(transacao.amount * 100)),
+                        }
+                    )
 
                 if conta_alvo == "Expenses:Ajustes":
                     nao_classificados += 1
@@ -249,6 +288,101 @@ def processar_ofx(
     return lancamentos, duplicados, nao_classificados
 
 
+def conciliar_transferencias(
+    store,
+    lancamentos: list[str],
+    pendencias: list[dict],
+    imports_path: Path,
+    history_path: Path,
+) -> tuple[list[str], list[dict], int]:
+    """
+    Junta transferências próprias novas com a perna oposta já pendente.
+
+    Perna oposta do OFX: as duas viram uma entrada em imports.beancount.
+    Perna oposta do Organizze: a órfã em history.beancount é trocada pela
+    entrada conciliada (o organizze_v5 a regenera a partir do relatório).
+
+    Returns:
+        Tuple (lançamentos a gravar, pendências ainda abertas, conciliadas)
+    """
+    pares = pending_reconciliation.reconcile(store, pendencias)
+    if not pares:
+        return lancamentos, pendencias, 0
+
+    novas = set()
+    no_imports = []
+    no_history = []
+    conciliadas = []
+    for aberta, conciliacao in pares:
+        nova = (
+            conciliacao["contraparte"]
+            if conciliacao["id"] == aberta["id"]
+            else conciliacao["id"]
+        )
+        novas.add(nova)
+        entrada = pending_reconciliation.render_reconciled_entry(conciliacao)
+        if aberta["fonte"] == "ofx":
+            no_imports.append(
+                (pending_reconciliation.ofx_block_matcher(aberta["id"]), "")
+            )
+            conciliadas.append(entrada)
+        else:
+            no_history.append(
+                (
+                    pending_reconciliation.orphan_block_matcher(aberta),
+                    entrada.rstrip("\n"),
+                )
+            )
+
+    marcas = [pending_reconciliation.ofx_block_matcher(nova) for nova in novas]
+    lancamentos = [
+        lancamento
+        for lancamento in lancamentos
+        if not any(marca(lancamento) for marca in marcas)
+    ]
+    pending_reconciliation.rewrite_entries(imports_path, no_imports)
+    pending_reconciliation.rewrite_entries(history_path, no_history)
+
+    abertas = [p for p in pendencias if p["id"] not in novas]
+    return lancamentos + conciliadas, abertas, len(pares)
+
+
+def liquidar_agendados(
+    store,
+    lancamentos: list[str],
+    pagamentos: list[dict],
+    history_path: Path,
+) -> tuple[list[str], int]:
+    """
+    Liquida agendados ("!") do Organizze pagos nesta importação.
+
+    A entrada do agendado passa a "*" em history.beancount e a transação do
+    OFX não é lançada de novo.
+
+    Returns:
+        Tuple (lançamentos a gravar, agendados liquidados)
+    """
+    pares = scheduled_settlement.settle(
+        store, pagamentos, scheduled_settlement.MODO_PAGO
+    )
+    if not pares:
+        return lancamentos, 0
+
+    scheduled_settlement.flip_settled_entries(
+        history_path, [agendado for agendado, _ in pares]
+    )
+    marcas = [
+        pending_reconciliation.ofx_block_matcher(pagamento["id"])
+        for _, pagamento in pares
+    ]
+    lancamentos = [
+        lancamento
+        for lancamento in lancamentos
+        if not any(marca(lancamento) for marca in marcas)
+    ]
+    return lancamentos, len(pares)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Importa transações OFX para Beancount usando mapping.csv"
@@ -283,6 +417,12 @@ def main():
         default="Jose Eduardo",
         help="Nome do usuário para detectar transferências próprias",
     )
+    parser.add_argument(
+        "--pendencias",
+        type=Path,
+        default=pendencias_store.DEFAULT_PATH,
+        help="Banco SQLite do relatório de pendências",
+    )
 
     args = parser.parse_args()
 
@@ -299,24 +439,45 @@ def main():
     mapping = carregar_mapping(mapping_path)
     print(f"  {len(mapping)} padrões carregados")
 
+    store = pendencias_store.open_store(args.pendencias)
+
     print(f"Verificando FITIDs existentes em history e imports...")
     fitids_existentes = extrair_fitids_existentes(args.history, args.output)
+    # Pagamentos que liquidaram agendados não viram lançamento próprio
+    fitids_existentes.update(
+        liquidacao["liquidado_por"].removeprefix(pending_reconciliation.PREFIXO_OFX)
+        for liquidacao in pendencias_store.load_liquidacoes(store).values()
+    )
     print(f"  {len(fitids_existentes)} FITIDs encontrados")
 
     print(f"Processando OFX: {args.ofx_file}")
+    pendencias = []
+    pagamentos = []
     lancamentos, duplicados, nao_classificados = processar_ofx(
         args.ofx_file,
         args.account,
         mapping,
         fitids_existentes,
         args.usuario,
+        pendencias,
+        pagamentos,
+    )
+
+    lancamentos, pendencias, conciliadas = conciliar_transferencias(
+        store, lancamentos, pendencias, args.output, args.history
+    )
+    lancamentos, liquidados = liquidar_agendados(
+        store, lancamentos, pagamentos, args.history
     )
 
     print(f"  {len(lancamentos)} novos lançamentos")
+    print(f"  {conciliadas} transferências pendentes conciliadas")
+    print(f"  {liquidados} agendados liquidados")
     print(f"  {duplicados} duplicados (ignorados)")
     print(f"  {nao_classificados} não classificados (!)")
 
     if not lancamentos:
+        store.close()
         print("Nenhum novo lançamento para adicionar.")
         return 0
 
@@ -328,6 +489,11 @@ def main():
 
     print(f"Lançamentos adicionados a: {args.output}")
 
+    pendencias_store.add_items(store, pendencias)
+    store.close()
+    if pendencias:
+        print(f"  {len(pendencias)} transferências pendentes em: {args.pendencias}")
+
     print("Validando com bean-check...")
     import subprocess
 